@@ -3,17 +3,19 @@ import time
 import bcrypt
 from dotenv import load_dotenv
 import os
-import sys
-import subprocess
 
 from utils.handle_sql import get_data, execute_query, create_user_views
-from utils.agent_utils import reset_global_context
+from utils.memory_store import reset_memory
 
-from rag_agent.main_agent import run_fintech_agent
+from rag_agent.main_agent import run_fintech_agent, stream_fintech_agent
 from rag_agent.knowledge_agent import load_knowledge_base
+from utils.handle_chromaDB import sync_mysql_to_chroma
 
 load_dotenv()
 
+# 스트리밍 답변 렌더링 주기 (초): 토큰마다 다시 그리지 않고 이 간격으로 묶어서 갱신
+STREAM_RENDER_INTERVAL = 0.05
+
 # ==========================================
 # 1. 페이지 설정 및 디자인
 # ==========================================
@@ -159,13 +161,14 @@ def init_chroma_connection():
             needs_setup = True
             
     if needs_setup:
-        print(f"DB 데이터가 비어있어 'utils/handle_chromaDB.py' 스크립트를 실행합니다.")
-        try:
-            subprocess.run([sys.executable, "utils/handle_chromaDB.py"], check=True)
-            print("DB 초기화 및 데이터 임베딩이 성공적으로 완료되었습니다.")
-        except subprocess.CalledProcessError as e:
-            print(f"DB 초기화 중 오류가 발생했습니다: {e}")
+        # MySQL에 저장된 벡터로만 컬렉션을 다시 채움. 임베딩 생성(모델 변경 시 전체 초기화 포함)은
+        # 웹 요청 안에서 돌지 않도록 CLI(utils/mysql_to_vector.py, utils/handle_chromaDB.py)에서만 실행
+        print("DB 데이터가 비어있어 MySQL 임베딩으로 벡터 DB를 구축합니다.")
+        stats = sync_mysql_to_chroma(embed_missing=False)
+        if not (stats["upserted"] or stats["skipped"]):
+            print("DB 초기화 중 오류가 발생했습니다: 벡터 DB에 넣을 임베딩이 없습니다. (utils/mysql_to_vector.py 실행 필요)")
             return False
+        print(f"DB 초기화가 완료되었습니다. (반영 {stats['upserted']}개 / 벡터 없음 {stats['missing']}개)")
             
     load_knowledge_base()
     return True
@@ -238,7 +241,7 @@ def login_page():
                                 target_hash = target_hash.encode('utf-8')
                             
                             if bcrypt.checkpw(password_input.encode('utf-8'), target_hash):
-                                reset_global_context()
+                                reset_memory(username)
                                 st.session_state['logged_in'] = True
                                 st.session_state['current_user'] = username
                                 st.session_state['user_name_real'] = korean_name
@@ -336,7 +339,8 @@ def chat_page():
                         
             with col_logout:
                 if st.button("로그아웃", use_container_width=True):
-                    reset_global_context()
+                    if st.session_state.get('current_user'):
+                        reset_memory(st.session_state['current_user'])
                     
                     st.session_state['logged_in'] = False
                     st.session_state['current_user'] = None
@@ -408,51 +412,66 @@ def chat_page():
             st.markdown(user_input)
 
         thinking_placeholder = st.empty()
-        
         with thinking_placeholder.chat_message("assistant", avatar="img/버디_생각.png"):
-            with st.spinner("버디가 답변을 생성하고 있어요..."):
-                try:
-                    result = run_fintech_agent(
-                        user_input,
-                        st.session_state['current_user'],
-                        st.session_state.get("transfer_context"),
-                        st.session_state['allowed_views']
-                    )
-
-                    if isinstance(result, dict):
-                        if result.get("context"):
-                            st.session_state["transfer_context"] = result["context"]
-                        else:
-                            st.session_state["transfer_context"] = None
+            st.markdown("버디가 답변을 생성하고 있어요...")
 
-                        st.session_state["last_result"] = result
-                        final_response = result.get("message", "")
+        message_placeholder = None
+        streamed_text = ""
+        last_render = 0.0
 
-                        if result.get("status") in ["SUCCESS", "CANCEL", "FAIL"]:
-                            st.session_state["transfer_context"] = None
-                            st.session_state["last_result"] = None
-                    else:
-                        st.session_state["transfer_context"] = None
-                        st.session_state["last_result"] = None
-                        final_response = result
+        try:
+            result = None
+            for event in stream_fintech_agent(
+                user_input,
+                st.session_state['current_user'],
+                st.session_state.get("transfer_context"),
+                st.session_state['allowed_views']
+            ):
+                if event["type"] == "final":
+                    result = event["result"]
+                    continue
+
+                if message_placeholder is None:
+                    thinking_placeholder.empty()
+                    with st.chat_message("assistant", avatar="img/버디_답변.png"):
+                        message_placeholder = st.empty()
+
+                streamed_text += event["content"]
+                now = time.time()
+                if now - last_render >= STREAM_RENDER_INTERVAL:
+                    message_placeholder.markdown(streamed_text + "▌")
+                    last_render = now
 
-                except Exception as e:
-                    final_response = f"미안해요, 오류가 발생했어요: {e}"
+            if isinstance(result, dict):
+                if result.get("context"):
+                    st.session_state["transfer_context"] = result["context"]
+                else:
+                    st.session_state["transfer_context"] = None
+
+                st.session_state["last_result"] = result
+                final_response = result.get("message", "")
+
+                if result.get("status") in ["SUCCESS", "CANCEL", "FAIL"]:
+                    st.session_state["transfer_context"] = None
                     st.session_state["last_result"] = None
+            else:
+                st.session_state["transfer_context"] = None
+                st.session_state["last_result"] = None
+                final_response = result or ""
+
+        except Exception as e:
+            final_response = f"미안해요, 오류가 발생했어요: {e}"
+            st.session_state["last_result"] = None
 
         thinking_placeholder.empty()
 
-        with st.chat_message("assistant", avatar="img/버디_답변.png"):
-            message_placeholder = st.empty()
-            
-            streamed_text = ""
-            for char in final_response:
-                streamed_text += char
-                time.sleep(0.005)
-                message_placeholder.markdown(streamed_text + "▌")
-
-            message_placeholder.markdown(streamed_text)
-            st.session_state['messages'].append({"role": "assistant", "content": streamed_text})
+        if message_placeholder is None:
+            with st.chat_message("assistant", avatar="img/버디_답변.png"):
+                message_placeholder = st.empty()
+
+        # 스트리밍된 토큰은 답변 본문만 포함하므로, 최종 결과(출처/헤더 포함)로 한 번 더 렌더링
+        message_placeholder.markdown(final_response)
+        st.session_state['messages'].append({"role": "assistant", "content": final_response})
 
         if st.session_state.get("last_result", {}) and \
            st.session_state["last_result"].get("ui_type") == "confirm_buttons":
@@ -0,0 +1,113 @@
+"""
+검색 인덱스 차원 축소(Matryoshka) / int8 양자화 설정 비교 벤치마크
+
+MySQL에 저장된 전체 차원 벡터(terms.embedding_blob)로 설정별 NumPy 정확 검색 인덱스를 만들어
+    - 인덱스 크기 (벡터 + scale + norm)
+    - 벡터 검색 지연시간 p50/p95 (질문 임베딩 계산 제외)
+    - recall@3 (name / definition 질문)
+    - 보정된 거리 임계값과, 그 임계값으로 정답 문서가 채택되는 비율
+을 비교합니다. 질문 임베딩은 전체 차원으로 한 번만 계산해 설정별로 잘라 씁니다.
+
+사용법:
+    python benchmarks/bench_dimensions.py
+    python benchmarks/bench_dimensions.py --dims 0 1024 512 256 --samples 200   # 0: 전체 차원
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.common import percentile, build_queries
+from utils.handle_sql import get_all_terms
+from utils.embedding_backends import get_embeddings, truncate_vectors
+from utils.vector_blob import get_embedding_meta, load_embedding_matrix
+from utils.vector_index import NumpyVectorIndex, save_numpy_index, quantize_int8, calibrate_threshold, VECTORS_FILE, SCALES_FILE, NORMS_FILE
+from utils.handle_chromaDB import SIMILARITY_THRESHOLD
+
+TOP_K = 3
+
+def index_bytes(index_dir):
+    return sum(
+        os.path.getsize(os.path.join(index_dir, name))
+        for name in (VECTORS_FILE, SCALES_FILE, NORMS_FILE)
+        if os.path.exists(os.path.join(index_dir, name))
+    )
+
+def run_config(workdir, ids, full, query_vectors, queries, dim, dtype):
+    matrix = truncate_vectors(full, dim)
+    threshold = calibrate_threshold(full, matrix, SIMILARITY_THRESHOLD) if matrix.shape[1] < full.shape[1] else SIMILARITY_THRESHOLD
+    if dtype == "int8":
+        quantized, scales = quantize_int8(matrix)
+        threshold = calibrate_threshold(matrix, quantized.astype(np.float32) * scales[:, None], threshold)
+
+    index_dir = os.path.join(workdir, f"{dim}_{dtype}")
+    docs = [str(i) for i in ids]
+    metas = [{"original_id": i} for i in ids]
+    save_numpy_index(index_dir, docs, docs, metas, matrix, meta={}, quantize=dtype == "int8")
+    index = NumpyVectorIndex(index_dir, embeddings=None)
+
+    latencies = []
+    hits = {"name": [0, 0], "definition": [0, 0]}
+    accepted = 0
+    for (kind, _, expected_id), query in zip(queries, truncate_vectors(query_vectors, dim)):
+        t0 = time.perf_counter()
+        results = index.similarity_search_by_vector_with_score(query, k=TOP_K)
+        latencies.append(time.perf_counter() - t0)
+        found = {doc.metadata["original_id"]: score for doc, score in results}
+        hits[kind][0] += int(expected_id in found)
+        hits[kind][1] += 1
+        accepted += int(expected_id in found and found[expected_id] <= threshold)
+
+    total_hit = sum(h[0] for h in hits.values())
+    recall = {kind: (h[0] / h[1] if h[1] else 0.0) for kind, h in hits.items()}
+    print(f"{matrix.shape[1]:>5}차원 {dtype:<8} 크기: {index_bytes(index_dir) / 1024 / 1024:8.2f}MB  "
+          f"p50: {percentile(latencies, 50) * 1000:7.3f}ms  p95: {percentile(latencies, 95) * 1000:7.3f}ms  "
+          f"recall@3: {total_hit / len(queries) * 100:5.1f}% (name {recall['name'] * 100:5.1f}% / definition {recall['definition'] * 100:5.1f}%)  "
+          f"임계값: {threshold:.4f} (정답 채택 {accepted / len(queries) * 100:5.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="인덱스 차원 / int8 양자화 설정별 크기·지연시간·recall 비교")
+    parser.add_argument("--dims", nargs="+", type=int, default=[0, 1024, 512, 256], help="인덱스 차원 (0: 전체 차원)")
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "int8"], choices=["float32", "int8"])
+    parser.add_argument("--samples", type=int, default=100, help="질문을 만들 용어 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    meta = get_embedding_meta()
+    ids, full = load_embedding_matrix()
+    stored_ids = set(ids)
+    terms = [row for row in get_all_terms() if row["id"] in stored_ids]
+    if meta is None or not terms:
+        print("MySQL에 저장된 임베딩이 없습니다. (utils/mysql_to_vector.py 실행 필요)")
+        return
+    queries = build_queries(terms, args.samples, args.seed)
+
+    embeddings = get_embeddings(meta["backend"], meta["model"])
+    query_vectors = np.asarray([embeddings.embed_query(question) for _, question, _ in queries], dtype=np.float32)
+
+    print("\n" + "=" * 150)
+    print(f"임베딩: {meta['backend']} / {meta['model']} ({full.shape[1]}차원)  코퍼스: {len(ids)}개  질문: {len(queries)}개  "
+          f"기준 임계값: {SIMILARITY_THRESHOLD}")
+    print("-" * 150)
+    workdir = tempfile.mkdtemp(prefix="bench_dimensions_")
+    try:
+        for dim in args.dims:
+            if dim and dim > full.shape[1]:
+                continue
+            for dtype in args.dtypes:
+                run_config(workdir, ids, full, query_vectors, queries, dim, dtype)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("=" * 150)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+임베딩 백엔드 비교 벤치마크 (OpenAI vs 로컬 ONNX)
+
+terms 테이블 일부를 각 백엔드로 임베딩한 뒤, 메모리 안에서 정확(brute-force) 검색을 수행해
+    - 모델 로딩 시간 / 최대 RSS 증가량
+    - 문서 임베딩 처리량 (docs/s)
+    - 질문 임베딩 지연시간 p50/p95
+    - recall@3 (name / definition 질문)
+을 비교합니다.
+
+사용법:
+    python benchmarks/bench_embeddings.py
+    python benchmarks/bench_embeddings.py --backends onnx --corpus-limit 500 --samples 100
+"""
+import os
+import sys
+import time
+import resource
+import argparse
+
+import numpy as np
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.common import percentile, build_queries
+from utils.handle_sql import get_all_terms
+from utils.embedding_backends import backend_model_name, get_embeddings
+
+def max_rss_mb():
+    # Linux의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_backend(backend, corpus, queries):
+    model = backend_model_name(backend)
+    rss_before = max_rss_mb()
+    t0 = time.perf_counter()
+    embeddings = get_embeddings(backend, model)
+    load_seconds = time.perf_counter() - t0
+
+    documents = [f"{row['word']}: {row['definition']}" for row in corpus]
+    t0 = time.perf_counter()
+    matrix = np.asarray(embeddings.embed_documents(documents), dtype=np.float32)
+    index_seconds = time.perf_counter() - t0
+    matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    ids = [row["id"] for row in corpus]
+
+    latencies = []
+    hits = {"name": [0, 0], "definition": [0, 0]}
+    for kind, question, expected_id in queries:
+        t0 = time.perf_counter()
+        query = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+        latencies.append(time.perf_counter() - t0)
+        top = np.argsort(-(matrix @ query))[:3]
+        hits[kind][0] += int(expected_id in [ids[i] for i in top])
+        hits[kind][1] += 1
+
+    total_hit = sum(h[0] for h in hits.values())
+    recall = {kind: (h[0] / h[1] if h[1] else 0.0) for kind, h in hits.items()}
+    print(f"{backend:<7} {model:<24} dim: {matrix.shape[1]:>5}  load: {load_seconds:6.2f}s  "
+          f"RSS +{max_rss_mb() - rss_before:7.1f}MB  색인: {len(documents) / index_seconds:8.1f} docs/s")
+    print(f"{'':<7} {'':<24} recall@3: {total_hit / len(queries) * 100:5.1f}% "
+          f"(name {recall['name'] * 100:5.1f}% / definition {recall['definition'] * 100:5.1f}%)  "
+          f"query p50: {percentile(latencies, 50) * 1000:8.2f}ms  p95: {percentile(latencies, 95) * 1000:8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI / ONNX 임베딩 백엔드 지연시간·메모리·recall 비교")
+    parser.add_argument("--backends", nargs="+", default=["openai", "onnx"], choices=["openai", "onnx"])
+    parser.add_argument("--corpus-limit", type=int, default=1000, help="임베딩할 최대 용어 수")
+    parser.add_argument("--samples", type=int, default=100, help="질문을 만들 용어 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    terms = get_all_terms()
+    if not terms:
+        print("terms 테이블이 비어 있습니다.")
+        return
+    corpus = list(terms)[:args.corpus_limit]
+    queries = build_queries(corpus, args.samples, args.seed)
+
+    print("\n" + "=" * 110)
+    print(f"코퍼스: {len(corpus)}개 용어 / 질문: {len(queries)}개")
+    print("-" * 110)
+    for backend in args.backends:
+        try:
+            run_backend(backend, corpus, queries)
+        except Exception as e:
+            print(f"{backend:<7} 실행 실패: {e}")
+    print("=" * 110)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+금융 용어 검색 방식 비교 벤치마크 (vector / lexical / hybrid)
+
+terms 테이블에서 용어를 샘플링해 두 종류의 질문을 만들고,
+각 검색 방식이 정답 용어를 상위 3개 안에 포함하는 비율(recall@3)과 지연시간을 측정합니다.
+    - name: 용어명을 그대로 포함한 질문 ("DSR가 뭐야?")
+    - definition: 용어명 없이 정의 일부만 담은 질문
+
+사용법:
+    python benchmarks/bench_retrieval.py
+    python benchmarks/bench_retrieval.py --samples 200 --modes hybrid vector
+    python benchmarks/bench_retrieval.py --with-dictionary   # 용어 사전 정확 일치 경로 포함
+"""
+import os
+import sys
+import time
+import argparse
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.common import percentile, build_queries
+from utils.agent_utils import run_sync
+from utils.handle_sql import get_all_terms
+from utils.lexical_index import get_lexical_index
+from rag_agent.knowledge_agent import aretrieve
+
+MODES = ["vector", "lexical", "hybrid"]
+
+def main():
+    parser = argparse.ArgumentParser(description="vector / lexical / hybrid 검색 recall@3 및 지연시간 비교")
+    parser.add_argument("--samples", type=int, default=100, help="샘플링할 용어 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--with-dictionary", action="store_true", help="용어 사전 정확 일치 fast path를 켠 상태로 측정")
+    args = parser.parse_args()
+
+    terms = get_all_terms()
+    if not terms:
+        print("terms 테이블이 비어 있습니다.")
+        return
+    queries = build_queries(terms, args.samples, args.seed, key="word")
+
+    # 인덱스 구축 시간은 측정에서 제외
+    t0 = time.perf_counter()
+    index = get_lexical_index()
+    print(f"BM25 인덱스 구축: {len(index)}개 용어, {time.perf_counter() - t0:.3f}초")
+
+    print("\n" + "=" * 100)
+    print(f"질문 수: {len(queries)}  (용어 {min(args.samples, len(terms))}개 x name/definition)")
+    print("-" * 100)
+    for mode in args.modes:
+        latencies = []
+        hits = {"name": [0, 0], "definition": [0, 0]}
+        for kind, question, expected in queries:
+            t0 = time.perf_counter()
+            docs = run_sync(aretrieve(question, mode=mode, verbose=False, use_dictionary=args.with_dictionary, related=0))
+            latencies.append(time.perf_counter() - t0)
+            words = [doc.metadata.get("word") for doc, _ in docs]
+            hits[kind][0] += int(expected in words)
+            hits[kind][1] += 1
+
+        total_hit = sum(h[0] for h in hits.values())
+        recall = {kind: (h[0] / h[1] if h[1] else 0.0) for kind, h in hits.items()}
+        print(f"{mode:<8} recall@3: {total_hit / len(queries) * 100:5.1f}%  "
+              f"(name {recall['name'] * 100:5.1f}% / definition {recall['definition'] * 100:5.1f}%)  "
+              f"p50: {percentile(latencies, 50) * 1000:8.2f}ms  p95: {percentile(latencies, 95) * 1000:8.2f}ms")
+    print("=" * 100)
+
+if __name__ == "__main__":
+    main()
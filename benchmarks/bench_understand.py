@@ -0,0 +1,90 @@
+"""
+이해 단계(Understanding Stage) 비교 벤치마크
+
+동일한 입력에 대해 기존 3단계 경로(translate -> refine -> route)와
+통합 경로(node_understand)를 각각 실행하여 노드별 소요시간과 분류 결과를 비교합니다.
+
+사용법:
+    python benchmarks/bench_understand.py
+    python benchmarks/bench_understand.py --repeat 3 --questions "금리가 뭐야?" "Send 50 dollars to mom"
+"""
+import os
+import sys
+import argparse
+import statistics
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.agent_utils import run_sync
+from rag_agent.main_agent import (
+    node_translate,
+    node_refine,
+    node_route,
+    node_understand,
+    check_needs_context,
+)
+
+DEFAULT_QUESTIONS = [
+    "금리가 뭐야?",
+    "내 월급통장 잔액이 얼마야?",
+    "엄마한테 10만원 보내줘",
+    "안녕! 너 이름이 뭐야?",
+    "What is a DSR?",
+    "Số dư tài khoản của tôi là bao nhiêu?",
+    "Tolong kirim 50 dolar ke Budi",
+    "현재 삼성전자 주가 알려줘",
+]
+
+def run_three_hop(state: dict) -> dict:
+    updates = run_sync(node_translate(state))
+    state = {**state, **updates}
+    timings = dict(updates["_timings"])
+    if check_needs_context(state) == "refine":
+        refine_updates = run_sync(node_refine(state))
+        state = {**state, **refine_updates}
+        timings.update(refine_updates["_timings"])
+    route_updates = run_sync(node_route(state))
+    state = {**state, **route_updates}
+    timings.update(route_updates["_timings"])
+    return {"category": state.get("category"), "refined_query": state.get("refined_query"), "timings": timings}
+
+def run_fused(state: dict) -> dict:
+    updates = run_sync(node_understand(state))
+    return {"category": updates.get("category"), "refined_query": updates.get("refined_query"), "timings": updates["_timings"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="3단계 경로 vs 통합 이해 단계 소요시간 비교")
+    parser.add_argument("--questions", nargs="*", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--history", default="이전 대화 기록 없음(No previous conversation history).")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = []
+    for question in args.questions:
+        state = {"question": question, "_history": args.history}
+        for _ in range(args.repeat):
+            three_hop = run_three_hop(state)
+            fused = run_fused(state)
+            rows.append((question, three_hop, fused))
+
+    three_totals = [sum(r[1]["timings"].values()) for r in rows]
+    fused_totals = [sum(r[2]["timings"].values()) for r in rows]
+    agree = sum(1 for r in rows if (r[1]["category"] or "").strip() == (r[2]["category"] or "").strip())
+
+    print("\n" + "=" * 100)
+    print(f"{'질문':<40} {'3-hop(초)':>10} {'fused(초)':>10}  {'3-hop 분류':<12} {'fused 분류':<12}")
+    print("-" * 100)
+    for (question, three_hop, fused), t3, tf in zip(rows, three_totals, fused_totals):
+        print(f"{question[:38]:<40} {t3:>10.3f} {tf:>10.3f}  {three_hop['category']:<12} {fused['category']:<12}")
+        print(f"{'':<40} {' / '.join(f'{k}={v:.3f}' for k, v in three_hop['timings'].items())}")
+    print("-" * 100)
+    print(f"평균 소요시간  3-hop: {statistics.mean(three_totals):.3f}초 / fused: {statistics.mean(fused_totals):.3f}초")
+    print(f"중앙 소요시간  3-hop: {statistics.median(three_totals):.3f}초 / fused: {statistics.median(fused_totals):.3f}초")
+    print(f"분류 일치율: {agree}/{len(rows)} ({agree / len(rows) * 100:.1f}%)")
+    print("=" * 100)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+벡터 인덱스 비교 벤치마크 (Chroma HNSW vs NumPy 정확 검색 float32 / int8)
+
+코퍼스 크기별로 합성 임베딩(정규화된 가우시안 벡터)을 만들어
+    - 색인(저장) 시간
+    - 콜드 스타트 (인덱스 열기 + 첫 질문)
+    - 질문 지연시간 p50/p95 (임베딩 계산 제외, 벡터 검색만)
+    - recall@10 (float32 정확 검색 결과 대비)
+을 비교합니다. 데이터는 임시 디렉터리에 만들고 끝나면 삭제합니다.
+
+사용법:
+    python benchmarks/bench_vector_index.py
+    python benchmarks/bench_vector_index.py --sizes 1000 10000 100000 1000000 --dim 256
+    python benchmarks/bench_vector_index.py --chroma-max 100000   # 그보다 큰 코퍼스는 Chroma 생략
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.common import percentile
+from utils.vector_index import NumpyVectorIndex, save_numpy_index
+
+TOP_K = 10
+CHROMA_BATCH_SIZE = 5000
+GENERATE_BLOCK_ROWS = 100000
+
+def make_vectors(n, dim, seed):
+    rng = np.random.default_rng(seed)
+    matrix = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, GENERATE_BLOCK_ROWS):
+        block = rng.standard_normal((min(GENERATE_BLOCK_ROWS, n - start), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        matrix[start:start + len(block)] = block
+    return matrix
+
+def make_queries(matrix, count, seed):
+    # 코퍼스 벡터에 잡음을 더한 질문 (실제 질문처럼 정답 근처에 위치)
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(matrix), size=count)
+    queries = matrix[picks] + 0.3 * rng.standard_normal((count, matrix.shape[1]), dtype=np.float32) / np.sqrt(matrix.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def measure(search, queries):
+    latencies = []
+    results = []
+    for query in queries:
+        t0 = time.perf_counter()
+        hits = search(query)
+        latencies.append(time.perf_counter() - t0)
+        results.append(hits)
+    return latencies, results
+
+def recall_at_k(results, truth):
+    found = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return found / max(1, sum(len(t) for t in truth))
+
+def report(name, build_seconds, cold_seconds, latencies, recall):
+    print(f"  {name:<14} 색인: {build_seconds:8.2f}s  콜드스타트: {cold_seconds * 1000:9.2f}ms  "
+          f"p50: {percentile(latencies, 50) * 1000:8.3f}ms  p95: {percentile(latencies, 95) * 1000:8.3f}ms  "
+          f"recall@{TOP_K}: {recall * 100:5.1f}%")
+
+def bench_numpy(workdir, ids, docs, metas, matrix, queries, quantize):
+    index_dir = os.path.join(workdir, "int8" if quantize else "float32")
+    t0 = time.perf_counter()
+    save_numpy_index(index_dir, ids, docs, metas, matrix, meta={"embedding_backend": "synthetic", "embedding_model": "random"}, quantize=quantize)
+    build_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = NumpyVectorIndex(index_dir, embeddings=None)
+    index.similarity_search_by_vector_with_score(queries[0], k=TOP_K)
+    cold_seconds = time.perf_counter() - t0
+
+    search = lambda q: [doc.id for doc, _ in index.similarity_search_by_vector_with_score(q, k=TOP_K)]
+    latencies, results = measure(search, queries)
+    return build_seconds, cold_seconds, latencies, results
+
+def bench_chroma(workdir, ids, docs, metas, matrix, queries):
+    import chromadb
+
+    path = os.path.join(workdir, "chroma")
+    t0 = time.perf_counter()
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection(name="bench", embedding_function=None, metadata={"hnsw:space": "l2"})
+    for i in range(0, len(ids), CHROMA_BATCH_SIZE):
+        collection.add(
+            ids=ids[i:i + CHROMA_BATCH_SIZE],
+            documents=docs[i:i + CHROMA_BATCH_SIZE],
+            metadatas=metas[i:i + CHROMA_BATCH_SIZE],
+            embeddings=matrix[i:i + CHROMA_BATCH_SIZE],
+        )
+    build_seconds = time.perf_counter() - t0
+    del collection, client
+
+    # 새 클라이언트로 다시 열어 콜드 스타트(세그먼트 로딩 포함)를 측정
+    chromadb.api.client.SharedSystemClient.clear_system_cache()
+    t0 = time.perf_counter()
+    collection = chromadb.PersistentClient(path=path).get_collection("bench")
+    collection.query(query_embeddings=[queries[0]], n_results=TOP_K)
+    cold_seconds = time.perf_counter() - t0
+
+    search = lambda q: collection.query(query_embeddings=[q], n_results=TOP_K)["ids"][0]
+    latencies, results = measure(search, queries)
+    return build_seconds, cold_seconds, latencies, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma / NumPy 벡터 인덱스 콜드 스타트·지연시간 비교")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256, help="합성 임베딩 차원 (text-embedding-3-large: 3072, e5-small: 384)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--chroma-max", type=int, default=100000, help="이 크기를 넘는 코퍼스는 Chroma 측정을 생략 (0: 항상 생략)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 120)
+    print(f"차원: {args.dim} / 질문: {args.queries}개 / top-k: {TOP_K}")
+    for size in args.sizes:
+        matrix = make_vectors(size, args.dim, args.seed)
+        queries = make_queries(matrix, args.queries, args.seed)
+        ids = [str(i) for i in range(size)]
+        docs = [f"term-{i}" for i in range(size)]
+        metas = [{"original_id": i} for i in range(size)]
+
+        print("-" * 120)
+        print(f"코퍼스 {size:,}개 (float32 행렬 {matrix.nbytes / 1024 / 1024:,.1f}MB)")
+        workdir = tempfile.mkdtemp(prefix="bench_vector_index_")
+        try:
+            build, cold, latencies, truth = bench_numpy(workdir, ids, docs, metas, matrix, queries, quantize=False)
+            report("numpy float32", build, cold, latencies, 1.0)
+
+            build, cold, latencies, results = bench_numpy(workdir, ids, docs, metas, matrix, queries, quantize=True)
+            report("numpy int8", build, cold, latencies, recall_at_k(results, truth))
+
+            if 0 < size <= args.chroma_max:
+                try:
+                    build, cold, latencies, results = bench_chroma(workdir, ids, docs, metas, matrix, queries)
+                    report("chroma hnsw", build, cold, latencies, recall_at_k(results, truth))
+                except Exception as e:
+                    print(f"  chroma hnsw    실행 실패: {e}")
+            else:
+                print("  chroma hnsw    생략 (--chroma-max)")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    print("=" * 120)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+벤치마크 스크립트 공용 헬퍼 (지연시간 백분위, 용어 샘플 질문 생성)
+"""
+import random
+
+DEFINITION_SNIPPET_LENGTH = 40
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def build_queries(terms, samples, seed, key="id"):
+    """
+    용어를 seed로 섞어 samples개를 뽑고 (종류, 질문, 정답) 목록을 만듭니다.
+        - name: 용어명을 그대로 포함한 질문
+        - definition: 용어명 없이 정의 일부만 담은 질문
+    정답은 용어 행의 key 값 (기본: id)
+    """
+    sampled = list(terms)
+    random.Random(seed).shuffle(sampled)
+    queries = []
+    for row in sampled[:samples]:
+        word = row["word"]
+        queries.append(("name", f"{word}가 뭐야?", row[key]))
+        snippet = row["definition"].replace(word, "").strip()[:DEFINITION_SNIPPET_LENGTH]
+        if snippet:
+            queries.append(("definition", f"{snippet} 이게 무슨 뜻이야?", row[key]))
+    return queries
@@ -0,0 +1,85 @@
+"""
+로컬 의도 분류기 vs LLM 라우터 오프라인 평가
+
+data/router_examples.csv의 라벨링된 예시를 Leave-one-out 방식으로 평가합니다.
+(평가 대상 문장은 로컬 분류기 학습 데이터에서 제외)
+
+사용법:
+    python benchmarks/eval_router.py            # 로컬 + LLM 라우터 모두 평가
+    python benchmarks/eval_router.py --local-only
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(current_file_path))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.common import percentile
+from utils.intent_router import IntentRouter, load_router_examples, load_router_keywords
+
+def summarize(name, predictions, labels, latencies):
+    correct = sum(1 for p, l in zip(predictions, labels) if p == l)
+    print(f"{name:<22} 정확도: {correct}/{len(labels)} ({correct / len(labels) * 100:5.1f}%)  "
+          f"p50: {percentile(latencies, 50) * 1000:8.2f}ms  p95: {percentile(latencies, 95) * 1000:8.2f}ms  "
+          f"평균: {statistics.mean(latencies) * 1000:8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 의도 분류기 정확도/지연시간 평가")
+    parser.add_argument("--local-only", action="store_true", help="LLM 라우터 호출 없이 로컬 분류기만 평가")
+    args = parser.parse_args()
+
+    examples = load_router_examples()
+    keywords = load_router_keywords()
+    if not examples:
+        print("평가할 예시가 없습니다: data/router_examples.csv")
+        return
+
+    labels = [cat for cat, _ in examples]
+    local_preds, local_conf, local_lat = [], [], []
+    for i, (_, question) in enumerate(examples):
+        router = IntentRouter(examples[:i] + examples[i + 1:], keywords)
+        t0 = time.perf_counter()
+        category, _, confident = router.classify(question)
+        local_lat.append(time.perf_counter() - t0)
+        local_preds.append(category)
+        local_conf.append(confident)
+
+    llm_preds, llm_lat = [], []
+    if not args.local_only:
+        from rag_agent.main_agent import _router_chain
+        chain = _router_chain()
+        for _, question in examples:
+            t0 = time.perf_counter()
+            category = chain.invoke({"question": question}).strip()
+            llm_lat.append(time.perf_counter() - t0)
+            llm_preds.append(category.replace("'", "").replace('"', "").replace(".", ""))
+
+    covered = [i for i, c in enumerate(local_conf) if c]
+    print("\n" + "=" * 100)
+    print(f"평가 문장 수: {len(examples)}  /  로컬 확신 처리: {len(covered)}개 ({len(covered) / len(examples) * 100:.1f}%)")
+    print("-" * 100)
+    summarize("Local (전체)", local_preds, labels, local_lat)
+    if covered:
+        summarize("Local (확신 구간)", [local_preds[i] for i in covered], [labels[i] for i in covered], [local_lat[i] for i in covered])
+
+    if llm_preds:
+        summarize("LLM Router", llm_preds, labels, llm_lat)
+        hybrid_preds = [local_preds[i] if local_conf[i] else llm_preds[i] for i in range(len(examples))]
+        hybrid_lat = [local_lat[i] if local_conf[i] else local_lat[i] + llm_lat[i] for i in range(len(examples))]
+        summarize("Local + LLM Fallback", hybrid_preds, labels, hybrid_lat)
+
+    misses = [(labels[i], examples[i][1], local_preds[i]) for i in covered if local_preds[i] != labels[i]]
+    if misses:
+        print("-" * 100)
+        print("로컬 확신 구간 오분류:")
+        for label, question, pred in misses:
+            print(f"   [{label} -> {pred}] {question}")
+    print("=" * 100)
+
+if __name__ == "__main__":
+    main()
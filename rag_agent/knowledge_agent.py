@@ -1,23 +1,44 @@
+import os
+import re
+import time
+import asyncio
 from datetime import datetime
 from pathlib import Path
 from typing import TypedDict, Literal
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.documents import Document
 from langgraph.graph import StateGraph, START, END
 
 from tools.run_websearch import WebSearchRAG
-from utils.agent_utils import read_prompt, print_log
-from utils.handle_chromaDB import load_knowledge_base 
+from utils.agent_utils import get_chain, print_log, run_sync, count_tokens, ANSWER_STREAM_TAG
+from utils.chunking import split_passages, rank_passages
+from utils.handle_chromaDB import load_knowledge_base, get_embedding_cache_stats, get_similarity_threshold
+from utils.semantic_cache import get_answer_cache
+from utils.lexical_index import BM25Index, get_lexical_index, term_document
+from utils.term_dictionary import get_term_dictionary
+from utils.term_graph import get_term_graph
 
 load_dotenv()
 
 CURRENT_DIR = Path(__file__).resolve().parent
 PROMPT_DIR = CURRENT_DIR / "prompt" / "finrag"
 
-SIMILARITY_THRESHOLD = 0.6
+# 검색 방식: hybrid(BM25 + 벡터, RRF 결합) / vector / lexical
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+RRF_K = 60
+# 벡터 검색 후보 수. 긴 정의는 문단별 문서로 색인되므로 같은 용어의 문단이 여러 개 잡혀도 용어 수가 모자라지 않게 넉넉히 조회
+VECTOR_SEARCH_K = int(os.getenv("VECTOR_SEARCH_K", "10"))
+# 답변 생성에 넘길 참고 문단의 토큰 예산
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# "X가 뭐야?"처럼 질문이 용어명 그 자체이면 사전에서 바로 정의를 가져옴 (임베딩/벡터 검색 생략)
+USE_TERM_DICTIONARY = os.getenv("USE_TERM_DICTIONARY", "true").lower() == "true"
+# 시맨틱 답변 캐시 TTL(초): 내부 DB 답변은 길게, 웹 검색 답변은 짧게 유지
+KNOWLEDGE_CACHE_TTL = int(os.getenv("KNOWLEDGE_CACHE_TTL", str(7 * 24 * 3600)))
+WEB_CACHE_TTL = int(os.getenv("WEB_CACHE_TTL", "600"))
+# 최상위 검색 결과에 덧붙일 연관검색어(PDF에 정리된 연관 용어) 수. 0이면 확장하지 않음
+RELATED_TERMS_K = int(os.getenv("RELATED_TERMS_K", "2"))
 WEB_SEARCH_KEYWORDS = ["현재", "최신", "오늘", "주가", "시세", "뉴스", "전망", "날씨", "검색해줘", "얼마야","지금","검색","검색해"]
 
 llm = ChatOpenAI(model="gpt-5-mini")
@@ -34,84 +55,247 @@ class FinRAGState(TypedDict, total=False):
     context_text: str
     citations: list
     final_output: str
+    answer_source: str
+    cacheable: bool
+    prefetched: object
 
 # ---------------------------------------------------------
 # 노드
 # ---------------------------------------------------------
-def node_route(state: FinRAGState) -> dict:
+def is_web_query(korean_query: str) -> bool:
+    """실시간 정보가 필요한 질문(웹 검색 키워드 포함)인지. 라우팅과 답변 캐시 namespace가 같은 기준을 씁니다."""
+    return any(kw in korean_query for kw in WEB_SEARCH_KEYWORDS)
+
+async def node_route(state: FinRAGState) -> dict:
     t0 = print_log("1. 검색 방식 라우팅 (node_route)", "start")
     korean_query = state["korean_query"]
-    use_web = any(kw in korean_query for kw in WEB_SEARCH_KEYWORDS)
+    use_web = is_web_query(korean_query)
     
     extra = f"키워드 감지됨 -> 웹 검색 전환" if use_web else "웹 검색 키워드 없음 -> 내부 DB 검색"
     print_log("1. 검색 방식 라우팅 (node_route)", "end", t0, extra_info=extra)
     return {"use_web": use_web}
 
-def node_web_search(state: FinRAGState) -> dict:
+async def node_web_search(state: FinRAGState) -> dict:
     t0 = print_log("2-A. 웹 검색 수행 (node_web_search)", "start")
     korean_query = state["korean_query"]
     original_query = state.get("original_query")
     
-    web_result = web_rag.web_search(korean_query)
+    web_result = await web_rag.aweb_search(korean_query)
     final_output = web_rag.format_web_result(web_result, original_query, korean_query)
+    cacheable = web_result.get("source_type") != "Error" and bool(web_result.get("sources"))
     
     print_log("2-A. 웹 검색 수행 (node_web_search)", "end", t0, extra_info="웹 검색 완료 및 포맷팅")
-    return {"final_output": final_output}
+    return {"final_output": final_output, "answer_source": "web", "cacheable": cacheable}
 
-def node_db_retrieve(state: FinRAGState) -> dict:
-    t0 = print_log("2-B. 벡터 DB 검색 (node_db_retrieve)", "start")
+async def asearch_knowledge_base(korean_query: str, k: int = VECTOR_SEARCH_K) -> list:
+    """벡터 DB에서 (doc, L2 거리) 목록을 조회합니다. 메인 에이전트의 투기적 검색에서도 사용합니다. (문단 단위, 거리순)"""
     vs = load_knowledge_base()
-        
+    if not vs:
+        return []
+    return await vs.asimilarity_search_with_score(korean_query, k=k)
+
+def search_lexical(korean_query: str, k: int = 5) -> list:
+    """BM25 역색인 검색. 반환값: [(Document, BM25 점수)]"""
+    index = get_lexical_index()
+    return [(term_document(row), score) for row, score in index.search(korean_query, k=k)]
+
+def fuse_results(vector_results: list, lexical_results: list, korean_query: str, k: int = 3) -> list:
+    """
+    벡터 검색과 BM25 결과를 Reciprocal Rank Fusion으로 결합합니다.
+    벡터 결과는 문단 단위이므로 부모 용어(original_id) 기준으로 합쳐, 가장 가까운 문단의 순위/거리만 반영합니다.
+    채택 조건: 벡터 거리가 인덱스 설정별 임계값(get_similarity_threshold) 이하이거나, 질문에 용어명이 그대로 포함된 경우.
+    반환값: [(Document, L2 거리 또는 None)]  (None = 키워드로만 찾은 문서)
+    벡터로 찾은 문서는 metadata["passages"]에 문맥 후보 문단(가장 가까운 문단 + 임계값 이내 문단, 거리순)을 담습니다.
+    """
+    threshold = get_similarity_threshold()
+    fused = {}
+    vector_rank = 0
+    for doc, distance in vector_results:
+        doc_id = doc.metadata.get("original_id")
+        entry = fused.get(doc_id)
+        if entry is not None:
+            if distance <= threshold:
+                entry["passages"].append(doc.page_content)
+            continue
+        entry = fused[doc_id] = {"doc": doc, "distance": distance, "rrf": 0.0, "accepted": distance <= threshold,
+                                 "passages": [doc.page_content]}
+        entry["rrf"] += 1.0 / (RRF_K + vector_rank + 1)
+        vector_rank += 1
+    for rank, (doc, _) in enumerate(lexical_results):
+        doc_id = doc.metadata.get("original_id")
+        entry = fused.setdefault(doc_id, {"doc": doc, "distance": None, "rrf": 0.0, "accepted": False, "passages": []})
+        entry["rrf"] += 1.0 / (RRF_K + rank + 1)
+        entry["accepted"] |= BM25Index.is_mentioned(doc.metadata.get("word", ""), korean_query)
+
+    ranked = sorted(fused.values(), key=lambda e: e["rrf"], reverse=True)
+    results = []
+    for e in ranked:
+        if not e["accepted"]:
+            continue
+        doc = e["doc"]
+        if e["passages"]:
+            # 인덱스가 보관한 메타데이터를 건드리지 않도록 복사본에 기록
+            doc = Document(page_content=doc.page_content, metadata={**doc.metadata, "passages": e["passages"]})
+        results.append((doc, e["distance"]))
+    return results[:k]
+
+def expand_related(results: list, limit: int = RELATED_TERMS_K) -> list:
+    """
+    최상위 결과의 연관검색어를 메모리 인접 맵에서 꺼내 (Document, None)으로 뒤에 덧붙입니다. (추가 벡터 검색 없음)
+    덧붙인 문서는 metadata["related_to"]에 기준 용어명을 남깁니다.
+    """
+    if not results or limit <= 0:
+        return results
+    top_doc = results[0][0]
+    seen = {doc.metadata.get("original_id") for doc, _ in results}
+    expanded = list(results)
+    for row in get_term_graph().neighbors(top_doc.metadata.get("original_id")):
+        if len(expanded) - len(results) >= limit:
+            break
+        if row["id"] in seen:
+            continue
+        doc = term_document(row)
+        doc.metadata["related_to"] = top_doc.metadata.get("word")
+        expanded.append((doc, None))
+    return expanded
+
+def _format_score(score, doc=None) -> str:
+    if doc is not None and doc.metadata.get("related_to"):
+        return f"'{doc.metadata['related_to']}'의 연관검색어"
+    return f"거리: {score:.4f}" if score is not None else "키워드/사전 일치"
+
+def _definition(content: str) -> str:
+    return content.split(":", 1)[1].strip() if ":" in content else content
+
+def build_context(relevant_docs: list, korean_query: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> tuple[str, list]:
+    """
+    검색 결과마다 질문과 가장 잘 맞는 문단만 골라 token_budget 안에서 답변 문맥을 만듭니다.
+    벡터로 찾은 문단은 거리순으로, 키워드/사전/연관검색어로 찾은 용어는 정의를 문단으로 나눠 질문과 겹치는 순으로 씁니다.
+    반환값: (문맥 텍스트, 참고 문헌 목록)
+    """
+    lines = []
+    citations = []
+    used = 0
+    for doc, score in relevant_docs:
+        passages = [_definition(p) for p in doc.metadata.get("passages", [])]
+        if not passages:
+            passages = rank_passages(split_passages(_definition(doc.page_content)), korean_query)
+        chosen = []
+        for passage in passages:
+            cost = count_tokens(passage)
+            # 첫 문단은 예산을 넘더라도 넣어 문맥이 비지 않도록 함
+            if used + cost > token_budget and (lines or chosen):
+                break
+            chosen.append(passage)
+            used += cost
+        if not chosen:
+            continue
+        word = doc.metadata.get("word", "Term")
+        lines.append(f"- **{word}**: {' … '.join(chosen)}\n")
+        citations.append(f"- **{word}**: {chosen[0][:60]}... ({_format_score(score, doc)})")
+    return "".join(lines), citations
+
+def lookup_exact_term(korean_query: str):
+    """용어 사전 정확 일치 시 Document, 아니면 None"""
+    row = get_term_dictionary().lookup(korean_query)
+    return term_document(row) if row else None
+
+async def ais_exact_term(korean_query: str) -> bool:
+    """용어 사전 빠른 경로를 탈 질문인지 (USE_TERM_DICTIONARY가 꺼져 있으면 항상 False)"""
+    if not USE_TERM_DICTIONARY:
+        return False
+    return await asyncio.to_thread(lookup_exact_term, korean_query) is not None
+
+async def aretrieve(korean_query: str, mode: str = RETRIEVAL_MODE, prefetched=None, verbose: bool = True,
+                    use_dictionary: bool = USE_TERM_DICTIONARY, related: int = RELATED_TERMS_K) -> list:
+    """
+    검색 방식(mode)에 따라 최대 3개의 (Document, L2 거리 또는 None)을 반환하고, 최상위 결과의 연관검색어를 최대 related개 덧붙입니다.
+    용어 사전에 정확히 일치하면 그 정의 하나(+ 연관검색어)만 반환하고, prefetched가 있으면 벡터 검색 대신 그 결과를 사용합니다.
+    """
+    results = await _aretrieve_ranked(korean_query, mode, prefetched, verbose, use_dictionary)
+    if not results or related <= 0:
+        return results
+    expanded = await asyncio.to_thread(expand_related, results, related)
+    if verbose and len(expanded) > len(results):
+        print(f"   [Search] 연관검색어 확장 ({results[0][0].metadata.get('word')}): "
+              f"{[d.metadata.get('word') for d, _ in expanded[len(results):]]}")
+    return expanded
+
+async def _aretrieve_ranked(korean_query: str, mode: str, prefetched, verbose: bool, use_dictionary: bool) -> list:
+    if use_dictionary:
+        exact_doc = await asyncio.to_thread(lookup_exact_term, korean_query)
+        if exact_doc is not None:
+            if verbose:
+                print(f"   [Search] '{korean_query}' 용어 사전 정확 일치: {exact_doc.metadata.get('word')} (벡터 검색 생략)")
+            return [(exact_doc, None)]
+
+    lexical_results = []
+    if mode in ("hybrid", "lexical"):
+        lexical_results = await asyncio.to_thread(search_lexical, korean_query, 5)
+        if verbose:
+            print(f"   [Search] '{korean_query}' BM25 검색: {[d.metadata.get('word') for d, _ in lexical_results]}")
+
+    vector_results = []
+    if mode in ("hybrid", "vector"):
+        if prefetched is not None:
+            vector_results = await prefetched.consume()
+            if verbose:
+                print(f"   [Search] '{korean_query}' 투기적 검색 결과 사용")
+        else:
+            vector_results = await asearch_knowledge_base(korean_query)
+            if verbose:
+                print(f"   [Search] '{korean_query}' DB 검색 수행")
+        if verbose:
+            threshold = get_similarity_threshold()
+            for doc, score in vector_results:
+                verdict = "채택" if score <= threshold else "제외"
+                chunk = f" #{doc.metadata['chunk_index']}" if "chunk_index" in doc.metadata else ""
+                print(f"      {verdict}: {doc.metadata.get('word')}{chunk} (거리: {score:.4f})")
+
+    if mode == "lexical":
+        return [(doc, None) for doc, _ in lexical_results[:3]]
+    return fuse_results(vector_results, lexical_results, korean_query, k=3)
+
+async def node_db_retrieve(state: FinRAGState) -> dict:
+    t0 = print_log("2-B. 벡터 DB 검색 (node_db_retrieve)", "start")
     korean_query = state["korean_query"]
     relevant_docs = []
     
-    if vs:
-        try:
-            results = vs.similarity_search_with_score(korean_query, k=5)
-            print(f"   [Search] '{korean_query}' DB 검색 수행")
-            for doc, score in results:
-                if score <= SIMILARITY_THRESHOLD:
-                    relevant_docs.append((doc, score))
-                    print(f"      채택: {doc.metadata.get('word')} (거리: {score:.4f})")
-                else:
-                    print(f"      제외: {doc.metadata.get('word')} (거리: {score:.4f} > {SIMILARITY_THRESHOLD})")
-            relevant_docs = relevant_docs[:3]
-        except Exception as e:
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            print(f"[{now}] DB 검색 중 오류: {e}")
+    try:
+        relevant_docs = await aretrieve(korean_query, prefetched=state.get("prefetched"))
+    except Exception as e:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{now}] DB 검색 중 오류: {e}")
             
-    print_log("2-B. 벡터 DB 검색 (node_db_retrieve)", "end", t0, extra_info=f"조회된 유효 문서 수: {len(relevant_docs)}개")
+    extra = f"검색 방식: {RETRIEVAL_MODE} / 조회된 유효 문서 수: {len(relevant_docs)}개"
+    embedding_stats = get_embedding_cache_stats()
+    if embedding_stats:
+        extra += f" / 질문 임베딩 캐시 적중률: {embedding_stats['hit_rate']:.1%}"
+    print_log("2-B. 벡터 DB 검색 (node_db_retrieve)", "end", t0, extra_info=extra)
     return {"relevant_docs": relevant_docs}
 
-def node_web_fallback(state: FinRAGState) -> dict:
+async def node_web_fallback(state: FinRAGState) -> dict:
     t0 = print_log("3-A. 웹 검색으로 폴백 (node_web_fallback)", "start")
     extra = "내부 DB에 관련 정보 없음 (유효 문서 0개) -> 웹 검색 자동 전환"
     print_log("3-A. 웹 검색으로 폴백 (node_web_fallback)", "end", t0, extra_info=extra)
-    return node_web_search(state)
+    return await node_web_search(state)
 
-def node_db_answer(state: FinRAGState) -> dict:
+async def node_db_answer(state: FinRAGState) -> dict:
     t0 = print_log("3-B. DB 기반 답변 생성 (node_db_answer)", "start")
     korean_query = state["korean_query"]
     original_query = state.get("original_query")
     relevant_docs = state.get("relevant_docs") or []
     
-    context_text = ""
-    citations = []
-    for doc, score in relevant_docs:
-        word = doc.metadata.get("word", "Term")
-        raw_content = doc.page_content
-        definition = raw_content.split(":", 1)[1].strip() if ":" in raw_content else raw_content
-        context_text += f"- **{word}**: {definition}\n"
-        citations.append(f"- **{word}**: {definition[:60]}... (거리: {score:.4f})")
-
-    system_template = read_prompt(PROMPT_DIR, "finrag_01_system.md")
-    rag_prompt = PromptTemplate.from_template(system_template)
-    rag_chain = rag_prompt | llm | StrOutputParser()
+    context_text, citations = build_context(relevant_docs, korean_query)
+
+    rag_chain = get_chain(PROMPT_DIR, "finrag_01_system.md", llm)
     
+    cacheable = True
     try:
-        ai_answer = rag_chain.invoke({"context": context_text, "question": korean_query})
+        ai_answer = await rag_chain.ainvoke({"context": context_text, "question": korean_query}, config={"tags": [ANSWER_STREAM_TAG]})
     except Exception as e:
         ai_answer = f"죄송합니다. 답변 생성 중 오류가 발생했습니다. ({e})"
+        cacheable = False
 
     final_output = f"""
 ### 🌏 질문
@@ -126,7 +310,7 @@ def node_db_answer(state: FinRAGState) -> dict:
 {chr(10).join(citations)}
 """
     print_log("3-B. DB 기반 답변 생성 (node_db_answer)", "end", t0)
-    return {"final_output": final_output}
+    return {"final_output": final_output, "answer_source": "db", "cacheable": cacheable}
 
 def route_after_start(state: FinRAGState) -> Literal["web_search", "db_retrieve"]:
     return "web_search" if state.get("use_web") else "db_retrieve"
@@ -158,19 +342,83 @@ def _get_finrag_graph():
         _finrag_graph = builder.compile()
     return _finrag_graph
 
+# ---------------------------------------------------------
+# 시맨틱 답변 캐시
+# ---------------------------------------------------------
+async def aembed_query(text: str):
+    """지식 베이스와 동일한 임베딩 모델로 질문을 임베딩합니다. (시맨틱 캐시 조회용)"""
+    vs = load_knowledge_base()
+    if vs is None:
+        return None
+    try:
+        return await vs.embeddings.aembed_query(text)
+    except Exception as e:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{now}] 질문 임베딩 실패 (시맨틱 캐시 건너뜀): {e}")
+        return None
+
+def _replace_question_header(final_output, original_query, korean_query):
+    """캐시된 답변의 질문 헤더(Original / Translated)를 현재 질문으로 교체"""
+    header = f"- **Original**: {original_query if original_query else korean_query}\n- **Translated**: {korean_query}"
+    return re.sub(r"- \*\*Original\*\*: .*\n- \*\*Translated\*\*: .*", lambda _: header, final_output, count=1)
+
 def get_rag_answer(korean_query, original_query=None):
+    return run_sync(aget_rag_answer(korean_query, original_query))
+
+async def aget_rag_answer(korean_query, original_query=None, prefetched=None):
+    """
+    prefetched: 메인 에이전트가 라우팅 전에 미리 시작한 벡터 검색(SpeculativeTask).
+    DB 검색 단계까지 가지 않으면 (캐시 적중, 웹 검색) 취소됩니다.
+    """
+    try:
+        return await _arun_finrag(korean_query, original_query, prefetched)
+    finally:
+        if prefetched is not None:
+            prefetched.discard()
+
+async def _arun_finrag(korean_query, original_query, prefetched):
     print("\n" + "-"*50)
     total_t0 = print_log("FinRAG 에이전트 파이프라인", "start")
+
+    # 웹 검색 질문("현재 금리 알려줘")은 의미가 비슷한 지식 질문("금리가 뭐야?")의 답을 받지 않도록 경로별로 캐시를 분리
+    cache = get_answer_cache()
+    use_web = is_web_query(korean_query)
+    namespace = "KNOWLEDGE:web" if use_web else "KNOWLEDGE:db"
+
+    # 용어 사전 정확 일치("X가 뭐야?")면 답변 근거가 정해져 있으므로 질문 임베딩(캐시 조회)과 투기적 벡터 검색을 모두 생략
+    query_vector = None
+    if not use_web and await ais_exact_term(korean_query):
+        if prefetched is not None:
+            prefetched.discard()
+            prefetched = None
+        print(f"   [Search] '{korean_query}' 용어 사전 정확 일치: 질문 임베딩/시맨틱 캐시 생략")
+    else:
+        query_vector = await aembed_query(korean_query)
+    if query_vector is not None:
+        cached = cache.lookup(query_vector, namespace)
+        if cached is not None:
+            final_output, similarity, cached_query = cached
+            print("-"*50)
+            print_log("FinRAG 에이전트 파이프라인", "end", total_t0,
+                      extra_info=f"시맨틱 캐시 적중: '{cached_query}' (유사도: {similarity:.4f})")
+            print("-"*50 + "\n")
+            return _replace_question_header(final_output, original_query, korean_query)
     
     graph = _get_finrag_graph()
-    initial: FinRAGState = {"korean_query": korean_query, "original_query": original_query}
-    result = graph.invoke(initial)
+    initial: FinRAGState = {"korean_query": korean_query, "original_query": original_query, "prefetched": prefetched}
+    t0_graph = time.time()
+    result = await graph.ainvoke(initial)
+    final_output = result.get("final_output", "답변을 생성하지 못했습니다.")
+
+    if query_vector is not None and result.get("cacheable"):
+        ttl = WEB_CACHE_TTL if result.get("answer_source") == "web" else KNOWLEDGE_CACHE_TTL
+        cache.store(query_vector, final_output, namespace, ttl=ttl, cost=time.time() - t0_graph, query=korean_query)
     
     print("-"*50)
     print_log("FinRAG 에이전트 파이프라인", "end", total_t0)
     print("-"*50 + "\n")
     
-    return result.get("final_output", "답변을 생성하지 못했습니다.")
+    return final_output
 
 if __name__ == "__main__":
     print(get_rag_answer("금리가 뭐야?"))
@@ -1,28 +1,44 @@
+import os
 import json
+import operator
 from datetime import datetime
-from typing import TypedDict, Literal
+from typing import TypedDict, Literal, Annotated
 from dotenv import load_dotenv
 from pathlib import Path
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 
-from utils.agent_utils import read_prompt, print_log
+from utils.agent_utils import get_chain, prompt_version, print_log, run_sync, iter_sync, ANSWER_STREAM_TAG, RE_TRANSLATE_STREAM_TAG
+from utils.lang_detect import is_confident_korean, needs_context_hint, record_fast_path, get_lang_detect_stats
+from utils.intent_router import get_intent_router, record_route, get_router_stats
+from utils.memory_store import aadd_turn, arender
+from utils.cache_utils import TieredCache, normalize_text, make_key
+from utils.semantic_cache import get_answer_cache
+from utils.speculation import USE_SPECULATIVE_RETRIEVAL, SpeculativeTask, claim, get_speculation_stats
+from utils.handle_sql import aget_schema_info
 
-from tools.approach_account import get_sql_answer
-from rag_agent.knowledge_agent import get_rag_answer
-from rag_agent.transfer_agent import get_transfer_answer
+from tools.approach_account import aget_sql_answer
+from rag_agent.knowledge_agent import aget_rag_answer, aembed_query, asearch_knowledge_base, ais_exact_term
+from rag_agent.transfer_agent import aget_transfer_answer
 
 load_dotenv()
 CURRENT_DIR = Path(__file__).resolve().parent
 PROMPT_DIR = CURRENT_DIR / "prompt" / "main"
-MEMORY_DIR = CURRENT_DIR.parent / "logs"
-MEMORY_FILE = MEMORY_DIR / "memory.md"
 
 llm = ChatOpenAI(model="gpt-5-mini")
 
+# translate -> refine -> route 3단계를 단일 LLM 호출(node_understand)로 대체할지 여부
+USE_FUSED_UNDERSTAND = os.getenv("USE_FUSED_UNDERSTAND", "false").lower() == "true"
+# 로컬 의도 분류기를 먼저 사용하고, 확신도가 낮을 때만 LLM 라우터 호출
+USE_LOCAL_ROUTER = os.getenv("USE_LOCAL_ROUTER", "true").lower() == "true"
+# 역번역 결과 캐시 (메모리 LRU 크기)
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+# 일반 대화(GENERAL) 답변의 시맨틱 캐시 TTL(초). 개인 계좌(DATABASE) 답변은 캐시하지 않습니다.
+GENERAL_CACHE_TTL = int(os.getenv("GENERAL_CACHE_TTL", str(24 * 3600)))
+# 투기적 실행 시 SQL 에이전트 스키마 조회도 미리 시작할지 여부
+SPECULATIVE_SCHEMA = os.getenv("SPECULATIVE_SCHEMA", "true").lower() == "true"
+
 # ---------------------------------------------------------
 # 상태 스키마
 # ---------------------------------------------------------
@@ -41,34 +57,53 @@ class MainAgentState(TypedDict, total=False):
     allowed_views: list
     _history: str
     _skip_re_translate: bool
+    _speculation: dict
+    _timings: Annotated[dict, operator.or_]
 
 # ---------------------------------------------------------
 # 프롬프트/체인 빌더
 # ---------------------------------------------------------
 def _translation_chain():
-    t = read_prompt(PROMPT_DIR, "main_01_translation.md")
-    return PromptTemplate.from_template(t) | llm | StrOutputParser()
+    return get_chain(PROMPT_DIR, "main_01_translation.md", llm)
 
 def _refinement_chain():
-    t = read_prompt(PROMPT_DIR, "main_02_refinement.md")
-    return PromptTemplate.from_template(t) | llm | StrOutputParser()
+    return get_chain(PROMPT_DIR, "main_02_refinement.md", llm)
 
 def _router_chain():
-    t = read_prompt(PROMPT_DIR, "main_03_router.md")
-    return PromptTemplate.from_template(t) | llm | StrOutputParser()
+    return get_chain(PROMPT_DIR, "main_03_router.md", llm)
 
 def _system_prompt_chain():
-    t = read_prompt(PROMPT_DIR, "main_04_system.md")
-    return PromptTemplate.from_template(t) | llm | StrOutputParser()
+    return get_chain(PROMPT_DIR, "main_04_system.md", llm)
 
 def _re_translation_chain():
-    t = read_prompt(PROMPT_DIR, "main_05_re_translation.md")
-    return PromptTemplate.from_template(t) | llm | StrOutputParser()
+    return get_chain(PROMPT_DIR, "main_05_re_translation.md", llm)
+
+def _understand_chain():
+    return get_chain(PROMPT_DIR, "main_07_understand.md", llm)
 
 # ---------------------------------------------------------
 # 역번역 헬퍼 함수
 # ---------------------------------------------------------
+_translation_cache = None
+
+def _get_translation_cache() -> TieredCache:
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TieredCache("translation", maxsize=TRANSLATION_CACHE_SIZE)
+    return _translation_cache
+
+def _translation_cache_key(korean_text: str, target_language: str) -> str:
+    # 프롬프트가 수정되면 버전 해시가 바뀌어 이전 번역을 재사용하지 않습니다.
+    version = prompt_version(PROMPT_DIR, "main_05_re_translation.md")
+    return make_key(normalize_text(korean_text), target_language.strip().lower(), version, getattr(llm, "model_name", ""))
+
+def get_translation_cache_stats() -> dict:
+    return _get_translation_cache().stats()
+
 def translate_answer(korean_text: str, target_language: str) -> str:
+    return run_sync(atranslate_answer(korean_text, target_language))
+
+async def atranslate_answer(korean_text: str, target_language: str) -> str:
     if not korean_text:
         return korean_text
     
@@ -76,28 +111,73 @@ def translate_answer(korean_text: str, target_language: str) -> str:
         return korean_text
     
     t0 = print_log(f"역번역 (한국어 -> {target_language})", "start")
+    cache = _get_translation_cache()
+    cache_key = _translation_cache_key(korean_text, target_language)
+    cached = await cache.aget(cache_key)
+    if cached is not None:
+        stats = cache.stats()
+        print_log(f"역번역 (한국어 -> {target_language})", "end", t0,
+                  extra_info=f"캐시 적중 (적중률: {stats['hit_ratio']:.1%}, 누적 절약: {stats['saved_seconds']:.2f}초)")
+        return cached
+
     try:
         chain = _re_translation_chain()
-        translated = chain.invoke({
+        translated = (await chain.ainvoke({
             "target_language": target_language,
             "korean_answer": korean_text
-        }).strip()
-        print_log(f"역번역 (한국어 -> {target_language})", "end", t0)
+        }, config={"tags": [RE_TRANSLATE_STREAM_TAG]})).strip()
+        elapsed = print_log(f"역번역 (한국어 -> {target_language})", "end", t0)
+        await cache.aset(cache_key, translated, cost=elapsed)
         return translated
     except Exception as e:
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         print(f"[{now}] 역번역 실패: {e}, 원본 반환")
         return korean_text
 
+# ---------------------------------------------------------
+# 투기적 검색 (라우팅 완료 전 선행 실행)
+# ---------------------------------------------------------
+async def _astart_speculation(korean_query: str, state: MainAgentState) -> dict:
+    """
+    한국어 질문이 확정되는 즉시 벡터 검색(및 스키마 조회)을 백그라운드로 시작합니다.
+    용어 사전에 정확히 일치하는 질문은 벡터 검색이 필요 없으므로 시작하지 않습니다.
+    """
+    if not USE_SPECULATIVE_RETRIEVAL:
+        return {}
+    speculation = {}
+    if not await ais_exact_term(korean_query):
+        speculation["retrieval"] = SpeculativeTask("retrieval", asearch_knowledge_base(korean_query), key=korean_query)
+    if SPECULATIVE_SCHEMA and state.get("allowed_views"):
+        speculation["schema"] = SpeculativeTask("schema", aget_schema_info(state["allowed_views"]))
+    return speculation
+
 # ---------------------------------------------------------
 # 노드 함수
 # ---------------------------------------------------------
-def node_translate(state: MainAgentState) -> dict:
+async def node_translate(state: MainAgentState) -> dict:
     t0 = print_log("Step 1: 입력 언어 감지 및 한국어 번역 (node_translate)", "start")
     question = state["question"]
+
+    # 로컬 언어 감지: 확실한 한국어 입력은 번역 LLM 호출 없이 그대로 통과
+    if is_confident_korean(question):
+        record_fast_path(True)
+        needs_context = needs_context_hint(question)
+        stats = get_lang_detect_stats()
+        extra = f"로컬 감지: Korean (LLM 생략) / 보정 필요: {needs_context} / 적중률: {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+        elapsed = print_log("Step 1: 입력 언어 감지 및 한국어 번역 (node_translate)", "end", t0, extra_info=extra)
+        return {
+            "korean_query": question,
+            "source_lang": "Korean",
+            "needs_context": needs_context,
+            "refined_query": question,
+            "_speculation": await _astart_speculation(question, state),
+            "_timings": {"translate": elapsed},
+        }
+    record_fast_path(False)
+
     try:
         chain = _translation_chain()
-        trans_result_str = chain.invoke({"question": question}).strip()
+        trans_result_str = (await chain.ainvoke({"question": question})).strip()
         trans_result_str = trans_result_str.replace("```json", "").replace("```", "")
         trans_result = json.loads(trans_result_str)
         
@@ -112,55 +192,114 @@ def node_translate(state: MainAgentState) -> dict:
         needs_context = True
         extra = f"번역 오류로 원본 유지: {e}"
         
-    print_log("Step 1: 입력 언어 감지 및 한국어 번역 (node_translate)", "end", t0, extra_info=extra)
+    elapsed = print_log("Step 1: 입력 언어 감지 및 한국어 번역 (node_translate)", "end", t0, extra_info=extra)
     
     return {
         "korean_query": korean_query, 
         "source_lang": source_lang, 
         "needs_context": needs_context,
-        "refined_query": korean_query
+        "refined_query": korean_query,
+        "_speculation": await _astart_speculation(korean_query, state),
+        "_timings": {"translate": elapsed},
     }
 
-def node_refine(state: MainAgentState) -> dict:
+async def node_refine(state: MainAgentState) -> dict:
     t0 = print_log("Step 2: 컨텍스트 기반 질문 보정 (node_refine)", "start")
     history_context = state.get("_history") or "이전 대화 기록 없음(No previous conversation history)."
     korean_query = state["korean_query"]
     
     chain = _refinement_chain()
-    refined_query = chain.invoke({"history": history_context, "question": korean_query}).strip()
+    refined_query = (await chain.ainvoke({"history": history_context, "question": korean_query})).strip()
     
     if refined_query != korean_query:
         extra = f"보정됨: '{korean_query}' -> '{refined_query}'"
     else:
         extra = "보정 없음 (변화 없음)"
         
-    print_log("Step 2: 컨텍스트 기반 질문 보정 (node_refine)", "end", t0, extra_info=extra)
-    return {"refined_query": refined_query}
+    elapsed = print_log("Step 2: 컨텍스트 기반 질문 보정 (node_refine)", "end", t0, extra_info=extra)
+    return {"refined_query": refined_query, "_timings": {"refine": elapsed}}
 
-def node_route(state: MainAgentState) -> dict:
+async def node_route(state: MainAgentState) -> dict:
     t0 = print_log("Step 3: 의도 분류 및 라우팅 (node_route)", "start")
+    refined_query = state["refined_query"]
+
+    if USE_LOCAL_ROUTER:
+        category, margin, confident = get_intent_router().classify(refined_query)
+        record_route(confident)
+        if confident:
+            stats = get_router_stats()
+            extra = f"분류된 카테고리: [{category}] (로컬 분류, 점수차: {margin:.3f}, 로컬 처리율: {stats['local_rate']:.1%})"
+            elapsed = print_log("Step 3: 의도 분류 및 라우팅 (node_route)", "end", t0, extra_info=extra)
+            return {"category": category, "_timings": {"route": elapsed}}
+
     chain = _router_chain()
-    category = chain.invoke({"question": state["refined_query"]}).strip()
+    category = (await chain.ainvoke({"question": refined_query})).strip()
     category = category.replace("'", "").replace('"', "").replace(".", "")
     
-    print_log("Step 3: 의도 분류 및 라우팅 (node_route)", "end", t0, extra_info=f"분류된 카테고리: [{category}]")
-    return {"category": category}
+    elapsed = print_log("Step 3: 의도 분류 및 라우팅 (node_route)", "end", t0, extra_info=f"분류된 카테고리: [{category}]")
+    return {"category": category, "_timings": {"route": elapsed}}
+
+async def node_understand(state: MainAgentState) -> dict:
+    """언어 감지 / 한국어 번역 / 질문 보정 / 의도 분류를 한 번의 LLM 호출로 처리 (Fused)"""
+    t0 = print_log("Step 1-3: 통합 이해 단계 (node_understand)", "start")
+    question = state["question"]
+    history_context = state.get("_history") or "이전 대화 기록 없음(No previous conversation history)."
+    try:
+        chain = _understand_chain()
+        result_str = (await chain.ainvoke({"history": history_context, "question": question})).strip()
+        result_str = result_str.replace("```json", "").replace("```", "")
+        result = json.loads(result_str)
+
+        source_lang = result.get("source_language", "Korean")
+        korean_query = result.get("korean_query") or question
+        refined_query = result.get("refined_query") or korean_query
+        category = (result.get("category") or "").strip().upper()
+    except Exception as e:
+        # 구조화 출력 실패 시 기존 3단계 경로로 처리
+        elapsed = print_log("Step 1-3: 통합 이해 단계 (node_understand)", "end", t0, extra_info=f"통합 출력 파싱 실패, 3단계 경로로 전환: {e}")
+        updates = await node_translate(state)
+        state = {**state, **updates}
+        timings = {"understand": elapsed, **updates["_timings"]}
+        if check_needs_context(state) == "refine":
+            refine_updates = await node_refine(state)
+            state = {**state, **refine_updates}
+            updates.update(refine_updates)
+            timings.update(refine_updates["_timings"])
+        route_updates = await node_route(state)
+        updates.update(route_updates)
+        timings.update(route_updates["_timings"])
+        updates["_timings"] = timings
+        return updates
+
+    extra = f"감지 언어: {source_lang} / 변환 쿼리: '{korean_query}' / 보정 쿼리: '{refined_query}' / 카테고리: [{category}]"
+    elapsed = print_log("Step 1-3: 통합 이해 단계 (node_understand)", "end", t0, extra_info=extra)
+    return {
+        "korean_query": korean_query,
+        "source_lang": source_lang,
+        "refined_query": refined_query,
+        "category": category,
+        "_timings": {"understand": elapsed},
+    }
 
-def node_account(state: MainAgentState) -> dict:
+async def node_account(state: MainAgentState) -> dict:
     t0 = print_log("Sub-Agent: SQL Agent 호출", "start")
-    answer = get_sql_answer(state["refined_query"], state["username"], state.get("allowed_views") or [])
+    prefetched_schema = claim(state.get("_speculation"), "schema")
+    answer = await aget_sql_answer(state["refined_query"], state["username"], state.get("allowed_views") or [], prefetched_schema=prefetched_schema)
     print_log("Sub-Agent: SQL Agent 호출", "end", t0)
     return {"korean_answer": answer}
 
-def node_knowledge(state: MainAgentState) -> dict:
+async def node_knowledge(state: MainAgentState) -> dict:
     t0 = print_log("Sub-Agent: FinRAG Agent 호출", "start")
-    answer = get_rag_answer(state["refined_query"], original_query=state["question"])
+    # 맥락 보정으로 질문이 바뀌었다면 미리 시작한 검색은 버립니다.
+    prefetched = claim(state.get("_speculation"), "retrieval", key=state["refined_query"])
+    answer = await aget_rag_answer(state["refined_query"], original_query=state["question"], prefetched=prefetched)
     print_log("Sub-Agent: FinRAG Agent 호출", "end", t0)
     return {"korean_answer": answer}
 
-def node_transfer(state: MainAgentState) -> dict:
+async def node_transfer(state: MainAgentState) -> dict:
     t0 = print_log("Sub-Agent: Transfer Agent 호출", "start")
-    result = get_transfer_answer(state["refined_query"], state["username"], context={})
+    claim(state.get("_speculation"), None)
+    result = await aget_transfer_answer(state["refined_query"], state["username"], context={})
     
     if isinstance(result, dict):
         if result.get("context") and not result["context"].get("source_language"):
@@ -172,44 +311,57 @@ def node_transfer(state: MainAgentState) -> dict:
     print_log("Sub-Agent: Transfer Agent 호출", "end", t0, extra_info="일반 텍스트 반환")
     return {"korean_answer": result, "transfer_result": None}
 
-def node_system(state: MainAgentState) -> dict:
+async def node_system(state: MainAgentState) -> dict:
     t0 = print_log("Sub-Agent: System Prompt 호출 (일반 대화)", "start")
+    claim(state.get("_speculation"), None)
+    korean_query = state["korean_query"]
+    cache = get_answer_cache()
+    query_vector = await aembed_query(korean_query)
+    if query_vector is not None:
+        cached = cache.lookup(query_vector, "GENERAL")
+        if cached is not None:
+            answer, similarity, cached_query = cached
+            print_log("Sub-Agent: System Prompt 호출 (일반 대화)", "end", t0,
+                      extra_info=f"시맨틱 캐시 적중: '{cached_query}' (유사도: {similarity:.4f})")
+            return {"korean_answer": answer}
+
     chain = _system_prompt_chain()
-    answer = chain.invoke({"question": state["korean_query"]})
-    print_log("Sub-Agent: System Prompt 호출 (일반 대화)", "end", t0)
+    answer = await chain.ainvoke({"question": korean_query}, config={"tags": [ANSWER_STREAM_TAG]})
+    elapsed = print_log("Sub-Agent: System Prompt 호출 (일반 대화)", "end", t0)
+    if query_vector is not None and answer:
+        cache.store(query_vector, answer, "GENERAL", ttl=GENERAL_CACHE_TTL, cost=elapsed, query=korean_query)
     return {"korean_answer": answer}
 
-def node_fallback(state: MainAgentState) -> dict:
+async def node_fallback(state: MainAgentState) -> dict:
     t0 = print_log("Fallback 처리", "start")
+    claim(state.get("_speculation"), None)
     korean_answer = "죄송해요, 질문의 의도를 정확히 파악하지 못했습니다."
     print_log("Fallback 처리", "end", t0, extra_info=f"알 수 없는 카테고리: {state.get('category', '')}")
     return {"korean_answer": korean_answer}
 
-def node_summarize(state: MainAgentState) -> dict:
-    t0 = print_log("대화 기록 저장 (node_summarize -> 파일 Append)", "start")
+async def node_summarize(state: MainAgentState) -> dict:
+    t0 = print_log("대화 기록 저장 (node_summarize -> 사용자 메모리)", "start")
     refined_query = state.get("refined_query", "")
     korean_answer = state.get("korean_answer") or ""
     
     if not isinstance(korean_answer, str):
-        print_log("대화 기록 저장 (node_summarize -> 파일 Append)", "end", t0, extra_info="답변이 문자열이 아니므로 스킵")
+        print_log("대화 기록 저장 (node_summarize -> 사용자 메모리)", "end", t0, extra_info="답변이 문자열이 아니므로 스킵")
         return {}
         
     try:
-        MEMORY_DIR.mkdir(parents=True, exist_ok=True)
-        with open(MEMORY_FILE, "a", encoding="utf-8") as f:
-            f.write(f"**User**: {refined_query}\n\n**AI**: {korean_answer}\n\n---\n\n")
-        extra = "메모리 파일에 성공적으로 Append 되었습니다."
+        await aadd_turn(state.get("username", ""), refined_query, korean_answer)
+        extra = "사용자 메모리에 대화 턴이 저장되었습니다."
     except Exception as e:
         extra = f"메모리 업데이트 실패: {e}"
         
-    print_log("대화 기록 저장 (node_summarize -> 파일 Append)", "end", t0, extra_info=extra)
+    print_log("대화 기록 저장 (node_summarize -> 사용자 메모리)", "end", t0, extra_info=extra)
     return {}
 
-def node_re_translate(state: MainAgentState) -> dict:
+async def node_re_translate(state: MainAgentState) -> dict:
     t0 = print_log("최종 답변 역번역 (node_re_translate)", "start")
     source_lang = state.get("source_lang", "Korean")
     korean_answer = state.get("korean_answer", "")
-    final_answer = translate_answer(korean_answer, source_lang)
+    final_answer = await atranslate_answer(korean_answer, source_lang)
     print_log("최종 답변 역번역 (node_re_translate)", "end", t0)
     return {"final_answer": final_answer}
 
@@ -242,12 +394,18 @@ def after_transfer(state: MainAgentState) -> Literal["summarize", "end_transfer"
 # ---------------------------------------------------------
 # 그래프 빌드 및 컴파일
 # ---------------------------------------------------------
-def _build_main_graph():
+def _build_main_graph(fused: bool | None = None):
+    if fused is None:
+        fused = USE_FUSED_UNDERSTAND
+
     builder = StateGraph(MainAgentState)
 
-    builder.add_node("translate", node_translate)
-    builder.add_node("refine", node_refine)
-    builder.add_node("route", node_route)
+    if fused:
+        builder.add_node("understand", node_understand)
+    else:
+        builder.add_node("translate", node_translate)
+        builder.add_node("refine", node_refine)
+        builder.add_node("route", node_route)
     builder.add_node("sql", node_account)
     builder.add_node("finrag", node_knowledge)
     builder.add_node("transfer", node_transfer)
@@ -256,26 +414,32 @@ def _build_main_graph():
     builder.add_node("summarize", node_summarize)
     builder.add_node("re_translate", node_re_translate)
 
-    builder.add_edge(START, "translate")
-    
-    builder.add_conditional_edges(
-        "translate",
-        check_needs_context,
-        {
-            "refine": "refine",
-            "route": "route"
-        }
-    )
-    
-    builder.add_edge("refine", "route")
-    
-    builder.add_conditional_edges("route", route_by_category, {
+    category_branches = {
         "sql": "sql",
         "finrag": "finrag",
         "transfer": "transfer",
         "system": "system",
         "fallback": "fallback",
-    })
+    }
+
+    if fused:
+        builder.add_edge(START, "understand")
+        builder.add_conditional_edges("understand", route_by_category, category_branches)
+    else:
+        builder.add_edge(START, "translate")
+        
+        builder.add_conditional_edges(
+            "translate",
+            check_needs_context,
+            {
+                "refine": "refine",
+                "route": "route"
+            }
+        )
+        
+        builder.add_edge("refine", "route")
+        
+        builder.add_conditional_edges("route", route_by_category, category_branches)
     builder.add_conditional_edges("transfer", after_transfer, {"end_transfer": END, "summarize": "summarize"})
     builder.add_edge("sql", "summarize")
     builder.add_edge("finrag", "summarize")
@@ -294,87 +458,162 @@ def get_main_graph():
         _compiled_graph = _build_main_graph()
     return _compiled_graph
 
+def _print_stage_timings(result: dict):
+    timings = result.get("_timings") or {}
+    if not timings:
+        return
+    path = "fused" if "understand" in timings else "3-hop"
+    detail = " / ".join(f"{name}: {elapsed:.3f}초" for name, elapsed in timings.items())
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    print(f"[{now}] [이해 단계 소요시간 ({path})] {detail} / 합계: {sum(timings.values()):.3f}초", flush=True)
+    if USE_SPECULATIVE_RETRIEVAL:
+        stats = get_speculation_stats()
+        print(f"[{now}] [투기적 검색 누적] 사용: {stats['used']} / 폐기: {stats['discarded']} / "
+              f"절약: {stats['saved_seconds']:.3f}초 / 낭비: {stats['wasted_seconds']:.3f}초", flush=True)
+
 # ---------------------------------------------------------
 # 메인 에이전트 실행 함수 (Orchestrator)
 # ---------------------------------------------------------
-def run_fintech_agent(question, username="test_user", transfer_context=None, allowed_views=None):
-    print("\n" + "="*60)
-    total_t0 = print_log("Main Agent 전체 파이프라인", "start")
-    print(f"   [User Input]: {question}")
-    print("="*60)
-
-    if transfer_context:
-        t0_ctx = print_log("진행 중인 송금 컨텍스트(Transfer Context) 처리", "start")
-        source_lang = transfer_context.get("source_language", "Korean")
-        
-        if question.strip().upper() in ("__YES__", "__NO__"):
-            korean_query = question
-        elif question.strip().isdigit() or (len(question.strip()) <= 10 and not any(c.isalpha() for c in question)):
+async def _ahandle_transfer_context(question, username, transfer_context):
+    t0_ctx = print_log("진행 중인 송금 컨텍스트(Transfer Context) 처리", "start")
+    source_lang = transfer_context.get("source_language", "Korean")
+    
+    if question.strip().upper() in ("__YES__", "__NO__"):
+        korean_query = question
+    elif question.strip().isdigit() or (len(question.strip()) <= 10 and not any(c.isalpha() for c in question)):
+        korean_query = question
+    elif is_confident_korean(question):
+        record_fast_path(True)
+        korean_query = question
+    else:
+        record_fast_path(False)
+        try:
+            chain = _translation_chain()
+            trans_result_str = (await chain.ainvoke({"question": question})).strip()
+            trans_result_str = trans_result_str.replace("```json", "").replace("```", "")
+            trans_result = json.loads(trans_result_str)
+            detected_lang = trans_result.get("source_language", "Korean")
+            korean_query = trans_result.get("korean_query", question)
+            
+            if source_lang == "Korean" and detected_lang != "Korean":
+                source_lang = detected_lang
+                transfer_context["source_language"] = source_lang
+        except Exception:
             korean_query = question
-        else:
-            try:
-                chain = _translation_chain()
-                trans_result_str = chain.invoke({"question": question}).strip()
-                trans_result_str = trans_result_str.replace("```json", "").replace("```", "")
-                trans_result = json.loads(trans_result_str)
-                detected_lang = trans_result.get("source_language", "Korean")
-                korean_query = trans_result.get("korean_query", question)
-                
-                if source_lang == "Korean" and detected_lang != "Korean":
-                    source_lang = detected_lang
-                    transfer_context["source_language"] = source_lang
-            except Exception:
-                korean_query = question
-        
-        transfer_result = get_transfer_answer(korean_query, username, context=transfer_context)
-        
-        if isinstance(transfer_result, dict) and "message" in transfer_result:
-            korean_msg = transfer_result["message"]
-            translated_msg = translate_answer(korean_msg, source_lang)
-            transfer_result["message"] = translated_msg
-            if "context" in transfer_result:
-                transfer_result["context"]["source_language"] = source_lang
-        
-        print_log("진행 중인 송금 컨텍스트(Transfer Context) 처리", "end", t0_ctx)
-        print("="*60)
-        print_log("Main Agent 전체 파이프라인", "end", total_t0)
-        print("="*60 + "\n")
-        return transfer_result
+    
+    transfer_result = await aget_transfer_answer(korean_query, username, context=transfer_context)
+    
+    if isinstance(transfer_result, dict) and "message" in transfer_result:
+        korean_msg = transfer_result["message"]
+        translated_msg = await atranslate_answer(korean_msg, source_lang)
+        transfer_result["message"] = translated_msg
+        if "context" in transfer_result:
+            transfer_result["context"]["source_language"] = source_lang
+    
+    print_log("진행 중인 송금 컨텍스트(Transfer Context) 처리", "end", t0_ctx)
+    return transfer_result
 
-    history_text = ""
-    if MEMORY_FILE.exists():
-        with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-            history_text = f.read()
-    else:
-        history_text = "이전 대화 기록 없음(No previous conversation history)."
+async def _abuild_initial_state(question, username, allowed_views) -> MainAgentState:
+    history_text = await arender(username)
 
-    initial_state: MainAgentState = {
+    return {
         "question": question,
         "username": username,
         "allowed_views": allowed_views or [],
         "_history": history_text,
     }
 
-    graph = get_main_graph()
-    result = graph.invoke(initial_state)
+async def _afinalize_result(result: dict):
+    """그래프 최종 상태에서 사용자에게 돌려줄 결과(송금 dict 또는 답변 문자열)를 만듭니다."""
+    _print_stage_timings(result)
 
     if result.get("transfer_result") is not None:
         transfer_result = result["transfer_result"]
         source_lang = result.get("source_lang", "Korean")
         if isinstance(transfer_result, dict) and "message" in transfer_result:
             korean_msg = transfer_result["message"]
-            translated_msg = translate_answer(korean_msg, source_lang)
+            translated_msg = await atranslate_answer(korean_msg, source_lang)
             transfer_result["message"] = translated_msg
-            
-        print("="*60)
-        print_log("Main Agent 전체 파이프라인 (Transfer)", "end", total_t0)
-        print("="*60 + "\n")
         return transfer_result
 
-    final_answer = result.get("final_answer") or result.get("korean_answer") or ""
-    
+    return result.get("final_answer") or result.get("korean_answer") or ""
+
+def _print_pipeline_start(question):
+    print("\n" + "="*60)
+    total_t0 = print_log("Main Agent 전체 파이프라인", "start")
+    print(f"   [User Input]: {question}")
+    print("="*60)
+    return total_t0
+
+def _print_pipeline_end(total_t0, is_transfer=False):
     print("="*60)
-    print_log("Main Agent 전체 파이프라인", "end", total_t0)
+    print_log("Main Agent 전체 파이프라인 (Transfer)" if is_transfer else "Main Agent 전체 파이프라인", "end", total_t0)
     print("="*60 + "\n")
-    
-    return final_answer
\ No newline at end of file
+
+def run_fintech_agent(question, username="test_user", transfer_context=None, allowed_views=None):
+    """arun_fintech_agent의 동기 래퍼 (Streamlit 등 동기 호출부용)"""
+    return run_sync(arun_fintech_agent(question, username, transfer_context, allowed_views))
+
+async def arun_fintech_agent(question, username="test_user", transfer_context=None, allowed_views=None):
+    total_t0 = _print_pipeline_start(question)
+
+    if transfer_context:
+        transfer_result = await _ahandle_transfer_context(question, username, transfer_context)
+        _print_pipeline_end(total_t0)
+        return transfer_result
+
+    initial_state = await _abuild_initial_state(question, username, allowed_views)
+
+    graph = get_main_graph()
+    result = await graph.ainvoke(initial_state)
+    final = await _afinalize_result(result)
+
+    _print_pipeline_end(total_t0, is_transfer=isinstance(final, dict))
+    return final
+
+def stream_fintech_agent(question, username="test_user", transfer_context=None, allowed_views=None):
+    """astream_fintech_agent의 동기 래퍼"""
+    return iter_sync(astream_fintech_agent(question, username, transfer_context, allowed_views))
+
+async def astream_fintech_agent(question, username="test_user", transfer_context=None, allowed_views=None):
+    """
+    arun_fintech_agent의 스트리밍 버전.
+    {"type": "token", "content": str} 이벤트로 최종 답변 토큰을 순서대로 내보내고,
+    마지막에 {"type": "final", "result": arun_fintech_agent와 동일한 반환값} 이벤트를 한 번 내보냅니다.
+
+    - 한국어 사용자: 하위 에이전트의 답변 생성 LLM 토큰(ANSWER_STREAM_TAG)을 스트리밍
+    - 외국어 사용자: 역번역 LLM 토큰(RE_TRANSLATE_STREAM_TAG)을 스트리밍
+    송금 플로우(dict 결과)는 토큰 없이 final 이벤트만 내보냅니다.
+    """
+    total_t0 = _print_pipeline_start(question)
+
+    if transfer_context:
+        transfer_result = await _ahandle_transfer_context(question, username, transfer_context)
+        _print_pipeline_end(total_t0)
+        yield {"type": "final", "result": transfer_result}
+        return
+
+    initial_state = await _abuild_initial_state(question, username, allowed_views)
+
+    graph = get_main_graph()
+    result = dict(initial_state)
+    async for namespace, mode, payload in graph.astream(initial_state, stream_mode=["messages", "values"], subgraphs=True):
+        if mode == "values":
+            if not namespace:
+                result = payload
+            continue
+
+        chunk, metadata = payload
+        content = chunk.content if isinstance(chunk.content, str) else ""
+        if not content:
+            continue
+
+        source_lang = result.get("source_lang", "Korean")
+        is_korean = "Korean" in source_lang or "한국어" in source_lang
+        stream_tag = ANSWER_STREAM_TAG if is_korean else RE_TRANSLATE_STREAM_TAG
+        if stream_tag in (metadata.get("tags") or []):
+            yield {"type": "token", "content": content}
+
+    final = await _afinalize_result(result)
+    _print_pipeline_end(total_t0, is_transfer=isinstance(final, dict))
+    yield {"type": "final", "result": final}
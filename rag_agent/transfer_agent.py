@@ -1,4 +1,5 @@
 import json
+import asyncio
 from datetime import datetime
 from pathlib import Path
 from typing import TypedDict, List
@@ -6,12 +7,10 @@ from dotenv import load_dotenv
 import bcrypt
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 
 import utils.handle_sql as sql
-from utils.agent_utils import read_prompt, print_log
+from utils.agent_utils import get_chain, print_log, run_sync
 
 load_dotenv()
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -37,18 +36,15 @@ def _parse_transfer_json(text: str) -> dict:
         print(f"[{now}] JSON Parsing Error: {e}, Raw: {text}")
         return {"target": None, "amount": None, "currency": None}
 
-def _node_extract(state: TransferExtractState) -> dict:
+async def _node_extract(state: TransferExtractState) -> dict:
     """
     사용자 발화에서 송금 대상, 금액, 통화를 추출합니다.
     """
     t0 = print_log("1. LLM 송금 정보 추출 (node_extract)", "start")
     
-    template = read_prompt(PROMPT_DIR, "transfer_01_extract.md")
+    chain = get_chain(PROMPT_DIR, "transfer_01_extract.md", llm)
     
-    prompt = PromptTemplate.from_template(template)
-    chain = prompt | llm | StrOutputParser()
-    
-    raw = chain.invoke({"question": state["question"]})
+    raw = await chain.ainvoke({"question": state["question"]})
     extracted = _parse_transfer_json(raw)
     
     print_log("1. LLM 송금 정보 추출 (node_extract)", "end", t0, extra_info=f"추출 결과: {extracted}")
@@ -66,15 +62,15 @@ def _get_transfer_extract_graph():
         _transfer_extract_graph = builder.compile()
     return _transfer_extract_graph
 
-def _invoke_transfer_extract(question: str) -> dict:
+async def _ainvoke_transfer_extract(question: str) -> dict:
     graph = _get_transfer_extract_graph()
-    result = graph.invoke({"question": question})
+    result = await graph.ainvoke({"question": question})
     return result.get("extracted", {"target": None, "amount": None, "currency": None})
 
 # ---------------------------------------------------------
 # LLM 기반 연락처 의미 매칭 함수
 # ---------------------------------------------------------
-def _find_best_match_contact_llm(user_input: str, contacts: List[dict]) -> str | None:
+async def _afind_best_match_contact_llm(user_input: str, contacts: List[dict]) -> str | None:
     """
     단순 문자열 비교 실패 시, LLM을 통해 의미적 매칭을 수행합니다.
     예: user_input="엄마", contacts=[{'contact_name': 'Mother'}] -> returns 'Mother'
@@ -90,13 +86,10 @@ def _find_best_match_contact_llm(user_input: str, contacts: List[dict]) -> str |
         for c in contacts
     ])
 
-    template = read_prompt(PROMPT_DIR, "transfer_02_contact_match.md")
-    
-    prompt = PromptTemplate.from_template(template)
-    chain = prompt | llm | StrOutputParser()
+    chain = get_chain(PROMPT_DIR, "transfer_02_best_match.md", llm)
     
     try:
-        matched_name = chain.invoke({"user_input": user_input, "candidates": candidates_str}).strip()
+        matched_name = (await chain.ainvoke({"user_input": user_input, "candidates": candidates_str})).strip()
         
         if matched_name == "NONE":
             print_log("2. LLM 기반 연락처 의미 매칭", "end", t0, extra_info="적절한 매칭 대상 없음 (NONE)")
@@ -114,14 +107,14 @@ def _find_best_match_contact_llm(user_input: str, contacts: List[dict]) -> str |
         print(f"[{now}] LLM Matching Error: {e}")
         return None
 
-def _resolve_contact_name(user_id, user_input):
+async def _aresolve_contact_name(user_id, user_input):
     """
     사용자 입력을 바탕으로 정확한 DB 내 연락처 이름(contact_name)을 찾습니다.
     1. 정확한 이름 매칭
     2. 관계(relationship) 매칭
     3. LLM 의미 기반 매칭 (New)
     """
-    contacts = sql.get_all_contacts(user_id)
+    contacts = await sql.aget_all_contacts(user_id)
     if not contacts:
         return None
         
@@ -138,7 +131,7 @@ def _resolve_contact_name(user_id, user_input):
     # 2차 시도: LLM을 이용한 의미론적 매칭
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
     print(f"[{now}] 🔀 '{user_input}' 정확한 DB 매칭 실패. LLM 매칭 시도...")
-    matched_name = _find_best_match_contact_llm(user_input_clean, contacts)
+    matched_name = await _afind_best_match_contact_llm(user_input_clean, contacts)
     
     if matched_name:
         return matched_name
@@ -149,10 +142,13 @@ def _resolve_contact_name(user_id, user_input):
 # 메인 송금 로직
 # ---------------------------------------------------------
 def process_transfer(question: str, username: str, context: dict | None = None):
+    return run_sync(aprocess_transfer(question, username, context))
+
+async def aprocess_transfer(question: str, username: str, context: dict | None = None):
 
     context = context or {}
 
-    user_id = sql.get_member_id(username)
+    user_id = await sql.aget_member_id(username)
     if not user_id:
         return {"status": "ERROR", "message": "사용자를 찾을 수 없습니다."}
 
@@ -161,7 +157,7 @@ def process_transfer(question: str, username: str, context: dict | None = None):
     # --------------------------------------------------
     if context.get("awaiting_password"):
         t0_pin = print_log("송금 승인: PIN 검증 및 트랜잭션 실행", "start")
-        stored_pin = sql.get_user_password(username)
+        stored_pin = await sql.aget_user_password(username)
         if not stored_pin:
             return {"status": "ERROR", "message": "사용자 정보를 찾을 수 없습니다."}
 
@@ -169,7 +165,8 @@ def process_transfer(question: str, username: str, context: dict | None = None):
             stored_pin = stored_pin.encode('utf-8')
 
         # 패스워드 검증
-        if bcrypt.checkpw(question.encode('utf-8'), stored_pin) == False:
+        # bcrypt 검증은 CPU 연산이므로 이벤트 루프를 막지 않도록 스레드에서 수행
+        if await asyncio.to_thread(bcrypt.checkpw, question.encode('utf-8'), stored_pin) == False:
             context["password_attempts"] = context.get("password_attempts", 0) + 1
             if context["password_attempts"] >= 5:
                 print_log("송금 승인: PIN 검증", "end", t0_pin, extra_info="PIN 5회 오류로 취소")
@@ -183,13 +180,13 @@ def process_transfer(question: str, username: str, context: dict | None = None):
             }
 
         # 송금 실행 (DB 업데이트)
-        account = sql.get_primary_account(user_id)
-        contact = sql.get_contact(user_id, context["target"]) 
+        account = await sql.aget_primary_account(user_id)
+        contact = await sql.aget_contact(user_id, context["target"]) 
 
         new_balance = float(account["balance"]) - context["amount_krw"]
-        sql.update_balance(account["account_id"], new_balance)
+        await sql.aupdate_balance(account["account_id"], new_balance)
 
-        sql.insert_ledger(
+        await sql.ainsert_ledger(
             account["account_id"],
             contact["contact_id"],
             context["amount_krw"],
@@ -244,7 +241,7 @@ def process_transfer(question: str, username: str, context: dict | None = None):
         t0_hitl = print_log(f"누락된 정보({field}) 보완 처리", "start")
 
         if field == "target":
-            resolved = _resolve_contact_name(user_id, question)
+            resolved = await _aresolve_contact_name(user_id, question)
             if not resolved:
                 print_log(f"누락된 정보({field}) 보완 처리", "end", t0_hitl, extra_info="연락처 조회 실패")
                 return {
@@ -278,7 +275,7 @@ def process_transfer(question: str, username: str, context: dict | None = None):
     # 4. 최초 요청
     # --------------------------------------------------
     if not context.get("target") and not context.get("amount"):
-        info = _invoke_transfer_extract(question)
+        info = await _ainvoke_transfer_extract(question)
         context["target"]   = info.get("target")
         context["amount"]   = info.get("amount")
         context["currency"] = info.get("currency")
@@ -296,7 +293,7 @@ def process_transfer(question: str, username: str, context: dict | None = None):
             "context": context
         }
 
-    resolved = _resolve_contact_name(user_id, target)
+    resolved = await _aresolve_contact_name(user_id, target)
     if not resolved:
         context["missing_field"] = "target"
         return {
@@ -320,11 +317,11 @@ def process_transfer(question: str, username: str, context: dict | None = None):
         context["currency"] = "KRW"
         currency = "KRW"
 
-    rate = sql.get_exchange_rate(currency)
+    rate = await sql.aget_exchange_rate(currency)
     if rate is None:
         return {"status": "ERROR", "message": f"{currency} 환율 정보를 찾을 수 없습니다."}
 
-    account = sql.get_primary_account(user_id)
+    account = await sql.aget_primary_account(user_id)
     if not account:
         return {"status": "ERROR", "message": "주 계좌를 찾을 수 없습니다."}
 
@@ -356,11 +353,14 @@ def process_transfer(question: str, username: str, context: dict | None = None):
 # 외부 호출 함수
 # ---------------------------------------------------------
 def get_transfer_answer(question, username, context=None):
+    return run_sync(aget_transfer_answer(question, username, context))
+
+async def aget_transfer_answer(question, username, context=None):
     print("\n" + "-"*50)
     total_t0 = print_log("Transfer Agent 상태 머신 파이프라인", "start")
     
     try:
-        result = process_transfer(question, username, context)
+        result = await aprocess_transfer(question, username, context)
         
         print("-" * 50)
         print_log("Transfer Agent 상태 머신 파이프라인", "end", total_t0, extra_info=f"최종 상태: {result.get('status')}")
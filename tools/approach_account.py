@@ -4,12 +4,10 @@ from typing import TypedDict
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 
-from utils.handle_sql import get_schema_info, clean_sql_query, run_db_query
-from utils.agent_utils import read_prompt, print_log
+from utils.handle_sql import aget_schema_info, clean_sql_query, arun_db_query
+from utils.agent_utils import get_chain, print_log, run_sync, ANSWER_STREAM_TAG
 
 load_dotenv()
 
@@ -25,6 +23,7 @@ class SQLAgentState(TypedDict, total=False):
     question: str
     username: str
     allowed_views: list
+    prefetched_schema: object
     schema: str
     query: str
     result: str
@@ -33,18 +32,22 @@ class SQLAgentState(TypedDict, total=False):
 # ---------------------------------------------------------
 # 노드
 # ---------------------------------------------------------
-def node_schema(state: SQLAgentState) -> dict:
+async def node_schema(state: SQLAgentState) -> dict:
     t0 = print_log("1. 스키마 조회 (node_schema)", "start")
-    schema = get_schema_info(state.get("allowed_views") or [])
-    print_log("1. 스키마 조회 (node_schema)", "end", t0)
+    prefetched = state.get("prefetched_schema")
+    if prefetched is not None:
+        schema = await prefetched.consume()
+        extra = "투기적 스키마 조회 결과 사용"
+    else:
+        schema = await aget_schema_info(state.get("allowed_views") or [])
+        extra = None
+    print_log("1. 스키마 조회 (node_schema)", "end", t0, extra_info=extra)
     return {"schema": schema}
 
-def node_sql_gen(state: SQLAgentState) -> dict:
+async def node_sql_gen(state: SQLAgentState) -> dict:
     t0 = print_log("2. SQL 쿼리 생성 (node_sql_gen)", "start")
-    template = read_prompt(PROMPT_DIR, "sql_01_generation.md")
-    prompt = PromptTemplate.from_template(template)
-    chain = prompt | llm | StrOutputParser()
-    raw = chain.invoke({
+    chain = get_chain(PROMPT_DIR, "sql_01_generation.md", llm)
+    raw = await chain.ainvoke({
         "question": state["question"],
         "schema": state["schema"],
     })
@@ -52,23 +55,21 @@ def node_sql_gen(state: SQLAgentState) -> dict:
     print_log("2. SQL 쿼리 생성 (node_sql_gen)", "end", t0, extra_info=f"생성된 SQL:\n      {query}")
     return {"query": query}
 
-def node_execute(state: SQLAgentState) -> dict:
+async def node_execute(state: SQLAgentState) -> dict:
     t0 = print_log("3. SQL 실행 (node_execute)", "start")
-    result = run_db_query(state["query"])
+    result = await arun_db_query(state["query"])
     sample_result = str(result)[:100] + "..." if len(str(result)) > 100 else str(result)
     print_log("3. SQL 실행 (node_execute)", "end", t0, extra_info=f"실행 결과 일부: {sample_result}")
     return {"result": result}
 
-def node_answer(state: SQLAgentState) -> dict:
+async def node_answer(state: SQLAgentState) -> dict:
     t0 = print_log("4. 최종 답변 생성 (node_answer)", "start")
-    template = read_prompt(PROMPT_DIR, "sql_02_answer.md")
-    prompt = PromptTemplate.from_template(template)
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({
+    chain = get_chain(PROMPT_DIR, "sql_02_answer.md", llm)
+    response = await chain.ainvoke({
         "question": state["question"],
         "query": state["query"],
         "result": state["result"],
-    })
+    }, config={"tags": [ANSWER_STREAM_TAG]})
     print_log("4. 최종 답변 생성 (node_answer)", "end", t0)
     return {"response": response}
 
@@ -97,6 +98,10 @@ def _get_sql_graph():
 # 외부 호출용 함수
 # ---------------------------------------------------------
 def get_sql_answer(question, username, allowed_views=None):
+    return run_sync(aget_sql_answer(question, username, allowed_views))
+
+async def aget_sql_answer(question, username, allowed_views=None, prefetched_schema=None):
+    """prefetched_schema: 메인 에이전트가 라우팅 전에 미리 시작한 스키마 조회(SpeculativeTask)"""
     try:
         if allowed_views is None:
             allowed_views = []
@@ -107,10 +112,11 @@ def get_sql_answer(question, username, allowed_views=None):
         print("="*50)
         
         graph = _get_sql_graph()
-        result = graph.invoke({
+        result = await graph.ainvoke({
             "question": question,
             "username": username,
             "allowed_views": allowed_views,
+            "prefetched_schema": prefetched_schema,
         })
         
         print("="*50)
@@ -123,6 +129,9 @@ def get_sql_answer(question, username, allowed_views=None):
         error_msg = f"데이터 조회 중 오류가 발생했습니다: {e}"
         print(f"[{now}] [SQL Agent Error]: {error_msg}")
         return error_msg
+    finally:
+        if prefetched_schema is not None:
+            prefetched_schema.discard()
 
 if __name__ == "__main__":
     test_views = ["account_summary_view", "transaction_history_view"]
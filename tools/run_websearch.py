@@ -2,15 +2,13 @@ import os
 from datetime import datetime
 from typing import TypedDict
 from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 from pathlib import Path
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 
-from utils.agent_utils import read_prompt, print_log
+from utils.agent_utils import get_chain, print_log, run_sync, ANSWER_STREAM_TAG
 
 load_dotenv()
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -30,12 +28,10 @@ class WebSearchState(TypedDict, total=False):
 # ---------------------------------------------------------
 # 노드
 # ---------------------------------------------------------
-def node_answer(state: WebSearchState) -> dict:
+async def node_answer(state: WebSearchState) -> dict:
     t0 = print_log("Web Search: LLM 기반 최종 답변 생성 (node_answer)", "start")
-    template = read_prompt(PROMPT_DIR, "web_search_01_response.md")
-    prompt = PromptTemplate.from_template(template)
-    chain = prompt | llm | StrOutputParser()
-    answer = chain.invoke({"question": state["question"], "context": state.get("context", "")})
+    chain = get_chain(PROMPT_DIR, "web_search_01_response.md", llm)
+    answer = await chain.ainvoke({"question": state["question"], "context": state.get("context", "")}, config={"tags": [ANSWER_STREAM_TAG]})
     print_log("Web Search: LLM 기반 최종 답변 생성 (node_answer)", "end", t0)
     return {"answer": answer}
 
@@ -65,17 +61,21 @@ class WebSearchRAG:
         if not tavily_api_key:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
             print(f"[{now}] ⚠️ [Warning] TAVILY_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
-        self.tavily = TavilyClient(api_key=tavily_api_key)
+        self.tavily = AsyncTavilyClient(api_key=tavily_api_key)
 
     def web_search(self, query):
-        """실시간 웹 검색 및 답변 생성 (LangGraph)"""
+        """실시간 웹 검색 및 답변 생성 (동기 래퍼)"""
+        return run_sync(self.aweb_search(query))
+
+    async def aweb_search(self, query):
+        """실시간 웹 검색 및 답변 생성 (LangGraph, 비동기)"""
         print("\n" + "-"*50)
         total_t0 = print_log("Web Search RAG 파이프라인", "start", extra_info=f"검색 쿼리: '{query}'")
         
         try:
             # 1. Tavily API 웹 검색
             t0_search = print_log("Tavily API 웹 검색", "start")
-            search_results = self.tavily.search(query, max_results=3)
+            search_results = await self.tavily.search(query, max_results=3)
             
             context_parts = []
             sources = []
@@ -96,7 +96,7 @@ class WebSearchRAG:
 
             # 2. LangGraph를 통한 답변 생성
             graph = _get_web_search_graph()
-            result_state = graph.invoke({"question": query, "context": context_str, "sources": sources})
+            result_state = await graph.ainvoke({"question": query, "context": context_str, "sources": sources})
             answer = result_state.get("answer", "답변 생성 실패")
 
             print_log("Web Search RAG 파이프라인", "end", total_t0, extra_info="검색 및 답변 생성 완료")
@@ -1,7 +1,21 @@
+import os
+import asyncio
+import hashlib
+import threading
 from pathlib import Path
 from datetime import datetime
 import time
 
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROMPT_ROOTS = [PROJECT_ROOT / "rag_agent" / "prompt", PROJECT_ROOT / "tools" / "prompt"]
+
+# 스트리밍 대상 LLM 호출 식별용 태그 (main_agent.stream_fintech_agent에서 필터링)
+ANSWER_STREAM_TAG = "beott:answer"
+RE_TRANSLATE_STREAM_TAG = "beott:re_translate"
+
 # 로그 출력
 def print_log(step_name: str, status: str, start_time: float = None, extra_info: str = None):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
@@ -16,25 +30,157 @@ def print_log(step_name: str, status: str, start_time: float = None, extra_info:
         print(log_msg,flush=True)
         return elapsed
 
-# memory.md 초기화
-def reset_global_context():
-    MEMORY_DIR = Path("logs")
-    MEMORY_FILE = MEMORY_DIR / "memory.md"
+# ---------------------------------------------------------
+# 동기 API용 비동기 실행 헬퍼
+# ---------------------------------------------------------
+# 동기 래퍼(run_fintech_agent 등)는 모두 하나의 백그라운드 이벤트 루프에서 코루틴을 실행합니다.
+# 호출마다 asyncio.run으로 새 루프를 만들면 LLM 클라이언트의 커넥션 풀이 닫힌 루프에 묶이므로,
+# 루프를 하나로 유지하고 여러 Streamlit 세션의 요청을 같은 루프에서 동시에 처리합니다.
+_background_loop = None
+_background_loop_lock = threading.Lock()
 
-    MEMORY_DIR.mkdir(parents=True, exist_ok=True)
-    with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-        f.write("# 대화 기록\n\n")
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    print(f"[{now}] [Memory] 대화 기록 파일(logs/memory.md)이 초기화되었습니다.")
+def _get_background_loop():
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="beott-async-loop", daemon=True).start()
+                _background_loop = loop
+    return _background_loop
+
+def run_sync(coro):
+    """코루틴을 백그라운드 이벤트 루프에서 실행하고 결과를 동기적으로 반환"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+def iter_sync(agen):
+    """비동기 제너레이터를 백그라운드 이벤트 루프에서 돌리며 동기 제너레이터로 변환"""
+    async def _next():
+        return await agen.__anext__()
+
+    while True:
+        try:
+            yield run_sync(_next())
+        except StopAsyncIteration:
+            return
+
+# ---------------------------------------------------------
+# 토큰 수 계산
+# ---------------------------------------------------------
+TOKEN_ENCODING = "o200k_base"
+_encoding = None
+_encoding_failed = False
+
+def count_tokens(text: str) -> int:
+    """
+    tiktoken으로 토큰 수를 계산합니다.
+    인코딩 파일을 내려받을 수 없는 환경에서는 문자 수 기반 추정치(한글 1자≈1토큰, 그 외 4자≈1토큰)를 사용합니다.
+    """
+    global _encoding, _encoding_failed
+    if not text:
+        return 0
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception:
+            _encoding_failed = True
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul + 3) // 4
+
+# ---------------------------------------------------------
+# 프롬프트 / 체인 레지스트리 (프로세스 전역)
+# ---------------------------------------------------------
+_registry_lock = threading.Lock()
+_prompt_cache = {}   # 파일 경로 -> (mtime, 프롬프트 텍스트)
+_chain_cache = {}    # (파일 경로, id(llm)) -> (mtime, llm, 체인)
+_version_cache = {}  # 파일 경로 -> (mtime, 프롬프트 버전 해시)
+_registry_stats = {"loads": 0, "hits": 0, "chain_builds": 0, "chain_hits": 0}
+_preloaded = False
 
+def _load_prompt(file_path: Path) -> tuple[float, str]:
+    """파일의 mtime이 바뀐 경우에만 디스크에서 다시 읽습니다."""
+    key = os.path.abspath(file_path)
+    mtime = os.stat(key).st_mtime
+    with _registry_lock:
+        cached = _prompt_cache.get(key)
+        if cached and cached[0] == mtime:
+            _registry_stats["hits"] += 1
+            return cached
+
+    with open(key, "r", encoding="utf-8") as f:
+        text = f.read()
+    with _registry_lock:
+        _prompt_cache[key] = (mtime, text)
+        _registry_stats["loads"] += 1
+    return mtime, text
+
+def preload_prompts():
+    """rag_agent/prompt, tools/prompt 하위의 모든 프롬프트를 한 번에 적재"""
+    global _preloaded
+    _preloaded = True
+    for root in PROMPT_ROOTS:
+        if not root.exists():
+            continue
+        for file_path in sorted(root.rglob("*.md")):
+            _load_prompt(file_path)
 
 # 프롬프트 경로 설정 및 로딩 함수
 def read_prompt(prompt_dir: str, filename: str) -> str:
-    file_path = prompt_dir / filename
+    if not _preloaded:
+        preload_prompts()
+    file_path = Path(prompt_dir) / filename
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
+        return _load_prompt(file_path)[1]
     except FileNotFoundError:
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         print(f"[{now}] [Error] 프롬프트 파일을 찾을 수 없습니다: {file_path}")
         return ""
+
+def prompt_version(prompt_dir: str, filename: str) -> str:
+    """프롬프트 내용의 짧은 해시. 파일이 수정(mtime 변경)된 경우에만 다시 계산합니다."""
+    if not _preloaded:
+        preload_prompts()
+    file_path = Path(prompt_dir) / filename
+    try:
+        mtime, text = _load_prompt(file_path)
+    except FileNotFoundError:
+        return ""
+    key = os.path.abspath(file_path)
+    with _registry_lock:
+        cached = _version_cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    with _registry_lock:
+        _version_cache[key] = (mtime, version)
+    return version
+
+def get_chain(prompt_dir: str, filename: str, llm):
+    """
+    PromptTemplate | llm | StrOutputParser 체인을 한 번만 컴파일해 재사용합니다.
+    프롬프트 파일이 수정(mtime 변경)되면 다시 읽고 체인을 재생성합니다.
+    """
+    template = read_prompt(prompt_dir, filename)
+    key = (os.path.abspath(Path(prompt_dir) / filename), id(llm))
+    with _registry_lock:
+        mtime = _prompt_cache.get(key[0], (None, ""))[0]
+        cached = _chain_cache.get(key)
+        if cached and cached[0] == mtime and cached[1] is llm:
+            _registry_stats["chain_hits"] += 1
+            return cached[2]
+
+    chain = PromptTemplate.from_template(template) | llm | StrOutputParser()
+    with _registry_lock:
+        _chain_cache[key] = (mtime, llm, chain)
+        _registry_stats["chain_builds"] += 1
+    return chain
+
+def get_prompt_registry_stats() -> dict:
+    with _registry_lock:
+        stats = dict(_registry_stats)
+        stats["cached_prompts"] = len(_prompt_cache)
+        stats["cached_chains"] = len(_chain_cache)
+    return stats
@@ -0,0 +1,200 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import re
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.agent_utils import PROJECT_ROOT
+
+CACHE_DIR = os.getenv("BEOTT_CACHE_DIR", str(PROJECT_ROOT / "cache"))
+
+# ---------------------------------------------------------
+# 키 생성 헬퍼
+# ---------------------------------------------------------
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화: NFC 통일 + 앞뒤 공백 제거 + 줄 안의 연속 공백 축약 (줄바꿈은 마크다운 구조이므로 유지)"""
+    text = unicodedata.normalize("NFC", text or "")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.strip().splitlines()]
+    return "\n".join(lines)
+
+def make_key(*parts) -> str:
+    joined = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+# ---------------------------------------------------------
+# 1단계: 프로세스 메모리 LRU
+# ---------------------------------------------------------
+class LRUCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+# ---------------------------------------------------------
+# 2단계: SQLite 기반 디스크 캐시
+# ---------------------------------------------------------
+class DiskCache:
+    """
+    key -> JSON 값을 저장하는 SQLite 테이블.
+    expires_at이 지난 항목은 조회 시 없는 것으로 취급하고 삭제합니다.
+    """
+
+    def __init__(self, name: str, cache_dir: str = CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{name}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return default
+        return json.loads(value)
+
+    def set(self, key, value, ttl: float = None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+# ---------------------------------------------------------
+# 메모리 LRU + 디스크 2단계 캐시
+# ---------------------------------------------------------
+class TieredCache:
+    """
+    메모리 LRU를 먼저 조회하고, 없으면 디스크에서 읽어 메모리로 올립니다. ttl은 두 단계 모두에 적용됩니다.
+    값과 함께 생성에 걸린 시간(cost)을 저장해 두고, 적중 시 절약된 시간으로 집계합니다.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, persistent: bool = True):
+        self.name = name
+        self.memory = LRUCache(maxsize)
+        self.disk = None
+        if persistent:
+            try:
+                self.disk = DiskCache(name)
+            except Exception as e:
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                print(f"[{now}] [Cache] '{name}' 디스크 캐시를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        level = "memory_hits"
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            level = "disk_hits"
+            if entry is not None:
+                self.memory.set(key, entry)
+
+        if entry is not None and entry.get("expires_at") and entry["expires_at"] < time.time():
+            self.memory.delete(key)
+            entry = None
+
+        with self._stats_lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats[level] += 1
+            self._stats["saved_seconds"] += entry.get("cost", 0.0)
+        return entry["value"]
+
+    def set(self, key, value, cost: float = 0.0, ttl: float = None):
+        entry = {"value": value, "cost": cost, "expires_at": time.time() + ttl if ttl else None}
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry, ttl=ttl)
+
+    async def aget(self, key):
+        """이벤트 루프용 get: 메모리 적중은 바로 반환하고, SQLite 조회만 스레드에서 실행합니다."""
+        if self.disk is not None and self.memory.get(key) is None:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key, value, cost: float = 0.0, ttl: float = None):
+        """이벤트 루프용 set: 디스크 쓰기(commit)가 루프를 막지 않도록 스레드에서 실행합니다."""
+        if self.disk is not None:
+            await asyncio.to_thread(self.set, key, value, cost, ttl)
+        else:
+            self.set(key, value, cost=cost, ttl=ttl)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_ratio"] = hits / total if total else 0.0
+        stats["memory_size"] = len(self.memory)
+        return stats
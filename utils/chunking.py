@@ -0,0 +1,104 @@
+import os
+import re
+
+from utils.agent_utils import count_tokens
+from utils.lexical_index import tokenize
+
+# 정의가 이 토큰 수를 넘는 용어는 여러 문단(chunk)으로 나눠 색인합니다. 0이면 나누지 않음
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "400"))
+# 이웃 chunk와 겹치게 둘 토큰 수 (문장 단위로 맞춤)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+
+# 문장 경계: 마침표/물음표/느낌표 뒤 공백 ("~이다. ", "~함. ")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。])\s+")
+
+# ---------------------------------------------------------
+# 정의 분할
+# ---------------------------------------------------------
+def _split_long_word(word: str, size: int) -> list:
+    """띄어쓰기 없이 size 토큰을 넘는 덩어리를 실제 토큰 수를 재며 size 토큰 이하 조각으로 자릅니다."""
+    pieces = []
+    start = 0
+    while start < len(word):
+        # word[start:end]가 size 토큰 이하인 가장 긴 end를 이분 탐색 (최소 1글자는 진행)
+        low, high = start + 1, len(word)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if count_tokens(word[start:mid]) <= size:
+                low = mid
+            else:
+                high = mid - 1
+        pieces.append(word[start:low])
+        start = low
+    return pieces
+
+def _split_long_sentence(sentence: str, size: int) -> list:
+    """size 토큰을 넘는 한 문장은 공백 기준으로 잘라 붙입니다."""
+    pieces = []
+    current = []
+    used = 0
+    words = []
+    for word in sentence.split():
+        words.extend(_split_long_word(word, size) if count_tokens(word) > size else [word])
+    for word in words:
+        cost = count_tokens(word + " ")
+        if current and used + cost > size:
+            pieces.append(" ".join(current))
+            current, used = [], 0
+        current.append(word)
+        used += cost
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def split_passages(text: str, size: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS) -> list:
+    """
+    정의를 문장 단위로 묶어 size 토큰 이하의 문단 목록으로 나눕니다.
+    각 문단은 앞 문단의 마지막 문장들(overlap 토큰 이하)로 시작해 문맥이 끊기지 않도록 합니다.
+    size 이하인 정의(대부분의 용어)는 그대로 한 문단입니다.
+    """
+    text = (text or "").strip()
+    if not text or size <= 0 or count_tokens(text) <= size:
+        return [text] if text else []
+
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        cost = count_tokens(sentence)
+        if cost > size:
+            sentences.extend((piece, count_tokens(piece)) for piece in _split_long_sentence(sentence, size))
+        else:
+            sentences.append((sentence, cost))
+
+    passages = []
+    current = []
+    used = 0
+    for sentence, cost in sentences:
+        if current and used + cost > size:
+            passages.append(" ".join(s for s, _ in current))
+            # 겹침: 앞 문단 끝에서부터 overlap 토큰 이하의 문장을 이어 받음 (새 문장이 들어갈 자리는 남김)
+            carried = []
+            carried_tokens = 0
+            for prev, prev_cost in reversed(current):
+                if carried_tokens + prev_cost > min(overlap, size - cost):
+                    break
+                carried.insert(0, (prev, prev_cost))
+                carried_tokens += prev_cost
+            current, used = carried, carried_tokens
+        current.append((sentence, cost))
+        used += cost
+    if current:
+        passages.append(" ".join(s for s, _ in current))
+    return passages
+
+def term_passages(row: dict) -> list:
+    """용어 행 -> 색인할 문서 텍스트 목록 ("용어: 문단"). 문단마다 용어명을 붙여 임베딩이 어떤 용어의 설명인지 알 수 있게 합니다."""
+    return [f"{row['word']}: {passage}" for passage in split_passages(row["definition"])]
+
+def rank_passages(passages: list, query: str) -> list:
+    """질문과 겹치는 토큰(bigram)이 많은 문단부터 정렬합니다. (벡터 점수가 없는 키워드/사전 결과용)"""
+    query_tokens = set(tokenize(query))
+    scored = [(len(query_tokens & set(tokenize(passage))), -i, passage) for i, passage in enumerate(passages)]
+    return [passage for _, _, passage in sorted(scored, reverse=True)]
@@ -0,0 +1,141 @@
+import os
+import asyncio
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from utils.agent_utils import PROJECT_ROOT
+
+# 색인 시 사용할 임베딩 백엔드 (openai / onnx). 조회 시에는 컬렉션 메타데이터에 기록된 값을 따릅니다.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+
+# 로컬 ONNX 문장 임베딩 모델 디렉터리 (model.onnx + tokenizer.json)
+LOCAL_EMBEDDING_MODEL_DIR = os.getenv(
+    "LOCAL_EMBEDDING_MODEL_DIR", str(PROJECT_ROOT / "data" / "models" / "multilingual-e5-small")
+)
+# e5 계열 모델은 질문/문서 앞에 접두어를 붙여 학습되었으므로 동일하게 맞춥니다.
+LOCAL_QUERY_PREFIX = os.getenv("LOCAL_EMBEDDING_QUERY_PREFIX", "query: ")
+LOCAL_PASSAGE_PREFIX = os.getenv("LOCAL_EMBEDDING_PASSAGE_PREFIX", "passage: ")
+LOCAL_MAX_LENGTH = 512
+LOCAL_BATCH_SIZE = 32
+# 검색 인덱스에 넣을 차원 수 (0: 모델 원래 차원). text-embedding-3 계열은 Matryoshka 방식으로 학습되어
+# 앞쪽 N개 차원만 잘라 다시 정규화해도 검색 품질이 크게 떨어지지 않습니다. MySQL에는 항상 전체 차원을 저장합니다.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))
+
+# ---------------------------------------------------------
+# 로컬 ONNX 임베딩
+# ---------------------------------------------------------
+class OnnxEmbeddings(Embeddings):
+    """
+    onnxruntime(CPU) + tokenizers로 문장 임베딩을 계산합니다.
+    마지막 hidden state를 attention mask로 평균(mean pooling)한 뒤 L2 정규화합니다.
+    """
+
+    def __init__(self, model_dir: str = LOCAL_EMBEDDING_MODEL_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=LOCAL_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for i in range(0, len(texts), LOCAL_BATCH_SIZE):
+            encodings = self.tokenizer.encode_batch(texts[i:i + LOCAL_BATCH_SIZE])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend(pooled.astype(np.float32).tolist())
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed([LOCAL_PASSAGE_PREFIX + t for t in texts])
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([LOCAL_QUERY_PREFIX + text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+# ---------------------------------------------------------
+# 차원 축소 (Matryoshka)
+# ---------------------------------------------------------
+def truncate_vectors(vectors, dim: int) -> np.ndarray:
+    """앞쪽 dim개 차원만 남기고 L2 정규화. dim이 0이거나 원래 차원 이상이면 그대로 반환합니다."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if not dim or dim >= matrix.shape[-1]:
+        return matrix
+    truncated = matrix[..., :dim]
+    return truncated / np.clip(np.linalg.norm(truncated, axis=-1, keepdims=True), 1e-12, None)
+
+class TruncatedEmbeddings(Embeddings):
+    """질문 임베딩을 색인과 같은 차원으로 잘라 주는 래퍼"""
+
+    def __init__(self, inner: Embeddings, dim: int):
+        self.inner = inner
+        self.dim = dim
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return truncate_vectors(self.inner.embed_documents(texts), self.dim).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return truncate_vectors(self.inner.embed_query(text), self.dim).tolist()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return truncate_vectors(await self.inner.aembed_documents(texts), self.dim).tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return truncate_vectors(await self.inner.aembed_query(text), self.dim).tolist()
+
+# ---------------------------------------------------------
+# 백엔드 선택
+# ---------------------------------------------------------
+_backends = {}
+_backends_lock = threading.Lock()
+
+def backend_model_name(backend: str) -> str:
+    """컬렉션 메타데이터에 기록할 모델 식별자"""
+    if backend == "onnx":
+        return os.path.basename(os.path.normpath(LOCAL_EMBEDDING_MODEL_DIR))
+    return OPENAI_EMBEDDING_MODEL
+
+def get_embeddings(backend: str = EMBEDDING_BACKEND, model: str = None, max_retries: int = None) -> Embeddings:
+    """
+    backend/model 조합별 임베딩 객체를 한 번만 생성해 재사용합니다.
+    model이 주어지면 (컬렉션 메타데이터에 기록된 값) 그 모델을 사용합니다.
+    max_retries: OpenAI SDK 자체 재시도 횟수. 호출 측이 직접 재시도(Retry-After 백오프)하는 색인 작업은 0으로 넘깁니다.
+    """
+    model = model or backend_model_name(backend)
+    key = (backend, model, max_retries)
+    with _backends_lock:
+        if key not in _backends:
+            if backend == "onnx":
+                model_dir = LOCAL_EMBEDDING_MODEL_DIR
+                if os.path.basename(os.path.normpath(model_dir)) != model:
+                    model_dir = os.path.join(os.path.dirname(os.path.normpath(model_dir)), model)
+                _backends[key] = OnnxEmbeddings(model_dir)
+            elif backend == "openai":
+                options = {} if max_retries is None else {"max_retries": max_retries}
+                _backends[key] = OpenAIEmbeddings(model=model, **options)
+            else:
+                raise ValueError(f"지원하지 않는 임베딩 백엔드: {backend}")
+        return _backends[key]
@@ -0,0 +1,127 @@
+import os
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.cache_utils import CACHE_DIR, LRUCache, normalize_text, make_key
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+# 질문 임베딩을 디스크(SQLite, float32 BLOB)에도 저장해 재시작 후에도 재사용할지 여부
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() == "true"
+
+# ---------------------------------------------------------
+# 디스크 저장소 (float32 BLOB)
+# ---------------------------------------------------------
+class _EmbeddingStore:
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "query_embeddings.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def set(self, key, vector: np.ndarray):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                (key, vector.astype(np.float32).tobytes()),
+            )
+            self._conn.commit()
+
+# ---------------------------------------------------------
+# 질문 임베딩 캐시 래퍼
+# ---------------------------------------------------------
+class CachedEmbeddings(Embeddings):
+    """
+    Chroma에 넘기는 임베딩 함수를 감싸 질문(embed_query) 임베딩을 캐시합니다.
+    키: 정규화된 질문 텍스트 + 모델명. 문서 임베딩(embed_documents)은 색인용이므로 그대로 위임합니다.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, maxsize: int = EMBEDDING_CACHE_SIZE,
+                 persist: bool = EMBEDDING_CACHE_PERSIST):
+        self.inner = inner
+        self.model_name = model_name
+        self.memory = LRUCache(maxsize)
+        self.store = None
+        if persist:
+            try:
+                self.store = _EmbeddingStore()
+            except Exception as e:
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                print(f"[{now}] [Embedding Cache] 디스크 저장소를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _key(self, text: str) -> str:
+        return make_key(self.model_name, normalize_text(text))
+
+    def _get_cached(self, key):
+        vector = self.memory.get(key)
+        level = "memory_hits"
+        if vector is None and self.store is not None:
+            vector = self.store.get(key)
+            level = "disk_hits"
+            if vector is not None:
+                self.memory.set(key, vector)
+        with self._stats_lock:
+            self._stats[level if vector is not None else "misses"] += 1
+        return vector
+
+    def _put(self, key, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.memory.set(key, vector)
+        if self.store is not None:
+            self.store.set(key, vector)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get_cached(key)
+        if vector is not None:
+            return vector.tolist()
+        embedding = self.inner.embed_query(text)
+        self._put(key, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str) -> list[float]:
+        # SQLite 조회/저장은 동기 I/O이므로 (handle_sql 비동기 래퍼처럼) 스레드로 넘겨 공유 이벤트 루프를 막지 않음.
+        # 메모리 LRU만 거치는 경우는 그대로 처리
+        key = self._key(text)
+        if self.store is not None and self.memory.get(key) is None:
+            vector = await asyncio.to_thread(self._get_cached, key)
+        else:
+            vector = self._get_cached(key)
+        if vector is not None:
+            return vector.tolist()
+        embedding = await self.inner.aembed_query(text)
+        if self.store is not None:
+            await asyncio.to_thread(self._put, key, embedding)
+        else:
+            self._put(key, embedding)
+        return embedding
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        stats["memory_size"] = len(self.memory)
+        return stats
@@ -6,14 +6,30 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
+import argparse
+import numpy as np
 import chromadb
-from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 
 from utils.handle_sql import get_data
 from utils.agent_utils import print_log
+from utils.cache_utils import make_key
+from utils.embedding_cache import CachedEmbeddings
+from utils.embedding_backends import (
+    EMBEDDING_BACKEND, EMBEDDING_DIMENSIONS, get_embeddings, truncate_vectors, TruncatedEmbeddings,
+)
+from utils.vector_blob import (
+    get_embedding_meta, load_embedding_matrix, term_content_hash, get_chunk_hashes, load_chunk_matrix, chunk_content_hash,
+)
+from utils.chunking import term_passages
+from utils.lexical_index import reset_lexical_index
+from utils.term_dictionary import reset_term_dictionary
+from utils.term_graph import reset_term_graph
+from utils.mysql_to_vector import generate_and_save_embeddings
+from utils.vector_index import (
+    ChromaVectorIndex, NumpyVectorIndex, save_numpy_index, load_numpy_meta, quantize_int8, calibrate_threshold,
+)
 # .env 로드
 load_dotenv()
 
@@ -25,102 +41,323 @@ current_script_dir = os.path.dirname(current_script_path)
 PERSIST_DIRECTORY = os.path.join(current_script_dir, "..", "data", "financial_terms")
 PERSIST_DIRECTORY = os.path.normpath(PERSIST_DIRECTORY)
 
+# NumPy 정확 검색 인덱스 (export_chroma_to_numpy로 생성)
+NUMPY_INDEX_DIRECTORY = os.path.normpath(os.path.join(current_script_dir, "..", "data", "financial_terms_npy"))
+# 조회에 사용할 벡터 인덱스 (chroma / numpy). numpy 인덱스가 없으면 chroma로 대체합니다.
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "chroma").lower()
+
 print(f"📍 확정된 저장 경로: {PERSIST_DIRECTORY}") # 확인용 출력
 
 vectorstore = None
+query_embeddings = None
+similarity_threshold = None
 COLLECTION_NAME = "financial_terms"
-BATCH_SIZE = 100
+# 임베딩 계산 없이 저장된 벡터만 넣으므로 큰 배치로 upsert
+BATCH_SIZE = 1000
+HASH_LENGTH = 16
+# 메타데이터에 백엔드 정보가 없는 (이전 버전에서 만든) 컬렉션은 OpenAI large 모델로 색인된 것으로 간주
+LEGACY_BACKEND = ("openai", "text-embedding-3-large")
+# 전체 차원 float32 벡터 기준 L2 거리 임계값. 차원 축소/양자화한 인덱스는 색인 시 보정한 값을 메타데이터에 기록해 사용합니다.
+SIMILARITY_THRESHOLD = 0.6
 
 # ==========================================
 # 2. ChromaDB 초기화
 # ==========================================
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    model_name="text-embedding-3-large"
-)
 client = chromadb.PersistentClient(path=PERSIST_DIRECTORY)
-collection = client.get_or_create_collection(
-    name=COLLECTION_NAME,
-    embedding_function=openai_ef
-)
 
-def sync_mysql_to_chroma():
+def get_collection_backend(collection) -> tuple[str, str]:
+    """컬렉션 메타데이터에 기록된 (임베딩 백엔드, 모델명)"""
+    metadata = collection.metadata or {}
+    if "embedding_backend" not in metadata:
+        return LEGACY_BACKEND
+    return metadata["embedding_backend"], metadata["embedding_model"]
+
+def _prepare_collection(backend: str, model: str, dim: int):
+    """
+    색인할 백엔드/모델/차원과 기존 컬렉션이 다르면 (벡터 공간이 달라지므로) 컬렉션을 새로 만듭니다.
+    임베딩은 직접 계산해 넣으므로 컬렉션에는 임베딩 함수를 등록하지 않습니다.
+    """
+    existing = {c.name for c in client.list_collections()}
+    if COLLECTION_NAME in existing:
+        collection = client.get_collection(COLLECTION_NAME)
+        current = (*get_collection_backend(collection), (collection.metadata or {}).get("embedding_dim"))
+        if current == (backend, model, dim):
+            return collection
+        print(f"   - 임베딩 설정 변경 {current} -> {(backend, model, dim)}: 컬렉션 재생성")
+        client.delete_collection(COLLECTION_NAME)
+
+    return client.create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=None,
+        metadata={"hnsw:space": "l2", "embedding_backend": backend, "embedding_model": model},
+    )
+
+def _index_metadata(collection) -> dict:
+    # hnsw:space는 생성 후 변경할 수 없으므로 modify 대상에서 제외
+    return {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+
+def _record_collection_metadata(collection, backend: str, model: str, dim: int, source_dim: int, threshold: float):
+    metadata = _index_metadata(collection)
+    metadata.update({
+        "embedding_backend": backend, "embedding_model": model,
+        "embedding_dim": dim, "source_dim": source_dim, "similarity_threshold": threshold,
+    })
+    collection.modify(metadata=metadata)
+
+def _calibrated_threshold(dim: int) -> float:
+    """전체 차원 기준 SIMILARITY_THRESHOLD를 dim 차원 인덱스의 거리 분포에 맞춰 보정합니다. (MySQL 벡터 사용)"""
+    _, full = load_embedding_matrix()
+    if dim >= full.shape[1]:
+        return SIMILARITY_THRESHOLD
+    return calibrate_threshold(full, truncate_vectors(full, dim), SIMILARITY_THRESHOLD)
+
+def _content_hash(document: str, metadata: dict) -> str:
+    """행 내용 해시. 색인되는 문서/메타데이터가 바뀐 행만 다시 반영합니다."""
+    return make_key(document, *(f"{k}={metadata[k]}" for k in sorted(metadata)))[:HASH_LENGTH]
+
+def _existing_hashes(collection) -> dict:
+    """컬렉션에 저장된 {id: content_hash}. 해시가 없는 (이전 버전) 문서는 빈 문자열로 두어 갱신 대상이 됩니다."""
+    existing = collection.get(include=["metadatas"])
+    return {
+        doc_id: (metadata or {}).get("content_hash", "")
+        for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+
+def _term_documents(row: dict) -> list:
+    """
+    용어 행 -> [(문서 id, 문서 텍스트, 메타데이터, 문단 번호 또는 None)].
+    긴 정의는 문단(chunk)마다 문서를 만들고 original_id/word에 부모 용어를 남겨, 검색 후 부모 용어 기준으로 합칩니다.
+    """
+    passages = term_passages(row)
+    if len(passages) <= 1:
+        return [(str(row['id']), f"{row['word']}: {row['definition']}", {"original_id": row['id'], "word": row['word']}, None)]
+    return [
+        (f"{row['id']}#{chunk_index}", content,
+         {"original_id": row['id'], "word": row['word'], "chunk_index": chunk_index, "chunk_count": len(passages)}, chunk_index)
+        for chunk_index, content in enumerate(passages)
+    ]
+
+def _upsert_documents(collection, pending: dict, keys: list, matrix, dim: int, label: str) -> int:
+    """load_*_matrix 결과(keys, matrix) 순서대로 pending의 문서를 upsert"""
+    if not keys:
+        return 0
+    matrix = truncate_vectors(matrix, dim)
+    total_count = len(keys)
+    for i in range(0, total_count, BATCH_SIZE):
+        batch = [pending[key] for key in keys[i : i + BATCH_SIZE]]
+        collection.upsert(
+            ids=[doc_id for doc_id, _, _ in batch],
+            documents=[content for _, content, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+            embeddings=matrix[i : i + BATCH_SIZE]
+        )
+        current_progress = min(i + BATCH_SIZE, total_count)
+        print(f"   - Progress ({label}): {current_progress} / {total_count} 완료")
+    return total_count
+
+def sync_mysql_to_chroma(backend: str = EMBEDDING_BACKEND, full: bool = False, embed_missing: bool = True) -> dict:
+    """
+    MySQL terms -> ChromaDB 증분 동기화.
+    임베딩은 utils/mysql_to_vector.py가 한 번만 계산해 MySQL(embedding_blob)에 저장하고,
+    여기서는 저장된 벡터를 그대로 컬렉션에 넣습니다. (재임베딩 없음)
+    CHUNK_TOKENS를 넘는 정의는 term_chunks의 문단 벡터로 문단마다 문서를 만듭니다.
+    행별 content_hash를 문서 메타데이터에 함께 저장해 두고, 새로 생기거나 내용이 바뀐 행만 갱신합니다.
+    MySQL에서 삭제된 행은 컬렉션에서도 삭제합니다. full=True이면 전체를 다시 넣습니다.
+    반환값: {"embedded": n, "upserted": n, "skipped": n, "deleted": n, "missing": n}
+    """
     print(f"저장 경로: {os.path.abspath(PERSIST_DIRECTORY)}")
-    print("MySQL 데이터 조회 시작...")
+    stats = {"embedded": 0, "upserted": 0, "skipped": 0, "deleted": 0, "missing": 0}
 
     try:
-        sql = "SELECT id, word, definition FROM terms WHERE definition IS NOT NULL"
+        # 1) MySQL에 벡터가 없거나 정의가 바뀐 행만 임베딩
+        if embed_missing:
+            stats["embedded"] = generate_and_save_embeddings(backend)
+
+        meta = get_embedding_meta()
+        if meta is None:
+            print("MySQL에 저장된 임베딩이 없습니다. (utils/mysql_to_vector.py 실행 필요)")
+            return stats
+        backend, model = meta['backend'], meta['model']
+        # 인덱스 차원: EMBEDDING_DIMENSIONS로 줄이되 원래 차원보다 클 수는 없음
+        source_dim = meta['dim']
+        dim = EMBEDDING_DIMENSIONS if 0 < EMBEDDING_DIMENSIONS < source_dim else source_dim
+
+        print("MySQL 데이터 조회 시작...")
+        sql = "SELECT id, word, definition, embedding_hash FROM terms WHERE definition IS NOT NULL"
         rows = get_data(sql)
 
         if not rows:
             print("저장할 데이터가 없습니다.")
-            return
+            return stats
 
         print(f"총 {len(rows)}개의 데이터를 가져왔습니다.")
 
-        ids_list = []
-        documents_list = []
-        metadatas_list = []
+        collection = _prepare_collection(backend, model, dim)
+        existing = {} if full else _existing_hashes(collection)
+        chunk_hashes = get_chunk_hashes()
+
+        pending_terms = {}
+        pending_chunks = {}
+        current_ids = set()
 
         for row in rows:
-            doc_id = str(row['id'])
-            content = f"{row['word']}: {row['definition']}"
-            metadata = {
-                "original_id": row['id'],
-                "word": row['word']
-            }
-
-            ids_list.append(doc_id)
-            documents_list.append(content)
-            metadatas_list.append(metadata)
-
-        print("💾 ChromaDB 저장(Upsert) 시작...")
-        
-        total_count = len(ids_list)
-        
-        for i in range(0, total_count, BATCH_SIZE):
-            batch_ids = ids_list[i : i + BATCH_SIZE]
-            batch_docs = documents_list[i : i + BATCH_SIZE]
-            batch_metas = metadatas_list[i : i + BATCH_SIZE]
-            collection.upsert(
-                ids=batch_ids,
-                documents=batch_docs,
-                metadatas=batch_metas
-            )
-            current_progress = min(i + BATCH_SIZE, total_count)
-            print(f"   - Progress: {current_progress} / {total_count} 완료")
-
-        print("모든 데이터 동기화 완료!")
+            for doc_id, content, metadata, chunk_index in _term_documents(row):
+                metadata["content_hash"] = _content_hash(content, metadata)
+                current_ids.add(doc_id)
+
+                if existing.get(doc_id) == metadata["content_hash"]:
+                    stats["skipped"] += 1
+                    continue
+                # 저장된 벡터가 현재 정의(문단)로 만든 것이 아니면 (임베딩 실패 등) 이번에는 넣지 않음
+                if chunk_index is None:
+                    if row['embedding_hash'] != term_content_hash(row):
+                        stats["missing"] += 1
+                        continue
+                    pending_terms[row['id']] = (doc_id, content, metadata)
+                else:
+                    if chunk_hashes.get((row['id'], chunk_index)) != chunk_content_hash(content):
+                        stats["missing"] += 1
+                        continue
+                    pending_chunks[(row['id'], chunk_index)] = (doc_id, content, metadata)
+
+        # MySQL에서 삭제된 행 정리
+        indexed_ids = set(_existing_hashes(collection)) if full else set(existing)
+        stale_ids = sorted(indexed_ids - current_ids)
+        for i in range(0, len(stale_ids), BATCH_SIZE):
+            collection.delete(ids=stale_ids[i : i + BATCH_SIZE])
+        stats["deleted"] = len(stale_ids)
+
+        # 2) 저장된 벡터를 (용어 / 문단별로) 한 번의 쿼리로 읽어 그대로 upsert
+        print(f"💾 ChromaDB 저장(Upsert) 시작... (임베딩: {backend} / {model} / {dim}차원, "
+              f"대상 {len(pending_terms)}개 + 문단 {len(pending_chunks)}개 / 변경 없음 {stats['skipped']}개)")
+        stats["upserted"] += _upsert_documents(collection, pending_terms, *load_embedding_matrix(list(pending_terms)), dim, "용어")
+        stats["upserted"] += _upsert_documents(collection, pending_chunks, *load_chunk_matrix(list(pending_chunks)), dim, "문단")
+
+        # 색인 내용이 바뀌었거나 아직 보정값이 없으면 이 설정의 거리 임계값을 다시 계산
+        threshold = (collection.metadata or {}).get("similarity_threshold")
+        if threshold is None or stats["upserted"] or stats["deleted"]:
+            threshold = _calibrated_threshold(dim)
+        _record_collection_metadata(collection, backend, model, dim, source_dim, threshold)
+        print(f"   - 거리 임계값: {threshold:.4f} ({dim}/{source_dim}차원)")
+        print(f"모든 데이터 동기화 완료! (임베딩 {stats['embedded']}개 / 반영 {stats['upserted']}개 / 건너뜀 {stats['skipped']}개 / "
+              f"삭제 {stats['deleted']}개 / 벡터 없음 {stats['missing']}개)")
+
+        # 이 프로세스에서 terms로 만들어 둔 메모리 색인은 다음 검색 때 새 데이터로 다시 만듦
+        reset_lexical_index()
+        reset_term_dictionary()
+        reset_term_graph()
+
+        # NumPy 인덱스를 쓰고 있다면 같은 형식(float32/int8)으로 다시 내보내 컬렉션과 맞춥니다.
+        numpy_meta = load_numpy_meta(NUMPY_INDEX_DIRECTORY)
+        if numpy_meta is not None and (stats["upserted"] or stats["deleted"]):
+            export_chroma_to_numpy(quantize=numpy_meta.get("dtype") == "int8")
 
     except Exception as e:
         print(f"오류 발생: {e}")
 
+    return stats
+
+def export_chroma_to_numpy(quantize: bool = False):
+    """
+    Chroma 컬렉션에 저장된 임베딩을 그대로 (재임베딩 없이) NumPy 인덱스로 내보냅니다.
+    quantize=True이면 int8로 양자화해 저장합니다. (메모리/디스크 약 1/4)
+    """
+    collection = client.get_collection(COLLECTION_NAME)
+    data = collection.get(include=["documents", "metadatas", "embeddings"])
+    if not data["ids"]:
+        print("내보낼 데이터가 없습니다.")
+        return
+
+    backend, model = get_collection_backend(collection)
+    meta = {**_index_metadata(collection), "embedding_backend": backend, "embedding_model": model}
+    threshold = meta.get("similarity_threshold", SIMILARITY_THRESHOLD)
+    if quantize:
+        # int8 복원 오차만큼 거리 분포가 달라지므로 float32 인덱스 기준 임계값을 다시 보정
+        matrix = np.asarray(data["embeddings"], dtype=np.float32)
+        quantized, scales = quantize_int8(matrix)
+        meta["similarity_threshold"] = calibrate_threshold(matrix, quantized.astype(np.float32) * scales[:, None], threshold)
+    save_numpy_index(
+        NUMPY_INDEX_DIRECTORY,
+        ids=data["ids"],
+        documents=data["documents"],
+        metadatas=data["metadatas"],
+        vectors=data["embeddings"],
+        meta=meta,
+        quantize=quantize,
+    )
+    print(f"NumPy 인덱스 저장 완료: {len(data['ids'])}개 ({'int8' if quantize else 'float32'}) -> {NUMPY_INDEX_DIRECTORY}")
+
+def _query_embedder(meta: dict):
+    """
+    색인 때와 같은 백엔드/모델로 질문을 임베딩하고, 캐시를 거쳐 반복 계산을 생략합니다.
+    차원을 줄인 인덱스라면 (전체 차원으로 캐시한 뒤) 같은 차원으로 잘라 줍니다.
+    """
+    global query_embeddings, similarity_threshold
+
+    backend, model = meta.get("embedding_backend", LEGACY_BACKEND[0]), meta.get("embedding_model", LEGACY_BACKEND[1])
+    query_embeddings = CachedEmbeddings(get_embeddings(backend, model), model_name=f"{backend}:{model}")
+    similarity_threshold = meta.get("similarity_threshold", SIMILARITY_THRESHOLD)
+    dim, source_dim = meta.get("embedding_dim"), meta.get("source_dim")
+    if dim and source_dim and dim < source_dim:
+        return TruncatedEmbeddings(query_embeddings, dim)
+    return query_embeddings
+
+def _load_index(kind: str):
+    """(인덱스, 백엔드, 모델) 반환"""
+    if kind == "numpy":
+        meta = load_numpy_meta(NUMPY_INDEX_DIRECTORY)
+        if meta is not None:
+            embedder = _query_embedder(meta)
+            return NumpyVectorIndex(NUMPY_INDEX_DIRECTORY, embedder), meta["embedding_backend"], meta["embedding_model"]
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{now}] NumPy 인덱스가 없어 ChromaDB를 사용합니다. (--export-numpy로 생성)")
+
+    collection = client.get_or_create_collection(name=COLLECTION_NAME, metadata={"hnsw:space": "l2"})
+    backend, model = get_collection_backend(collection)
+    embedder = _query_embedder({**_index_metadata(collection), "embedding_backend": backend, "embedding_model": model})
+    chroma = Chroma(
+        client=client,
+        embedding_function=embedder,
+        collection_name=COLLECTION_NAME,
+    )
+    return ChromaVectorIndex(chroma), backend, model
+
+def get_similarity_threshold() -> float:
+    """현재 인덱스 설정(차원/양자화)에 맞춘 L2 거리 임계값"""
+    load_knowledge_base()
+    return similarity_threshold if similarity_threshold is not None else SIMILARITY_THRESHOLD
+
+def get_embedding_cache_stats() -> dict:
+    return query_embeddings.stats() if query_embeddings is not None else {}
+
 def load_knowledge_base():
-    """ChromaDB 연결 설정"""
+    """벡터 인덱스 연결 설정 (VECTOR_INDEX: chroma / numpy)"""
     global vectorstore
     
     if vectorstore is not None:
         return vectorstore
-    CHROMA_DB_PATH = "data/financial_terms"
-    COLLECTION_NAME = "financial_terms"
     
-    t0 = print_log("RAG ChromaDB 연결", "start")
+    t0 = print_log("RAG 벡터 인덱스 연결", "start")
     try:
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-        vectorstore = Chroma(
-            persist_directory=str(CHROMA_DB_PATH),
-            embedding_function=embeddings,
-            collection_name=COLLECTION_NAME,
-            collection_metadata={"hnsw:space": "l2"},
-        )
-        print_log("RAG ChromaDB 연결", "end", t0, extra_info=f"Metric: L2, 경로: {CHROMA_DB_PATH}")
+        vectorstore, backend, model = _load_index(VECTOR_INDEX)
+        print_log("RAG 벡터 인덱스 연결", "end", t0, extra_info=f"Metric: L2, 인덱스: {type(vectorstore).__name__}, 임베딩: {backend} / {model}, 임계값: {similarity_threshold:.4f}")
     except Exception as e:
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        print(f"[{now}] ❌ ChromaDB 연결 오류: {e}")
+        print(f"[{now}] ❌ 벡터 인덱스 연결 오류: {e}")
         vectorstore = None
 
     return vectorstore
 
 
 if __name__ == "__main__":
-    sync_mysql_to_chroma()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MySQL terms -> ChromaDB 색인")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=["openai", "onnx"], help="MySQL 벡터가 없을 때 임베딩할 백엔드")
+    parser.add_argument("--no-embed", action="store_true", help="임베딩 없이 MySQL에 저장된 벡터로만 동기화")
+    parser.add_argument("--export-numpy", action="store_true", help="색인 대신 기존 컬렉션을 NumPy 인덱스로 내보내기")
+    parser.add_argument("--int8", action="store_true", help="NumPy 인덱스를 int8로 양자화해 저장")
+    parser.add_argument("--full", action="store_true", help="변경 여부와 관계없이 전체 다시 반영")
+    args = parser.parse_args()
+    if args.export_numpy:
+        export_chroma_to_numpy(quantize=args.int8)
+    else:
+        sync_mysql_to_chroma(args.backend, full=args.full, embed_missing=not args.no_embed)
\ No newline at end of file
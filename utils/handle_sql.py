@@ -1,5 +1,8 @@
 import pymysql
 import os
+import re
+import asyncio
+import threading
 from dotenv import load_dotenv
 from dbutils.pooled_db import PooledDB
 
@@ -23,6 +26,9 @@ POOL = PooledDB(
 def _get_connection():
     return POOL.connection()
 
+# 테이블/뷰 구조를 바꾸는 문장. 실행되면 스키마 캐시를 비웁니다.
+_DDL_PATTERN = re.compile(r"^\s*(CREATE|ALTER|DROP|RENAME)\b", re.IGNORECASE)
+
 def execute_query(query, args=None):
     """INSERT, UPDATE, DELETE 전용 (단건): 커밋을 수행함"""
     conn = _get_connection()
@@ -30,12 +36,15 @@ def execute_query(query, args=None):
         with conn.cursor() as cursor:
             cursor.execute(query, args)
             conn.commit()
-            return cursor.rowcount
+            rowcount = cursor.rowcount
     except Exception as e:
         conn.rollback()
         raise e
     finally:
         conn.close()
+    if _DDL_PATTERN.match(query):
+        invalidate_schema_cache()
+    return rowcount
 
 def execute_many(query, args_list):
     """대량 INSERT 전용: 리스트 데이터를 한 번에 넣음"""
@@ -89,37 +98,70 @@ def run_db_query(query):
     except Exception as e:
         return f"SQL 실행 오류: {e}"
 
+######## 스키마 캐시
+# SQL 에이전트 프롬프트에 넣을 스키마 텍스트를 뷰 이름 조합별로 프로세스 안에 보관합니다.
+# 뷰 구조는 create_user_views 등 DDL이 실행될 때만 바뀌므로, execute_query가 DDL을 실행하면 비웁니다.
+# (utils/init_db.py처럼 별도 프로세스에서 테이블을 다시 만든 경우에는 앱을 재시작하거나 invalidate_schema_cache()를 호출)
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+# 무효화 횟수. 조회 도중 무효화되면 (이전 구조로 만든) 결과를 캐시에 넣지 않습니다.
+_schema_generation = 0
+
+def invalidate_schema_cache():
+    global _schema_generation
+    with _schema_cache_lock:
+        _schema_cache.clear()
+        _schema_generation += 1
+
 ######## 자주 쓰는 쿼리 정의
 def get_schema_info(allowed_views: list):
+    """allowed_views의 컬럼 정보를 프롬프트용 텍스트로 반환합니다. 같은 뷰 조합은 캐시된 텍스트를 그대로 사용합니다."""
+    if not allowed_views:
+        return "No accessible tables provided."
+    cache_key = tuple(sorted(set(allowed_views)))
+    with _schema_cache_lock:
+        cached = _schema_cache.get(cache_key)
+        generation = _schema_generation
+    if cached is not None:
+        return cached
+
     try:
-        if not allowed_views:
-            return "No accessible tables provided."
-            
-        placeholders = ','.join(['%s'] * len(allowed_views))
-        sql = f"""
-            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE 
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_NAME IN ({placeholders})
-            AND TABLE_SCHEMA = DATABASE()
-            ORDER BY TABLE_NAME, ORDINAL_POSITION
-        """
-        
-        results = get_data(sql, allowed_views)
-        
-        schema_dict = {}
-        for row in results:
-            t_name = row['TABLE_NAME']
-            if t_name not in schema_dict:
-                schema_dict[t_name] = []
-            schema_dict[t_name].append(f"- {row['COLUMN_NAME']} ({row['DATA_TYPE']})")
-            
-        schema_text = ""
-        for t_name, cols in schema_dict.items():
-            schema_text += f"\n[Table/View: {t_name}]\n" + "\n".join(cols) + "\n"
-            
-        return schema_text.strip()
+        schema_text = _load_schema_info(list(cache_key))
     except Exception as e:
+        # 조회 실패 메시지는 캐시하지 않음
         return f"스키마 조회 실패: {e}"
+    # 뷰가 아직 없어 빈 결과면 캐시하지 않음
+    if schema_text:
+        with _schema_cache_lock:
+            if generation == _schema_generation:
+                _schema_cache[cache_key] = schema_text
+    return schema_text
+
+def _load_schema_info(allowed_views: list) -> str:
+    """INFORMATION_SCHEMA에서 컬럼 정보를 읽어 프롬프트용 스키마 텍스트를 만듭니다."""
+    placeholders = ','.join(['%s'] * len(allowed_views))
+    sql = f"""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE 
+        FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_NAME IN ({placeholders})
+        AND TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+    
+    results = get_data(sql, allowed_views)
+    
+    schema_dict = {}
+    for row in results:
+        t_name = row['TABLE_NAME']
+        if t_name not in schema_dict:
+            schema_dict[t_name] = []
+        schema_dict[t_name].append(f"- {row['COLUMN_NAME']} ({row['DATA_TYPE']})")
+        
+    schema_text = ""
+    for t_name, cols in schema_dict.items():
+        schema_text += f"\n[Table/View: {t_name}]\n" + "\n".join(cols) + "\n"
+        
+    return schema_text.strip()
 
 def get_member_id(username):
     query = f"SELECT user_id FROM members WHERE username = '{username}'"
@@ -191,6 +233,20 @@ def insert_ledger(
     """
     execute_query(query)
 
+def get_all_terms():
+    """금융 용어 사전 전체 (로컬 검색 인덱스 구축용)"""
+    query = "SELECT id, word, definition FROM terms WHERE definition IS NOT NULL"
+    return get_data(query)
+
+def get_term_relations():
+    """연관검색어 인접 목록 (term_id -> related_id). 테이블이 없으면 (PDF 재적재 전) 빈 목록"""
+    try:
+        return get_data("SELECT term_id, related_id FROM term_relations ORDER BY term_id, position")
+    except Exception as e:
+        if "doesn't exist" in str(e) or "1146" in str(e):
+            return []
+        raise
+
 
 ##### View 생성
 def create_user_views(username: str):
@@ -234,6 +290,7 @@ def create_user_views(username: str):
         WHERE a.user_id = {user_id}
     """
 
+    # CREATE OR REPLACE VIEW는 DDL이므로 execute_query가 스키마 캐시를 비움
     execute_query(profile_view_sql)
     execute_query(accounts_view_sql)
     execute_query(transactions_view_sql)
@@ -243,3 +300,29 @@ def create_user_views(username: str):
         "current_user_accounts",
         "current_user_transactions"
     ]
+
+
+##### 비동기 래퍼
+# PyMySQL은 동기 드라이버이므로, 비동기 경로에서는 DB 호출을 스레드 풀로 넘겨 이벤트 루프를 막지 않도록 합니다.
+def _to_async(func):
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    wrapper.__name__ = f"a{func.__name__}"
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+aexecute_query = _to_async(execute_query)
+aexecute_many = _to_async(execute_many)
+aget_data = _to_async(get_data)
+arun_db_query = _to_async(run_db_query)
+aget_schema_info = _to_async(get_schema_info)
+aget_member_id = _to_async(get_member_id)
+aget_contact = _to_async(get_contact)
+aget_all_contacts = _to_async(get_all_contacts)
+aget_primary_account = _to_async(get_primary_account)
+aget_user_password = _to_async(get_user_password)
+aget_exchange_rate = _to_async(get_exchange_rate)
+aupdate_balance = _to_async(update_balance)
+ainsert_ledger = _to_async(insert_ledger)
+aget_all_terms = _to_async(get_all_terms)
+aget_term_relations = _to_async(get_term_relations)
@@ -0,0 +1,160 @@
+import re
+import csv
+import math
+import threading
+from collections import Counter
+from pathlib import Path
+
+CURRENT_DIR = Path(__file__).resolve().parent
+ROUTER_PROMPT_FILE = CURRENT_DIR.parent / "rag_agent" / "prompt" / "main" / "main_03_router.md"
+EXAMPLES_FILE = CURRENT_DIR.parent / "data" / "router_examples.csv"
+
+CATEGORIES = ["DATABASE", "KNOWLEDGE", "TRANSFER", "GENERAL"]
+
+NGRAM_RANGE = (1, 3)
+KEYWORD_WEIGHT = 0.25
+# 로컬 분류 결과를 채택하기 위한 최소 점수 / 1·2위 점수 차
+MIN_SCORE = 0.2
+MIN_MARGIN = 0.12
+
+_router = None
+_router_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "llm_fallback": 0}
+
+# ---------------------------------------------------------
+# 학습 데이터 로딩
+# ---------------------------------------------------------
+def load_router_keywords(prompt_file: Path = ROUTER_PROMPT_FILE) -> dict:
+    """main_03_router.md의 '### N. CATEGORY' 섹션별 **Keywords** 목록을 파싱합니다."""
+    keywords = {cat: [] for cat in CATEGORIES}
+    try:
+        text = prompt_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return keywords
+
+    current = None
+    for line in text.splitlines():
+        header = re.match(r"^###\s*\d+\.\s*([A-Z]+)", line.strip())
+        if header:
+            current = header.group(1) if header.group(1) in keywords else None
+            continue
+        if current and "**Keywords**" in line:
+            keywords[current].extend(re.findall(r'"([^"]+)"', line))
+    return keywords
+
+def load_router_examples(examples_file: Path = EXAMPLES_FILE) -> list:
+    """(category, question) 형태의 라벨링된 예시 목록"""
+    try:
+        with open(examples_file, "r", encoding="utf-8-sig") as f:
+            return [(row["category"].strip(), row["question"].strip()) for row in csv.DictReader(f)]
+    except FileNotFoundError:
+        return []
+
+# ---------------------------------------------------------
+# 문자 n-gram 특징 추출
+# ---------------------------------------------------------
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def _char_ngrams(text: str) -> Counter:
+    text = f" {_normalize(text)} "
+    grams = Counter()
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram.strip():
+                grams[gram] += 1
+    return grams
+
+def _l2_normalize(vec: dict) -> dict:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {k: v / norm for k, v in vec.items()} if norm else vec
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+# ---------------------------------------------------------
+# Nearest-centroid 분류기
+# ---------------------------------------------------------
+class IntentRouter:
+    """
+    문자 n-gram TF-IDF 중심점(Nearest-centroid) + 라우터 프롬프트 키워드 기반 로컬 의도 분류기.
+    임베딩 API 호출 없이 동작하며, 확신도가 낮을 때만 LLM 라우터로 넘깁니다.
+    """
+
+    def __init__(self, examples: list, keywords: dict):
+        self.keywords = {
+            cat: [_normalize(kw).replace(" ", "") for kw in kws if _normalize(kw)]
+            for cat, kws in keywords.items()
+        }
+
+        documents = [(cat, _char_ngrams(text)) for cat, text in examples]
+        documents += [(cat, _char_ngrams(kw)) for cat, kws in keywords.items() for kw in kws]
+
+        doc_freq = Counter()
+        for _, grams in documents:
+            doc_freq.update(grams.keys())
+        total_docs = len(documents) or 1
+        self.idf = {gram: math.log((1 + total_docs) / (1 + df)) + 1.0 for gram, df in doc_freq.items()}
+
+        sums = {cat: Counter() for cat in CATEGORIES}
+        for cat, grams in documents:
+            if cat in sums:
+                for gram, weight in self._vectorize(grams).items():
+                    sums[cat][gram] += weight
+        self.centroids = {cat: _l2_normalize(dict(vec)) for cat, vec in sums.items() if vec}
+
+    def _vectorize(self, grams: Counter) -> dict:
+        vec = {gram: (1 + math.log(tf)) * self.idf.get(gram, 1.0) for gram, tf in grams.items()}
+        return _l2_normalize(vec)
+
+    def scores(self, question: str) -> dict:
+        query_vec = self._vectorize(_char_ngrams(question))
+        compact = _normalize(question).replace(" ", "")
+        result = {}
+        for cat in CATEGORIES:
+            score = _cosine(query_vec, self.centroids[cat]) if cat in self.centroids else 0.0
+            if any(kw and kw in compact for kw in self.keywords.get(cat, [])):
+                score += KEYWORD_WEIGHT
+            result[cat] = score
+        return result
+
+    def classify(self, question: str) -> tuple[str, float, bool]:
+        """
+        반환값: (카테고리, 1·2위 점수 차, 확신 여부)
+        확신 여부가 False이면 호출 측에서 LLM 라우터로 폴백합니다.
+        """
+        ranked = sorted(self.scores(question).items(), key=lambda x: x[1], reverse=True)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        margin = best_score - second_score
+        confident = best_score >= MIN_SCORE and margin >= MIN_MARGIN
+        return best, margin, confident
+
+def get_intent_router() -> IntentRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter(load_router_examples(), load_router_keywords())
+    return _router
+
+# ---------------------------------------------------------
+# 로컬 처리 / LLM 폴백 통계
+# ---------------------------------------------------------
+def record_route(local: bool):
+    with _stats_lock:
+        _stats["local" if local else "llm_fallback"] += 1
+
+def get_router_stats() -> dict:
+    with _stats_lock:
+        local, fallback = _stats["local"], _stats["llm_fallback"]
+    total = local + fallback
+    return {
+        "local": local,
+        "llm_fallback": fallback,
+        "local_rate": local / total if total else 0.0,
+    }
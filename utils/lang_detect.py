@@ -0,0 +1,142 @@
+import re
+import threading
+
+# ---------------------------------------------------------
+# 문자 범위 / 불용어 정의
+# ---------------------------------------------------------
+HANGUL_RANGES = [
+    (0xAC00, 0xD7A3),  # 한글 음절
+    (0x1100, 0x11FF),  # 한글 자모
+    (0x3130, 0x318F),  # 호환용 한글 자모
+]
+# 베트남어 고유 문자 (đ, ơ, ư, ă 및 Latin Extended Additional 성조 문자)
+VIETNAMESE_CHARS = set("đĐơƠưƯăĂ")
+VIETNAMESE_RANGE = (0x1EA0, 0x1EF9)
+
+INDONESIAN_STOPWORDS = {
+    "yang", "dan", "di", "ke", "dari", "saya", "aku", "untuk", "dengan", "ini", "itu",
+    "tidak", "apa", "berapa", "tolong", "kirim", "uang", "bisa", "akan", "sudah",
+    "saldo", "rekening", "ada", "kepada", "bagaimana", "mau", "ingin", "adalah",
+}
+ENGLISH_STOPWORDS = {
+    "the", "a", "an", "is", "are", "what", "how", "my", "me", "to", "of", "and",
+    "please", "send", "much", "does", "do", "can", "you", "i", "in", "for", "it",
+}
+
+# 한국어 입력 중 이전 대화 맥락이 필요한 표현 (지시어, 상대 참조)
+CONTEXT_MARKERS = [
+    "그거", "그것", "이거", "이것", "저거", "저것", "그건", "그게", "이건", "이게",
+    "그 사람", "그분", "방금", "아까", "앞에서", "위에서", "거기", "그중", "그 중",
+    "첫 번째", "두 번째", "세 번째", "마지막 거", "그럼", "그러면", "그런데", "왜 그런",
+]
+QUESTION_ENDINGS = ("야", "요", "니", "까", "지", "?")
+
+# 한국어로 판정하기 위한 최소 한글 토큰 비율
+KOREAN_CONFIDENCE_THRESHOLD = 0.8
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+# ---------------------------------------------------------
+# 문자 판별 헬퍼
+# ---------------------------------------------------------
+def _is_hangul(ch: str) -> bool:
+    code = ord(ch)
+    return any(start <= code <= end for start, end in HANGUL_RANGES)
+
+def _is_vietnamese(ch: str) -> bool:
+    return ch in VIETNAMESE_CHARS or VIETNAMESE_RANGE[0] <= ord(ch) <= VIETNAMESE_RANGE[1]
+
+def _is_latin(ch: str) -> bool:
+    return ch.isascii() and ch.isalpha() or ("À" <= ch <= "ɏ") or _is_vietnamese(ch)
+
+def _is_neutral_latin(token: str) -> bool:
+    """'DSR', 'ETF', 'KRW' 처럼 한국어 문장에 그대로 섞여 쓰이는 약어는 언어 판정에서 제외"""
+    return token.isascii() and token.isupper() and len(token) <= 6
+
+# ---------------------------------------------------------
+# 언어 감지
+# ---------------------------------------------------------
+def detect_language(text: str) -> tuple[str, float]:
+    """
+    스크립트/문자 범위 기반 결정적 언어 감지.
+    반환값: (언어명, 신뢰도 0~1). 언어명은 번역 프롬프트의 source_language 표기와 동일하게 맞춥니다.
+    """
+    tokens = _WORD_PATTERN.findall(text or "")
+    if not tokens:
+        # 숫자/기호만 있는 입력은 번역할 내용이 없으므로 그대로 통과
+        return "Korean", 1.0
+
+    hangul_tokens = 0
+    latin_tokens = []
+    other_tokens = 0
+    for token in tokens:
+        if any(_is_hangul(ch) for ch in token):
+            hangul_tokens += 1
+        elif all(_is_latin(ch) for ch in token):
+            if not _is_neutral_latin(token):
+                latin_tokens.append(token)
+        else:
+            other_tokens += 1
+
+    counted = hangul_tokens + len(latin_tokens) + other_tokens
+    if counted == 0:
+        # 약어만 있는 입력 (예: "DSR?")
+        return "Korean", 0.5
+
+    hangul_ratio = hangul_tokens / counted
+    if hangul_tokens and hangul_ratio >= KOREAN_CONFIDENCE_THRESHOLD:
+        return "Korean", hangul_ratio
+
+    if hangul_tokens:
+        return "Mixed", 1.0 - hangul_ratio
+
+    if other_tokens:
+        return "Other", other_tokens / counted
+
+    lowered = [t.lower() for t in latin_tokens]
+    if any(_is_vietnamese(ch) for token in latin_tokens for ch in token):
+        return "Vietnamese", 0.9
+
+    id_hits = sum(1 for t in lowered if t in INDONESIAN_STOPWORDS)
+    en_hits = sum(1 for t in lowered if t in ENGLISH_STOPWORDS)
+    if id_hits > en_hits:
+        return "Indonesian", id_hits / len(lowered)
+    if en_hits:
+        return "English", en_hits / len(lowered)
+    return "Other", 0.0
+
+def is_confident_korean(text: str) -> bool:
+    language, confidence = detect_language(text)
+    return language == "Korean" and confidence >= KOREAN_CONFIDENCE_THRESHOLD
+
+def needs_context_hint(korean_text: str) -> bool:
+    """
+    번역 LLM을 건너뛸 때 needs_context 값을 대신 판단합니다.
+    지시어/상대 참조가 있거나, 주어 없이 짧게 끝나는 질문이면 True.
+    """
+    text = korean_text.strip()
+    if any(marker in text for marker in CONTEXT_MARKERS):
+        return True
+    content_len = sum(1 for ch in text if ch.isalnum())
+    return content_len <= 4 and text.endswith(QUESTION_ENDINGS)
+
+# ---------------------------------------------------------
+# 적중률 통계
+# ---------------------------------------------------------
+def record_fast_path(hit: bool):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+
+def get_lang_detect_stats() -> dict:
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "miss_rate": misses / total if total else 0.0,
+    }
@@ -0,0 +1,110 @@
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+
+from langchain_core.documents import Document
+
+from utils.handle_sql import get_all_terms
+
+# BM25 파라미터 / 용어명(word) 필드 가중치
+BM25_K1 = 1.5
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+# 질문에 용어명이 그대로 포함됐다고 볼 최소 길이 (한 글자 용어의 오탐 방지)
+MIN_MENTION_LENGTH = 2
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+|[가-힣]+")
+
+_index = None
+_index_lock = threading.Lock()
+
+# ---------------------------------------------------------
+# 토크나이저
+# ---------------------------------------------------------
+def tokenize(text: str) -> list:
+    """
+    영문/숫자는 소문자 단어 단위, 한글은 음절 bigram 단위로 분리합니다.
+    조사가 붙은 형태("기준금리가")도 bigram이 겹치므로 형태소 분석기 없이 매칭됩니다.
+    """
+    tokens = []
+    for chunk in _TOKEN_PATTERN.findall(text or ""):
+        if chunk.isascii():
+            tokens.append(chunk.lower())
+        elif len(chunk) == 1:
+            tokens.append(chunk)
+        else:
+            tokens.extend(chunk[i:i + 2] for i in range(len(chunk) - 1))
+    return tokens
+
+def compact(text: str) -> str:
+    return re.sub(r"[^0-9a-z가-힣]", "", (text or "").lower())
+
+def term_document(row: dict) -> Document:
+    """sync_mysql_to_chroma()가 저장하는 문서와 같은 형식의 Document"""
+    return Document(
+        page_content=f"{row['word']}: {row['definition']}",
+        metadata={"original_id": row["id"], "word": row["word"]},
+    )
+
+# ---------------------------------------------------------
+# BM25 역색인
+# ---------------------------------------------------------
+class BM25Index:
+    def __init__(self, rows: list):
+        self.rows = list(rows)
+        self.postings = defaultdict(list)   # token -> [(문서 번호, tf)]
+        self.doc_lengths = []
+
+        for doc_idx, row in enumerate(self.rows):
+            counts = Counter(tokenize(row["definition"]))
+            for token in tokenize(row["word"]):
+                counts[token] += TITLE_WEIGHT
+            self.doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((doc_idx, tf))
+
+        total_docs = len(self.rows) or 1
+        self.avg_length = (sum(self.doc_lengths) / total_docs) if self.doc_lengths else 0.0
+        self.idf = {
+            token: math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, query: str, k: int = 5) -> list:
+        """반환값: [(행 dict, BM25 점수)] 점수 내림차순"""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for doc_idx, tf in self.postings[token]:
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_idx] / (self.avg_length or 1)
+                scores[doc_idx] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.rows[doc_idx], score) for doc_idx, score in ranked]
+
+    @staticmethod
+    def is_mentioned(word: str, query: str) -> bool:
+        """질문에 용어명이 (공백/기호 무시) 그대로 들어 있는지"""
+        word = compact(word)
+        return len(word) >= MIN_MENTION_LENGTH and word in compact(query)
+
+def get_lexical_index() -> BM25Index:
+    """terms 테이블 전체로 BM25 인덱스를 한 번만 구축합니다. (첫 호출 시 DB 조회)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = BM25Index(get_all_terms())
+    return _index
+
+def reset_lexical_index():
+    """terms 테이블이 갱신된 뒤 호출하면 다음 검색 시 인덱스를 다시 만듭니다."""
+    global _index
+    with _index_lock:
+        _index = None
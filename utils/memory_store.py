@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from langchain_openai import ChatOpenAI
+
+from utils.agent_utils import PROJECT_ROOT, get_chain, count_tokens, print_log
+
+MEMORY_ROOT = PROJECT_ROOT / "logs" / "memory"
+SUMMARIZER_PROMPT_DIR = PROJECT_ROOT / "rag_agent" / "prompt" / "main"
+SUMMARIZER_PROMPT_FILE = "main_06_summarizer.md"
+
+# 원문 그대로 유지할 최근 대화 턴 수 / 프롬프트에 넣을 대화 기록의 최대 토큰 수
+MAX_RECENT_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+# 요약에 실패한 턴을 다시 시도할 최대 횟수. 넘기면 pending에서 빼서 파일/프롬프트가 계속 커지지 않도록 함
+SUMMARY_MAX_ATTEMPTS = int(os.getenv("MEMORY_SUMMARY_MAX_ATTEMPTS", "3"))
+
+NO_HISTORY_TEXT = "이전 대화 기록 없음(No previous conversation history)."
+
+_memories = {}
+_memories_lock = threading.Lock()
+# 요약 갱신은 요청 경로 밖에서 순서대로 처리 (요약은 이전 요약에 누적되므로 단일 워커)
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="beott-memory")
+_summarizer_llm = None
+
+def _get_summarizer_llm():
+    global _summarizer_llm
+    if _summarizer_llm is None:
+        _summarizer_llm = ChatOpenAI(model="gpt-5-mini")
+    return _summarizer_llm
+
+def _memory_path(username: str):
+    safe_name = re.sub(r"[^\w.-]", "_", username or "anonymous")
+    return MEMORY_ROOT / f"{safe_name}.json"
+
+def _index_of(turns: list, turn: dict) -> int:
+    """같은 내용의 턴이 여러 번 있을 수 있으므로 객체 기준으로 찾음 (-1: 없음)"""
+    return next((i for i, t in enumerate(turns) if t is turn), -1)
+
+def _format_turn(turn: dict) -> str:
+    return f"**User**: {turn['user']}\n\n**AI**: {turn['ai']}"
+
+# ---------------------------------------------------------
+# 사용자별 대화 메모리
+# ---------------------------------------------------------
+class ConversationMemory:
+    """
+    최근 N턴은 원문 그대로, 그 이전 대화는 롤링 요약(main_06_summarizer.md)으로 보관합니다.
+    밀려난 턴은 요약에 합쳐질 때까지 pending으로 남아 있어 대화 맥락이 비지 않습니다.
+    재시작 후 파일에서 읽은 pending 턴이나 요약에 실패한 턴은 다음 기회(로드 직후 / 다음 add_turn)에 다시 요약합니다.
+    """
+
+    def __init__(self, username: str):
+        self.username = username
+        self.path = _memory_path(username)
+        self.summary = ""
+        self.turns = deque()
+        self.pending = []
+        # 요약 작업에 제출되어 아직 끝나지 않은 pending 턴 (중복 제출 방지)
+        self._queued = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.summary = data.get("summary", "")
+            self.turns = deque(data.get("turns", []))
+            self.pending = data.get("pending", [])
+        except Exception as e:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            print(f"[{now}] [Memory] 메모리 파일 로드 실패 ({self.path.name}): {e}")
+        # 이전 프로세스에서 요약하지 못한 턴
+        self._submit_pending()
+
+    def _save(self):
+        """호출 측에서 self._lock을 잡은 상태로 호출합니다."""
+        MEMORY_ROOT.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"summary": self.summary, "turns": list(self.turns), "pending": self.pending},
+                f, ensure_ascii=False, indent=2,
+            )
+        os.replace(tmp_path, self.path)
+
+    def add_turn(self, user_text: str, ai_text: str):
+        with self._lock:
+            self.turns.append({"user": user_text, "ai": ai_text})
+            while len(self.turns) > MAX_RECENT_TURNS:
+                self.pending.append(self.turns.popleft())
+            self._save()
+        # 새로 밀려난 턴 + 이전에 요약에 실패한 턴
+        self._submit_pending()
+
+    def _submit_pending(self):
+        with self._lock:
+            turns = [turn for turn in self.pending if _index_of(self._queued, turn) < 0]
+            self._queued.extend(turns)
+        for turn in turns:
+            _summary_executor.submit(self._absorb_into_summary, turn)
+
+    def _finish(self, turn: dict):
+        """호출 측에서 self._lock을 잡은 상태로 호출합니다."""
+        i = _index_of(self._queued, turn)
+        if i >= 0:
+            del self._queued[i]
+
+    def _absorb_into_summary(self, turn: dict):
+        t0 = print_log(f"대화 요약 갱신 ({self.username})", "start")
+        with self._lock:
+            current_summary = self.summary
+        try:
+            chain = get_chain(SUMMARIZER_PROMPT_DIR, SUMMARIZER_PROMPT_FILE, _get_summarizer_llm())
+            new_summary = chain.invoke({
+                "current_summary": current_summary,
+                "user_input": turn["user"],
+                "ai_output": turn["ai"],
+            }).strip()
+        except Exception as e:
+            with self._lock:
+                self._finish(turn)
+                i = _index_of(self.pending, turn)
+                if i < 0:
+                    extra = f"요약 실패: {e}"
+                else:
+                    turn["summary_attempts"] = turn.get("summary_attempts", 0) + 1
+                    if turn["summary_attempts"] >= SUMMARY_MAX_ATTEMPTS:
+                        del self.pending[i]
+                        extra = f"요약 {turn['summary_attempts']}회 실패, 대화 기록에서 제외: {e}"
+                    else:
+                        extra = f"요약 실패, 원문 유지 (다음 대화에서 재시도 {turn['summary_attempts']}/{SUMMARY_MAX_ATTEMPTS}): {e}"
+                    self._save()
+            print_log(f"대화 요약 갱신 ({self.username})", "end", t0, extra_info=extra)
+            return
+
+        with self._lock:
+            self._finish(turn)
+            i = _index_of(self.pending, turn)
+            if i < 0:
+                # 요약 중에 clear()로 초기화된 경우 결과를 버립니다.
+                print_log(f"대화 요약 갱신 ({self.username})", "end", t0, extra_info="메모리가 초기화되어 요약 결과 폐기")
+                return
+            del self.pending[i]
+            self.summary = new_summary
+            self._save()
+        print_log(f"대화 요약 갱신 ({self.username})", "end", t0)
+
+    def render(self, token_budget: int = HISTORY_TOKEN_BUDGET) -> str:
+        """
+        요약 + (요약 대기 중인 턴) + 최근 턴을 토큰 예산 안에서 조합합니다.
+        예산을 넘으면 오래된 턴부터 제외하고, 요약은 마지막까지 유지합니다.
+        """
+        with self._lock:
+            summary = self.summary
+            turns = self.pending + list(self.turns)
+
+        summary_block = f"[이전 대화 요약]\n{summary}" if summary else ""
+        used = count_tokens(summary_block)
+        if used > token_budget:
+            return summary_block
+
+        blocks = []
+        for turn in reversed(turns):
+            block = _format_turn(turn)
+            cost = count_tokens(block)
+            if used + cost > token_budget:
+                break
+            blocks.append(block)
+            used += cost
+        blocks.reverse()
+
+        parts = ([summary_block] if summary_block else []) + blocks
+        return "\n\n---\n\n".join(parts) if parts else NO_HISTORY_TEXT
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns.clear()
+            self.pending = []
+            if self.path.exists():
+                self.path.unlink()
+
+def get_memory(username: str) -> ConversationMemory:
+    with _memories_lock:
+        memory = _memories.get(username)
+        if memory is None:
+            memory = ConversationMemory(username)
+            _memories[username] = memory
+    return memory
+
+async def aadd_turn(username: str, user_text: str, ai_text: str):
+    """이벤트 루프용 add_turn: 첫 접근 시 파일 로드와 매 턴 파일 저장을 스레드에서 실행합니다."""
+    await asyncio.to_thread(lambda: get_memory(username).add_turn(user_text, ai_text))
+
+async def arender(username: str, token_budget: int = HISTORY_TOKEN_BUDGET) -> str:
+    """이벤트 루프용 render: 첫 접근 시 파일 로드와 토큰 계산을 스레드에서 실행합니다."""
+    return await asyncio.to_thread(lambda: get_memory(username).render(token_budget))
+
+def reset_memory(username: str):
+    """로그인/로그아웃 시 해당 사용자의 대화 기록을 초기화합니다."""
+    get_memory(username).clear()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    print(f"[{now}] [Memory] {username} 사용자의 대화 기록이 초기화되었습니다.")
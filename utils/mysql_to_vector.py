@@ -1,74 +1,327 @@
 import os
 import json
-import pandas as pd
-from openai import OpenAI
+import random
+import asyncio
+import argparse
+from datetime import datetime
+
+from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from dotenv import load_dotenv
 from tqdm import tqdm
 
-from utils.handle_sql import get_data, execute_query
-
-print("[Embedding] 데이터 벡터화 및 DB 저장 시작...")
+from utils.handle_sql import get_data, execute_query, execute_many, aexecute_many
+from utils.cache_utils import CACHE_DIR
+from utils.embedding_backends import EMBEDDING_BACKEND, backend_model_name, get_embeddings
+from utils.vector_blob import (
+    EMBEDDING_STORAGE_DTYPE, encode_vector, term_content_hash,
+    get_embedding_meta, set_embedding_meta,
+    ensure_chunk_table, chunk_content_hash, get_chunk_hashes,
+)
+from utils.chunking import CHUNK_TOKENS, term_passages
 
 # 1. 환경설정
+# terms 임베딩은 이 모듈에서 한 번만 계산해 MySQL(embedding_blob)에 저장하고,
+# ChromaDB / NumPy 인덱스는 저장된 벡터를 그대로 가져다 씁니다. (utils/handle_chromaDB.py)
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# 기존 JSON 컬럼을 채우던 모델 (마이그레이션 시 메타데이터로 기록)
+LEGACY_JSON_BACKEND = ("openai", os.getenv("LEGACY_JSON_EMBEDDING_MODEL", "text-embedding-3-small"))
+# 한 번의 API 호출에 담을 입력 수 / 동시에 진행할 호출 수
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "96"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+MIGRATION_BATCH_SIZE = 500
+# 실패한 행은 이후 동기화에서 자동으로 다시 시도하되, 이 횟수만큼 연속 실패하면 --retry-failed 전까지 건너뜀
+EMBED_MAX_FAILED_ATTEMPTS = int(os.getenv("EMBED_MAX_FAILED_ATTEMPTS", "3"))
+
+# 진행 상황 체크포인트. 완료된 배치는 즉시 DB에 기록되므로 (embedding_hash 기준으로) 재실행 시 이어서 진행되고,
+# 체크포인트에는 누적 처리 수와 실패한 id별 연속 실패 횟수(failed_attempts)를 남깁니다.
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "embedding_job.json")
 
 
 # 2. 임베딩 컬럼 추가
 def add_embedding_column():
+    # 벡터는 JSON 텍스트 대신 바이너리(BLOB, utils/vector_blob.py 형식)로 저장하고,
+    # 임베딩한 시점의 "용어: 정의" 해시를 함께 남겨 정의가 바뀐 행을 찾습니다.
+    for column, column_type in (("embedding_blob", "MEDIUMBLOB"), ("embedding_hash", "CHAR(16)")):
+        try:
+            execute_query(f"ALTER TABLE terms ADD COLUMN {column} {column_type}")
+            print(f"'{column}' 컬럼이 생성되었습니다.")
+        except Exception as e:
+            if "Duplicate column" in str(e) or "1060" in str(e):
+                print(f"'{column}' 컬럼이 이미 존재합니다.")
+            else:
+                print(f"컬럼 추가 중 경고: {e}")
+
+def migrate_json_embeddings(dtype: str = EMBEDDING_STORAGE_DTYPE, drop_json: bool = False, backend: str = EMBEDDING_BACKEND):
+    """
+    기존 JSON 'embedding' 컬럼의 벡터를 재임베딩 없이 embedding_blob으로 옮깁니다.
+    drop_json=True이면 옮긴 뒤 JSON 컬럼을 삭제합니다. (아직 옮겨지지 않은 행이 있으면 삭제하지 않음)
+    옮긴 벡터는 LEGACY_JSON_BACKEND 모델로 기록되므로, 설정된 백엔드/모델이 그와 다르면
+    다음 동기화에서 _reset_if_model_changed가 모두 지우게 됩니다. 이 경우 마이그레이션하지 않습니다.
+    """
+    configured = (backend, backend_model_name(backend))
+    if configured != LEGACY_JSON_BACKEND:
+        print(f"설정된 임베딩 {configured}이(가) JSON 임베딩 모델 {LEGACY_JSON_BACKEND}과(와) 달라 마이그레이션하지 않습니다. "
+              f"(옮겨도 다음 동기화에서 초기화됨) EMBEDDING_BACKEND={LEGACY_JSON_BACKEND[0]} "
+              f"OPENAI_EMBEDDING_MODEL={LEGACY_JSON_BACKEND[1]}로 설정한 뒤 다시 실행하거나, 마이그레이션 없이 재임베딩하세요.")
+        return
     try:
-        execute_query("ALTER TABLE terms ADD COLUMN embedding JSON")
-        print("'embedding' 컬럼이 생성되었습니다.")
+        rows = get_data("SELECT id FROM terms WHERE embedding IS NOT NULL AND embedding_blob IS NULL ORDER BY id")
     except Exception as e:
-        if "Duplicate column" in str(e) or "1060" in str(e):
-            print("'embedding' 컬럼이 이미 존재합니다.")
-        else:
-            print(f"컬럼 추가 중 경고: {e}")
-
-# 3. 임베딩 생성 함수 (OpenAI API)
-def get_embedding(text, model="text-embedding-3-small"):
-    text = text.replace("\n", " ")  # 줄바꿈 제거
-    return client.embeddings.create(input=[text], model=model).data[0].embedding
-
-# 4. 메인 로직
-def generate_and_save_embeddings():
-    # 1) 아직 임베딩이 없는 데이터만 조회
+        if "Unknown column" in str(e) or "1054" in str(e):
+            print("JSON 'embedding' 컬럼이 없어 마이그레이션할 데이터가 없습니다.")
+            return
+        raise
+    ids = [row['id'] for row in rows]
+    print(f"JSON -> BLOB({dtype}) 마이그레이션 대상: {len(ids)}개")
+
+    migrated = 0
+    for i in tqdm(range(0, len(ids), MIGRATION_BATCH_SIZE), desc="Migrating"):
+        batch_ids = ids[i:i + MIGRATION_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch_ids))
+        batch = get_data(f"SELECT id, word, definition, embedding FROM terms WHERE id IN ({placeholders})", batch_ids)
+        args = []
+        for row in batch:
+            vector = json.loads(row['embedding']) if isinstance(row['embedding'], (str, bytes)) else row['embedding']
+            dim = len(vector)
+            args.append((encode_vector(vector, dtype), term_content_hash(row), row['id']))
+        execute_many("UPDATE terms SET embedding_blob = %s, embedding_hash = %s WHERE id = %s", args)
+        migrated += len(args)
+    print(f"{migrated}개 마이그레이션 완료")
+    if migrated and get_embedding_meta() is None:
+        set_embedding_meta(*LEGACY_JSON_BACKEND, dim=dim, dtype=dtype)
+
+    if drop_json:
+        remaining = get_data("SELECT COUNT(*) AS cnt FROM terms WHERE embedding IS NOT NULL AND embedding_blob IS NULL")
+        if remaining and remaining[0]['cnt']:
+            print(f"아직 옮겨지지 않은 행 {remaining[0]['cnt']}개가 있어 JSON 컬럼을 유지합니다.")
+            return
+        execute_query("ALTER TABLE terms DROP COLUMN embedding")
+        print("JSON 'embedding' 컬럼을 삭제했습니다.")
+
+# 3. 체크포인트
+def load_checkpoint(model: str) -> dict:
+    empty = {"model": model, "embedded": 0, "dim": None, "failed_attempts": {}, "updated_at": None}
+    if not os.path.exists(CHECKPOINT_PATH):
+        return empty
+    try:
+        with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    # 모델이 바뀌면 이전 진행 상황은 의미가 없음
+    if checkpoint.get("model") != model:
+        return empty
+    # 이전 형식(failed_ids 목록)은 1회 실패로 간주
+    attempts = checkpoint.setdefault("failed_attempts", {})
+    for term_id in checkpoint.pop("failed_ids", []):
+        attempts.setdefault(str(term_id), 1)
+    return checkpoint
+
+def _exhausted_ids(checkpoint: dict) -> set:
+    """연속 실패 횟수가 EMBED_MAX_FAILED_ATTEMPTS에 도달해 자동 재시도하지 않는 id"""
+    return {int(term_id) for term_id, n in checkpoint["failed_attempts"].items() if n >= EMBED_MAX_FAILED_ATTEMPTS}
+
+def save_checkpoint(checkpoint: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    checkpoint["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tmp_path = CHECKPOINT_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+# 4. 임베딩 생성 함수 (OpenAI API, 배치 + 재시도)
+def _retry_delay(error, attempt: int) -> float:
+    """Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프 + 지터"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), RETRY_MAX_SECONDS)
+    except ValueError:
+        pass
+    return min(RETRY_BASE_SECONDS * (2 ** attempt), RETRY_MAX_SECONDS) * (0.5 + random.random() / 2)
+
+async def _embed_batch(texts: list[str], embeddings) -> list[list[float]]:
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            return await embeddings.aembed_documents(texts)
+        except RETRYABLE_ERRORS as e:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            tqdm.write(f"   - {type(e).__name__}: {delay:.1f}초 후 재시도 ({attempt + 1}/{EMBED_MAX_RETRIES})")
+            await asyncio.sleep(delay)
+
+async def _process_batch(batch: list[dict], embeddings, dtype: str, semaphore: asyncio.Semaphore, checkpoint: dict, progress):
+    async with semaphore:
+        try:
+            # 검색 정확도를 높이기 위해 '용어'와 '정의'를 결합하여 임베딩 (ChromaDB 문서와 같은 텍스트)
+            vectors = await _embed_batch([f"{row['word']}: {row['definition']}" for row in batch], embeddings)
+            # 배치 단위로 한 번에 업데이트 (execute_many는 실행 후 commit)
+            update_sql = "UPDATE terms SET embedding_blob = %s, embedding_hash = %s WHERE id = %s"
+            await aexecute_many(update_sql, [
+                (encode_vector(vector, dtype), term_content_hash(row), row['id']) for row, vector in zip(batch, vectors)
+            ])
+            checkpoint["embedded"] += len(batch)
+            checkpoint["dim"] = len(vectors[0])
+            for row in batch:
+                checkpoint["failed_attempts"].pop(str(row['id']), None)
+        except Exception as e:
+            ids = [row['id'] for row in batch]
+            tqdm.write(f"\nID {ids[0]}~{ids[-1]} ({len(ids)}개) 처리 중 오류: {e}")
+            for term_id in ids:
+                key = str(term_id)
+                checkpoint["failed_attempts"][key] = checkpoint["failed_attempts"].get(key, 0) + 1
+        finally:
+            save_checkpoint(checkpoint)
+            progress.update(len(batch))
+
+# 5. 긴 정의의 문단(chunk) 임베딩
+CHUNK_UPSERT_SQL = """
+    INSERT INTO term_chunks (term_id, chunk_index, content, embedding_blob, embedding_hash)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE content = VALUES(content), embedding_blob = VALUES(embedding_blob),
+                            embedding_hash = VALUES(embedding_hash)
+"""
+
+async def _process_chunk_batch(batch: list[tuple], embeddings, dtype: str, semaphore: asyncio.Semaphore, progress) -> int:
+    async with semaphore:
+        try:
+            vectors = await _embed_batch([content for _, _, content in batch], embeddings)
+            await aexecute_many(CHUNK_UPSERT_SQL, [
+                (term_id, chunk_index, content, encode_vector(vector, dtype), chunk_content_hash(content))
+                for (term_id, chunk_index, content), vector in zip(batch, vectors)
+            ])
+            return len(batch)
+        except Exception as e:
+            # 실패한 문단은 해시가 갱신되지 않으므로 다음 실행에서 다시 시도됨
+            tqdm.write(f"\n문단 ID {batch[0][0]}~{batch[-1][0]} ({len(batch)}개) 처리 중 오류: {e}")
+            return 0
+        finally:
+            progress.update(len(batch))
+
+async def _aembed_chunks(rows: list[dict], embeddings, dtype: str, semaphore: asyncio.Semaphore) -> int:
+    """
+    CHUNK_TOKENS를 넘는 정의를 문단으로 나눠 term_chunks에 임베딩합니다. (utils/chunking.py)
+    내용이 바뀐 문단만 다시 임베딩하고, 삭제된 용어나 더 이상 나누지 않는 정의의 문단은 지웁니다.
+    반환값: 이번 실행에서 임베딩한 문단 수
+    """
+    ensure_chunk_table()
+    existing = get_chunk_hashes()
+    wanted = {}
+    for row in rows:
+        passages = term_passages(row)
+        if len(passages) > 1:
+            for chunk_index, content in enumerate(passages):
+                wanted[(row['id'], chunk_index)] = content
+
+    stale = [key for key in existing if key not in wanted]
+    if stale:
+        execute_many("DELETE FROM term_chunks WHERE term_id = %s AND chunk_index = %s", stale)
+    pending = [
+        (term_id, chunk_index, content) for (term_id, chunk_index), content in wanted.items()
+        if existing.get((term_id, chunk_index)) != chunk_content_hash(content)
+    ]
+    print(f"문단 임베딩 대상: {len(pending)}개 (긴 정의 문단 {len(wanted)}개, {CHUNK_TOKENS}토큰 기준 / 정리 {len(stale)}개)")
+    if not pending:
+        return 0
+
+    batches = [pending[i:i + EMBED_BATCH_SIZE] for i in range(0, len(pending), EMBED_BATCH_SIZE)]
+    with tqdm(total=len(pending), desc="Chunks") as progress:
+        done = await asyncio.gather(*(_process_chunk_batch(batch, embeddings, dtype, semaphore, progress) for batch in batches))
+    return sum(done)
+
+# 6. 메인 로직
+def _reset_if_model_changed(backend: str, model: str):
+    """저장된 벡터가 다른 백엔드/모델로 만들어졌다면 (차원·공간이 달라 섞어 쓸 수 없으므로) 모두 비웁니다."""
+    meta = get_embedding_meta()
+    if meta is None or (meta['backend'], meta['model']) == (backend, model):
+        return
+    print(f"임베딩 모델 변경 ({meta['backend']} / {meta['model']}) -> ({backend} / {model}): 저장된 벡터를 초기화합니다.")
+    execute_query("UPDATE terms SET embedding_blob = NULL, embedding_hash = NULL")
+    ensure_chunk_table()
+    execute_query("DELETE FROM term_chunks")
+
+async def agenerate_and_save_embeddings(backend: str = EMBEDDING_BACKEND, retry_failed: bool = False,
+                                       dtype: str = EMBEDDING_STORAGE_DTYPE) -> int:
+    """
+    새로 생겼거나 정의가 바뀐 (embedding_hash 불일치) 행만 임베딩해 embedding_blob에 저장하고,
+    긴 정의는 문단 단위로도 임베딩해 term_chunks에 저장합니다.
+    반환값: 이번 실행에서 임베딩한 행 + 문단 수
+    """
+    model = backend_model_name(backend)
+    # 429 등은 _embed_batch가 Retry-After를 따라 재시도하므로 SDK 재시도는 끔 (재시도가 겹쳐 요청 수가 불어나지 않도록)
+    embeddings = get_embeddings(backend, model, max_retries=0)
+    _reset_if_model_changed(backend, model)
+
+    checkpoint = load_checkpoint(f"{backend}:{model}")
+    if retry_failed:
+        checkpoint["failed_attempts"] = {}
+
+    # 1) 임베딩이 없거나 오래된 데이터만 추림 (이전 실행에서 완료된 배치는 자동으로 제외됨)
     print("임베딩 대상 데이터를 조회합니다...")
-    rows = get_data("SELECT id, word, definition FROM terms WHERE embedding IS NULL")
-    
-    # Pandas DataFrame으로 변환
-    df = pd.DataFrame(rows)
-    total_count = len(df)
-    print(f"임베딩 대상 데이터: {total_count}개")
-    
+    all_rows = get_data("SELECT id, word, definition, embedding_hash FROM terms WHERE definition IS NOT NULL ORDER BY id")
+    rows = [row for row in all_rows if row['embedding_hash'] != term_content_hash(row)]
+    # 삭제됐거나 그 사이 임베딩된 행의 실패 기록은 정리
+    pending_ids = {str(row['id']) for row in rows}
+    checkpoint["failed_attempts"] = {k: n for k, n in checkpoint["failed_attempts"].items() if k in pending_ids}
+    exhausted = _exhausted_ids(checkpoint)
+    retrying = len(checkpoint["failed_attempts"]) - len(exhausted)
+    if retrying:
+        print(f"이전 실행에서 실패한 {retrying}개를 다시 시도합니다. (최대 {EMBED_MAX_FAILED_ATTEMPTS}회)")
+    if exhausted:
+        print(f"{EMBED_MAX_FAILED_ATTEMPTS}회 연속 실패한 {len(exhausted)}개는 건너뜁니다. (--retry-failed로 재시도)")
+        rows = [row for row in rows if row['id'] not in exhausted]
+
+    total_count = len(rows)
+    print(f"임베딩 대상 데이터: {total_count}개 (누적 완료 {checkpoint['embedded']}개, 임베딩: {backend} / {model})")
+
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+    embedded_before = checkpoint["embedded"]
     if total_count == 0:
         print("🎉 모든 데이터에 임베딩이 이미 존재합니다.")
-        return
+    else:
+        # 2) 배치로 나눠 제한된 동시성으로 임베딩 생성 및 업데이트
+        print(f"🚀 벡터 생성 및 저장을 시작합니다... (배치 {EMBED_BATCH_SIZE} / 동시 {EMBED_CONCURRENCY})")
+        batches = [rows[i:i + EMBED_BATCH_SIZE] for i in range(0, total_count, EMBED_BATCH_SIZE)]
+        with tqdm(total=total_count, desc="Processing") as progress:
+            await asyncio.gather(*(_process_batch(batch, embeddings, dtype, semaphore, checkpoint, progress) for batch in batches))
 
-    # 2) 순회하며 임베딩 생성 및 업데이트
-    print("🚀 벡터 생성 및 저장을 시작합니다...")
-    
-    for index, row in tqdm(df.iterrows(), total=total_count, desc="Processing"):
-        try:
-            # 검색 정확도를 높이기 위해 '용어'와 '정의'를 결합하여 임베딩
-            combined_text = f"{row['word']}: {row['definition']}"
-            
-            # API 호출
-            vector = get_embedding(combined_text)
-            
-            # execute_query를 사용하여 건별 업데이트
-            # handle_sql.execute_query는 실행 후 자동 commit
-            update_sql = "UPDATE terms SET embedding = %s WHERE id = %s"
-            
-            # JSON 직렬화 후 저장
-            execute_query(update_sql, (json.dumps(vector), row['id']))
-            
-        except Exception as e:
-            print(f"\nID {row['id']} ({row['word']}) 처리 중 오류: {e}")
-            continue
+        # 3) 어떤 백엔드/모델/차원으로 만든 벡터인지 기록 (ChromaDB 컬렉션 메타데이터의 기준)
+        if checkpoint.get("dim"):
+            set_embedding_meta(backend, model, checkpoint["dim"], dtype)
 
+        if checkpoint["failed_attempts"]:
+            print(f"\n{len(checkpoint['failed_attempts'])}개 처리 실패. 다음 동기화에서 다시 시도합니다. "
+                  f"({EMBED_MAX_FAILED_ATTEMPTS}회 연속 실패한 행은 --retry-failed로 재시도)")
+
+    # 4) 긴 정의의 문단 벡터 (정의가 그대로여도 분할 설정이 바뀌었을 수 있으므로 전체 행 기준으로 확인)
+    chunks_embedded = await _aembed_chunks(all_rows, embeddings, dtype, semaphore)
     print("\n임베딩 생성 및 저장이 완료되었습니다!")
+    return checkpoint["embedded"] - embedded_before + chunks_embedded
+
+def generate_and_save_embeddings(backend: str = EMBEDDING_BACKEND, retry_failed: bool = False,
+                                dtype: str = EMBEDDING_STORAGE_DTYPE) -> int:
+    return asyncio.run(agenerate_and_save_embeddings(backend, retry_failed, dtype))
 
 if __name__ == "__main__":
+    print("[Embedding] 데이터 벡터화 및 DB 저장 시작...")
+    parser = argparse.ArgumentParser(description="terms 임베딩 생성 (배치 / 동시 실행 / 재개 가능)")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=["openai", "onnx"], help="임베딩 백엔드")
+    parser.add_argument("--retry-failed", action="store_true", help="연속 실패 횟수 상한에 걸린 행도 다시 시도")
+    parser.add_argument("--dtype", default=EMBEDDING_STORAGE_DTYPE, choices=["float32", "float16", "int8"], help="BLOB 저장 형식")
+    parser.add_argument("--migrate", action="store_true",
+                        help="기존 JSON 임베딩을 BLOB으로 옮긴 뒤 종료 (--backend / OPENAI_EMBEDDING_MODEL이 JSON을 만든 모델"
+                             "(LEGACY_JSON_EMBEDDING_MODEL, 기본 text-embedding-3-small)과 같을 때만)")
+    parser.add_argument("--drop-json", action="store_true", help="마이그레이션 후 JSON 'embedding' 컬럼 삭제")
+    args = parser.parse_args()
     add_embedding_column()
-    generate_and_save_embeddings()
\ No newline at end of file
+    if args.migrate:
+        migrate_json_embeddings(args.dtype, drop_json=args.drop_json, backend=args.backend)
+    else:
+        generate_and_save_embeddings(args.backend, retry_failed=args.retry_failed, dtype=args.dtype)
@@ -0,0 +1,142 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+# pdfplumber 레이아웃 분석은 CPU 바운드이므로 페이지 단위로 프로세스 풀에 나눠 처리합니다.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+# 한 번에 워커에 넘길 페이지 수 (IPC 오버헤드와 순서 대기 사이의 절충)
+PDF_CHUNKSIZE = int(os.getenv("PDF_CHUNKSIZE", "4"))
+# 영역별 추출 텍스트 캐시 (PDF 해시 + 페이지 + crop box + pdfplumber 버전). 분할 규칙만 바꿔 다시 적재할 때 추출을 생략합니다.
+PDF_PAGE_CACHE = os.getenv("PDF_PAGE_CACHE", "true").lower() == "true"
+
+# ---------------------------------------------------------
+# 페이지 영역 (page.width, page.height -> crop box 목록)
+# ---------------------------------------------------------
+def index_boxes(width, height):
+    """목차 페이지: 좌/우 2단"""
+    return [(0, 60, width / 2, height - 50), (width / 2, 60, width, height - 50)]
+
+def body_boxes(width, height):
+    """본문 페이지: 머리말/꼬리말 제외"""
+    return [(0, 80, width, height - 70)]
+
+LAYOUTS = {"index": index_boxes, "body": body_boxes}
+
+# ---------------------------------------------------------
+# 워커 (프로세스마다 PDF를 한 번만 열어 재사용)
+# ---------------------------------------------------------
+_worker_pdf = None
+
+def _init_worker(pdf_path: str):
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+def _extract_page(task):
+    """(페이지 번호(1부터), crop box 목록) -> (페이지 번호, 영역별 텍스트 목록). 추출에 실패한 영역은 None"""
+    page_number, boxes = task
+    page = _worker_pdf.pages[page_number - 1]
+    texts = []
+    for box in boxes:
+        try:
+            texts.append(page.crop(box).extract_text() or "")
+        except Exception:
+            texts.append(None)
+    # 페이지 객체가 캐시한 글자/레이아웃 정보를 비워 워커 메모리가 페이지 수만큼 늘지 않도록 함
+    page.close()
+    return page_number, texts
+
+# ---------------------------------------------------------
+# 추출 캐시 (부모 프로세스에서만 사용)
+# ---------------------------------------------------------
+_page_cache = None
+
+def get_page_cache():
+    global _page_cache
+    if _page_cache is None:
+        from utils.cache_utils import DiskCache
+        _page_cache = DiskCache("pdf_pages")
+    return _page_cache
+
+def pdf_sha256(pdf_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _box_key(pdf_hash: str, page_number: int, box) -> str:
+    from utils.cache_utils import make_key
+    return make_key("pdf_page", pdf_hash, page_number, tuple(round(v, 2) for v in box), pdfplumber.__version__)
+
+# ---------------------------------------------------------
+# 순서 보장 스트리밍
+# ---------------------------------------------------------
+def count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+def _resolve_boxes(pdf_path: str, tasks: list) -> list:
+    """[(페이지 번호, 레이아웃)] -> [(페이지 번호, crop box 목록)]. 페이지 크기는 내용 분석 없이 mediabox에서 읽습니다."""
+    with pdfplumber.open(pdf_path) as pdf:
+        resolved = []
+        for page_number, layout in tasks:
+            page = pdf.pages[page_number - 1]
+            resolved.append((page_number, LAYOUTS[layout](page.width, page.height)))
+        return resolved
+
+def _iter_extracted(pdf_path: str, tasks: list, workers: int):
+    """[(페이지 번호, crop box 목록)]을 순서대로 추출"""
+    if not tasks:
+        return
+    if workers <= 1:
+        _init_worker(pdf_path)
+        try:
+            for task in tasks:
+                yield _extract_page(task)
+        finally:
+            _worker_pdf.close()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_path,)) as executor:
+        yield from executor.map(_extract_page, tasks, chunksize=PDF_CHUNKSIZE)
+
+def iter_page_texts(pdf_path: str, tasks: list, workers: int = PDF_WORKERS, use_cache: bool = PDF_PAGE_CACHE):
+    """
+    tasks: [(페이지 번호, 레이아웃)]
+    페이지 텍스트를 프로세스 풀에서 추출하되, 결과는 tasks 순서대로 하나씩 내보냅니다. (페이지를 넘는 제목/본문 이어붙이기용)
+    use_cache=True이면 캐시에 없는 영역만 추출하고, 새로 추출한 텍스트는 캐시에 저장합니다.
+    """
+    resolved = _resolve_boxes(pdf_path, tasks)
+    if not use_cache:
+        yield from _iter_extracted(pdf_path, resolved, workers)
+        return
+
+    cache = get_page_cache()
+    pdf_hash = pdf_sha256(pdf_path)
+    plans = []
+    misses = []
+    for page_number, boxes in resolved:
+        keys = [_box_key(pdf_hash, page_number, box) for box in boxes]
+        texts = [cache.get(key) for key in keys]
+        missing = [i for i, text in enumerate(texts) if text is None]
+        plans.append((page_number, keys, texts, missing))
+        if missing:
+            misses.append((page_number, [boxes[i] for i in missing]))
+
+    extracted = _iter_extracted(pdf_path, misses, workers)
+    for page_number, keys, texts, missing in plans:
+        if missing:
+            _, new_texts = next(extracted)
+            for i, text in zip(missing, new_texts):
+                texts[i] = text
+                # 추출 실패는 캐시하지 않음 (다음 실행에서 다시 시도)
+                if text is not None:
+                    cache.set(keys[i], text)
+        yield page_number, texts
+    extracted.close()
+
+    total_boxes = sum(len(keys) for _, keys, _, _ in plans)
+    missed_boxes = sum(len(missing) for _, _, _, missing in plans)
+    print(f"   - 페이지 추출 캐시: {total_boxes - missed_boxes}/{total_boxes}개 영역 적중, {len(misses)}페이지 새로 추출")
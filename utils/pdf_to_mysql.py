@@ -1,13 +1,21 @@
 import os
-import pdfplumber
+import sys
 import re
-import pandas as pd
+import time
+import argparse
+import resource
+from itertools import islice
 from dotenv import load_dotenv
 
+# 추출 캐시(utils.cache_utils)를 쓰기 위해 프로젝트 루트를 import 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
 
-from handle_sql import execute_query, execute_many
-
-print("[최종] 금융 용어 PDF -> MySQL DB 적재 시작 (Strict Match Mode)...")
+from handle_sql import execute_query, execute_many, get_data
+from text_utils import normalize
+from pdf_extract import PDF_WORKERS, PDF_PAGE_CACHE, count_pages, iter_page_texts
 
 # 1. 환경변수 로드
 load_dotenv()
@@ -20,6 +28,12 @@ PDF_FILE_PATH = os.path.join(BASE_DIR, "..", "data", "economic_terms.pdf")
 INDEX_START_PAGE = 5   
 INDEX_END_PAGE = 16    
 BODY_START_PAGE = 17   
+# 본문 파싱이 끝난 용어를 이 개수만큼 모아 DB에 저장
+INSERT_BATCH_SIZE = 200
+
+# "연관검색어 : 기준금리, 콜금리" 줄. 쉼표로 끝나면 다음 줄까지 이어지는 목록입니다.
+RELATED_PATTERN = re.compile(r'연관검색어\s*[:：]?\s*(?P<terms>.*)$')
+RELATED_SEPARATOR = re.compile(r'\s*[,，、]\s*')
 
 # 3. 테이블 초기화 (기존 데이터 삭제 후 재생성)
 def init_db_table():
@@ -36,130 +50,221 @@ def init_db_table():
         );
         """
         execute_query(create_sql)
-        print("DB 테이블(terms) 초기화 완료.")
+
+        # 연관검색어 인접 테이블 (term_id -> related_id, position: PDF에 적힌 순서)
+        execute_query("DROP TABLE IF EXISTS term_relations")
+        execute_query("""
+        CREATE TABLE term_relations (
+            term_id INT NOT NULL,
+            related_id INT NOT NULL,
+            position INT NOT NULL,
+            PRIMARY KEY (term_id, related_id)
+        );
+        """)
+        print("DB 테이블(terms, term_relations) 초기화 완료.")
     except Exception as e:
         print(f"DB 초기화 오류: {e}")
         exit()
 
-# 4. 정규화 함수 (비교용: 공백/특수문자 제거)
-def normalize(text):
-    if not text: return ""
-    return re.sub(r'[\s\(\)\[\]\-\.,･・/]', '', text)
+# 4. 정규화 함수는 utils/text_utils.normalize 사용
 
 # 5. [1단계] 목차 정밀 추출 (노이즈 제거 + 합치기)
-def extract_master_terms():
+def index_tasks():
+    return [(page_number, "index") for page_number in range(INDEX_START_PAGE, INDEX_END_PAGE + 1)]
+
+def extract_master_terms(page_texts=None):
+    """page_texts: 목차 페이지의 (페이지 번호, [좌단 텍스트, 우단 텍스트]) 스트림. 없으면 직접 추출합니다."""
     print("[1단계] 목차 정밀 추출 중...")
+    if page_texts is None:
+        page_texts = iter_page_texts(PDF_FILE_PATH, index_tasks())
     term_list = []
     
     index_pattern = re.compile(r'^(?P<term>.*?)\s*[･・\.]+\s*\d+$')
     noise_prefix_pattern = re.compile(r'^(경제금융용어\s*\d*선|보기|참고)\s*')
 
-    with pdfplumber.open(PDF_FILE_PATH) as pdf:
-        for i in range(INDEX_START_PAGE - 1, INDEX_END_PAGE):
-            page = pdf.pages[i]
-            width = page.width
-            height = page.height
+    for _, texts in page_texts:
+        for text in texts:
+            if not text: continue
             
-            left_box = (0, 60, width / 2, height - 50)
-            right_box = (width / 2, 60, width, height - 50)
+            lines = text.split('\n')
+            prev_line = ""
             
-            for box in [left_box, right_box]:
-                try:
-                    text = page.crop(box).extract_text()
-                except: continue
-                if not text: continue
-                
-                lines = text.split('\n')
-                prev_line = ""
+            for line in lines:
+                clean_line = line.replace("찾아보기", "").replace("찾아보", "").replace("❙", "").strip()
+                if not clean_line: continue
                 
-                for line in lines:
-                    clean_line = line.replace("찾아보기", "").replace("찾아보", "").replace("❙", "").strip()
-                    if not clean_line: continue
-                    
-                    clean_line = noise_prefix_pattern.sub('', clean_line)
-
-                    match = index_pattern.match(clean_line)
-                    if match:
-                        current_term = match.group('term').strip()
-                        if prev_line:
-                            full_term = f"{prev_line}{current_term}"
-                            term_list.append(full_term)
-                            prev_line = "" 
-                        else:
-                            if len(current_term) > 1:
-                                term_list.append(current_term)
+                clean_line = noise_prefix_pattern.sub('', clean_line)
+
+                match = index_pattern.match(clean_line)
+                if match:
+                    current_term = match.group('term').strip()
+                    if prev_line:
+                        full_term = f"{prev_line}{current_term}"
+                        term_list.append(full_term)
+                        prev_line = "" 
                     else:
-                        if len(clean_line) > 1 and not clean_line.isdigit():
-                            prev_line = clean_line
+                        if len(current_term) > 1:
+                            term_list.append(current_term)
+                else:
+                    if len(clean_line) > 1 and not clean_line.isdigit():
+                        prev_line = clean_line
 
     unique_terms = list(dict.fromkeys(term_list))
     print(f"목차 추출 완료: {len(unique_terms)}개 용어 기준 확보.")
     return unique_terms
 
-# 6. [2단계] 본문 파싱 및 DB 적재
-def parse_and_insert_db():
-    init_db_table()
-    
-    master_terms = extract_master_terms()
-    normalized_master_set = set(normalize(t) for t in master_terms)
-    
-    print(f"[2단계] 본문 분석 및 DB 적재 시작 (엄격한 일치)...")
-    
-    data_list = [] 
-    
-    with pdfplumber.open(PDF_FILE_PATH) as pdf:
-        current_title = ""
-        current_body = ""
-        
-        for i, page in enumerate(pdf.pages):
-            current_page_num = i + 1
-            if current_page_num < BODY_START_PAGE: continue
-            
-            width, height = page.width, page.height
-            try:
-                cropped = page.crop((0, 80, width, height - 70))
-                text = cropped.extract_text()
-            except: continue
+# 6. [2단계] 본문 파싱 (페이지 순서대로 들어오는 텍스트에서 용어 단위로 잘라냄)
+def _split_related(text: str) -> tuple[list, bool]:
+    """연관검색어 목록 텍스트 -> (용어명 목록, 다음 줄로 이어지는지)"""
+    names = [name.strip(" ·･.") for name in RELATED_SEPARATOR.split(text)]
+    return [name for name in names if name], text.rstrip().endswith((",", "，", "、"))
+
+def iter_terms(page_texts, normalized_master_set):
+    """
+    (제목, 정의, 연관검색어 목록)을 하나씩 내보냅니다. 페이지 순서가 보장되므로 페이지를 넘어가는 정의도 이어 붙습니다.
+    본문 조각은 리스트에 모았다가 용어가 끝날 때 한 번만 join합니다.
+    """
+    current_title = ""
+    body_parts = []
+    related = []
+    related_continues = False
 
+    for page_number, texts in page_texts:
+        for text in texts:
             if not text: continue
 
-            lines = text.split('\n')
-            for line in lines:
+            for line in text.split('\n'):
                 clean_line = line.strip()
                 if len(clean_line) < 1: continue
-                if "연관검색어" in clean_line: continue
 
                 norm_line = normalize(clean_line)
                 is_title = norm_line in normalized_master_set
 
+                # 다음 용어 제목이 나오면 이어지던 연관검색어 목록은 끝난 것으로 봄
                 if is_title:
-                    if current_title and current_body:
-                        data_list.append((current_title, current_body.strip()))
-                    
+                    if current_title and body_parts:
+                        yield current_title, " ".join(body_parts), related
+
                     current_title = clean_line
-                    current_body = "" 
-                else:
-                    if "PDF.js" not in clean_line and not clean_line.isdigit():
-                        current_body += " " + clean_line
+                    body_parts = []
+                    related = []
+                    related_continues = False
+                    continue
 
-            if current_page_num % 50 == 0:
-                print(f"   ... {current_page_num}페이지 처리 중")
+                # 연관검색어 줄은 정의에 넣지 않고 용어 간 연결로 따로 모음
+                related_match = RELATED_PATTERN.search(clean_line)
+                if related_match or related_continues:
+                    names, related_continues = _split_related(related_match.group('terms') if related_match else clean_line)
+                    related.extend(names)
+                elif "PDF.js" not in clean_line and not clean_line.isdigit():
+                    body_parts.append(clean_line)
 
-        if current_title and current_body:
-            data_list.append((current_title, current_body.strip()))
+        if page_number % 50 == 0:
+            print(f"   ... {page_number}페이지 처리 중")
 
-    # DB에 일괄 저장
-    if data_list:
-        print(f"총 {len(data_list)}개 데이터를 DB에 저장합니다...")
-        
-        insert_sql = "INSERT INTO terms (word, definition) VALUES (%s, %s)"
-        try:
-            count = execute_many(insert_sql, data_list)
-            print(f"성공적으로 {count}개의 데이터가 DB에 적재되었습니다.")
-        except Exception as e:
-            print(f"데이터 적재 중 오류 발생: {e}")
+    if current_title and body_parts:
+        yield current_title, " ".join(body_parts), related
+
+def _flush(batch: list) -> int:
+    insert_sql = "INSERT INTO terms (word, definition) VALUES (%s, %s)"
+    return execute_many(insert_sql, batch)
+
+def insert_relations(related_by_title: list) -> tuple[int, int]:
+    """
+    [(제목, 연관검색어 목록)]을 적재된 terms의 id로 바꿔 term_relations에 저장합니다.
+    용어명은 목차와 같은 normalize() 기준으로 맞추며, 사전에 없는 연관검색어는 건너뜁니다.
+    반환값: (저장한 연결 수, 찾지 못한 연관검색어 수)
+    """
+    id_by_name = {}
+    for row in get_data("SELECT id, word FROM terms ORDER BY id"):
+        id_by_name.setdefault(normalize(row["word"]), row["id"])
+
+    pairs = []
+    unresolved = 0
+    for title, names in related_by_title:
+        term_id = id_by_name.get(normalize(title))
+        if term_id is None:
+            continue
+        seen = set()
+        for name in names:
+            related_id = id_by_name.get(normalize(name))
+            if related_id is None:
+                unresolved += 1
+            elif related_id != term_id and related_id not in seen:
+                seen.add(related_id)
+                pairs.append((term_id, related_id, len(seen)))
+
+    if not pairs:
+        return 0, unresolved
+    insert_sql = "INSERT IGNORE INTO term_relations (term_id, related_id, position) VALUES (%s, %s, %s)"
+    try:
+        saved = 0
+        for i in range(0, len(pairs), INSERT_BATCH_SIZE):
+            saved += execute_many(insert_sql, pairs[i:i + INSERT_BATCH_SIZE])
+        return saved, unresolved
+    except Exception as e:
+        print(f"연관검색어 적재 중 오류 발생: {e}")
+        return 0, unresolved
+
+def _peak_rss_mb() -> float:
+    # Linux의 ru_maxrss 단위는 KB. 워커 프로세스는 RUSAGE_CHILDREN(종료된 자식 중 최대값)으로 집계
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return max(own, children)
+
+# 7. 전체 파이프라인: 페이지 추출(프로세스 풀) -> 목차 -> 본문 파싱 -> 배치 적재
+def parse_and_insert_db(workers: int = PDF_WORKERS, use_cache: bool = PDF_PAGE_CACHE):
+    print("[최종] 금융 용어 PDF -> MySQL DB 적재 시작 (Strict Match Mode)...")
+    t0 = time.perf_counter()
+    init_db_table()
+
+    # PDF 전체를 한 번의 스트림으로 처리 (목차 페이지가 본문보다 앞이므로 목차가 먼저 완성됨)
+    total_pages = count_pages(PDF_FILE_PATH)
+    body_tasks = [(page_number, "body") for page_number in range(BODY_START_PAGE, total_pages + 1)]
+    tasks = index_tasks() + body_tasks
+    page_texts = iter_page_texts(PDF_FILE_PATH, tasks, workers=workers, use_cache=use_cache)
+
+    master_terms = extract_master_terms(islice(page_texts, len(tasks) - len(body_tasks)))
+    normalized_master_set = set(normalize(t) for t in master_terms)
+    
+    print(f"[2단계] 본문 분석 및 DB 적재 시작 (엄격한 일치, 워커 {workers}개, {INSERT_BATCH_SIZE}개 단위 저장)...")
+
+    batch = []
+    related_by_title = []
+    parsed = 0
+    inserted = 0
+    try:
+        for title, definition, related in iter_terms(page_texts, normalized_master_set):
+            batch.append((title, definition))
+            if related:
+                related_by_title.append((title, related))
+            parsed += 1
+            if len(batch) >= INSERT_BATCH_SIZE:
+                inserted += _flush(batch)
+                batch = []
+        if batch:
+            inserted += _flush(batch)
+    except Exception as e:
+        # 배치 하나라도 실패하면 성공으로 보고하거나 연관검색어를 잇지 않고 중단
+        print(f"데이터 적재 중 오류 발생: {e} (적재 {inserted}개 / 파싱 {parsed}개에서 중단)")
+        return False
+
+    # 연관검색어는 모든 용어의 id가 정해진 뒤에 연결 (뒤쪽 페이지 용어를 가리킬 수 있음)
+    relations, unresolved = insert_relations(related_by_title)
+
+    elapsed = time.perf_counter() - t0
+    if parsed:
+        print(f"성공적으로 {inserted}개의 데이터가 DB에 적재되었습니다. (파싱 {parsed}개)")
+        print(f"연관검색어 연결 {relations}개 저장 (사전에 없는 연관검색어 {unresolved}개 제외)")
     else:
         print("저장할 데이터가 없습니다.")
+    print(f"처리 시간: {elapsed:.2f}초 / {len(tasks)}페이지 ({len(tasks) / elapsed:.1f} pages/s) / 최대 RSS: {_peak_rss_mb():.1f}MB")
+    return True
 
 if __name__ == "__main__":
-    parse_and_insert_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="금융 용어 PDF -> MySQL terms 적재")
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS, help="페이지 추출 프로세스 수 (1: 단일 프로세스)")
+    parser.add_argument("--no-cache", action="store_true", help="페이지 추출 캐시를 쓰지 않고 모든 페이지를 다시 추출")
+    args = parser.parse_args()
+    if not parse_and_insert_db(workers=args.workers, use_cache=not args.no_cache):
+        sys.exit(1)
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# 캐시 적중으로 인정할 최소 코사인 유사도
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# ---------------------------------------------------------
+# 임베딩 유사도 기반 답변 캐시
+# ---------------------------------------------------------
+class SemanticCache:
+    """
+    정제된 질문의 임베딩과 한국어 답변을 저장하고, 코사인 유사도가 임계값 이상인
+    기존 질문이 있으면 그 답변을 재사용합니다.
+    namespace(예: KNOWLEDGE, GENERAL)가 다른 항목끼리는 매칭하지 않으며,
+    항목은 TTL이 지나면 만료되고 최대 개수를 넘으면 가장 오래 쓰이지 않은 것부터 제거됩니다.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # entry_id -> dict(namespace, vector, value, expires_at, cost, query)
+        self._matrices = {}             # namespace -> (entry_ids, 정규화된 벡터 행렬)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0, "expired": 0, "evicted": 0}
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _purge_expired(self, now: float):
+        expired = [eid for eid, e in self._entries.items() if e["expires_at"] < now]
+        for eid in expired:
+            self._matrices.pop(self._entries.pop(eid)["namespace"], None)
+        self._stats["expired"] += len(expired)
+
+    def _matrix(self, namespace: str):
+        cached = self._matrices.get(namespace)
+        if cached is None:
+            ids = [eid for eid, e in self._entries.items() if e["namespace"] == namespace]
+            matrix = np.stack([self._entries[eid]["vector"] for eid in ids]) if ids else None
+            cached = (ids, matrix)
+            self._matrices[namespace] = cached
+        return cached
+
+    def lookup(self, vector, namespace: str):
+        """적중 시 (답변, 유사도, 원래 질문), 아니면 None"""
+        query = self._normalize(vector)
+        with self._lock:
+            self._purge_expired(time.time())
+            ids, matrix = self._matrix(namespace)
+            if matrix is None or matrix.shape[1] != query.shape[0]:
+                self._stats["misses"] += 1
+                return None
+
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            entry_id = ids[best]
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += entry["cost"]
+            return entry["value"], similarity, entry["query"]
+
+    def store(self, vector, value, namespace: str, ttl: float, cost: float = 0.0, query: str = ""):
+        with self._lock:
+            self._entries[self._next_id] = {
+                "namespace": namespace,
+                "vector": self._normalize(vector),
+                "value": value,
+                "expires_at": time.time() + ttl,
+                "cost": cost,
+                "query": query,
+            }
+            self._next_id += 1
+            self._matrices.pop(namespace, None)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._matrices.pop(evicted["namespace"], None)
+                self._stats["evicted"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / total if total else 0.0
+        return stats
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+def get_answer_cache() -> SemanticCache:
+    """KNOWLEDGE / GENERAL 답변용 프로세스 전역 시맨틱 캐시"""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticCache()
+    return _answer_cache
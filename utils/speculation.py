@@ -0,0 +1,85 @@
+import os
+import time
+import asyncio
+import threading
+
+# 라우팅이 끝나기 전에 벡터 검색/스키마 조회를 미리 시작할지 여부 (opt-in)
+USE_SPECULATIVE_RETRIEVAL = os.getenv("USE_SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+
+_stats_lock = threading.Lock()
+_stats = {"launched": 0, "used": 0, "discarded": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0}
+
+# ---------------------------------------------------------
+# 투기적 실행 작업
+# ---------------------------------------------------------
+class SpeculativeTask:
+    """
+    라우팅 결과를 기다리지 않고 미리 시작한 작업.
+    선택된 하위 에이전트가 consume()으로 결과를 가져가고, 선택되지 않은 작업은 discard()로 취소합니다.
+
+    - 절약 시간: 결과를 요청한 시점까지 이미 진행된 작업 시간
+    - 낭비 시간: 버려진 작업이 취소/완료될 때까지 실행된 시간
+    """
+
+    def __init__(self, name: str, coro, key: str = None):
+        self.name = name
+        self.key = key
+        self.started = time.time()
+        self.finished = None
+        self._settled = False
+        self.task = asyncio.ensure_future(self._run(coro))
+        with _stats_lock:
+            _stats["launched"] += 1
+
+    async def _run(self, coro):
+        try:
+            return await coro
+        finally:
+            self.finished = time.time()
+
+    def matches(self, key: str) -> bool:
+        return self.key is None or self.key == key
+
+    async def consume(self):
+        requested_at = time.time()
+        result = await self.task
+        if not self._settled:
+            self._settled = True
+            saved = min(requested_at, self.finished) - self.started
+            with _stats_lock:
+                _stats["used"] += 1
+                _stats["saved_seconds"] += max(saved, 0.0)
+        return result
+
+    def discard(self):
+        if self._settled:
+            return
+        self._settled = True
+        if not self.task.done():
+            self.task.cancel()
+        # 취소된 작업의 예외가 "never retrieved" 경고로 남지 않도록 소비
+        self.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        wasted = (self.finished or time.time()) - self.started
+        with _stats_lock:
+            _stats["discarded"] += 1
+            _stats["wasted_seconds"] += wasted
+
+def claim(speculation: dict, name: str, key: str = None):
+    """
+    speculation 중 name 작업만 꺼내고 나머지는 모두 취소합니다.
+    key가 주어졌는데 작업 시작 시점의 입력과 다르면 (예: 맥락 보정으로 질문이 바뀐 경우) 그 작업도 버립니다.
+    """
+    claimed = None
+    for task_name, task in (speculation or {}).items():
+        if task_name == name and (key is None or task.matches(key)):
+            claimed = task
+        else:
+            task.discard()
+    return claimed
+
+def get_speculation_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    decided = stats["used"] + stats["discarded"]
+    stats["use_rate"] = stats["used"] / decided if decided else 0.0
+    return stats
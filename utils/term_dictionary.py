@@ -0,0 +1,84 @@
+import re
+import threading
+
+from utils.handle_sql import get_all_terms
+from utils.text_utils import normalize
+
+# 용어명 뒤에 붙는 질문 표현 ("~가 뭐야?", "~의 뜻 알려줘" 등). normalize()로 공백을 제거한 뒤 비교합니다.
+QUESTION_SUFFIX_PATTERN = re.compile(
+    r"^(이란|란|은|는|이|가|을|를|의|에대해|에대해서)?"
+    r"(뜻|의미|개념|정의)?(이|은|가|을|를)?"
+    r"(뭐야|뭐예요|뭐에요|뭔가요|뭐지|뭐니|뭔데|무엇인가요|무엇이야|무엇|무슨뜻이야|무슨뜻이에요|무슨뜻|"
+    r"설명해줘|설명해주세요|알려줘|알려주세요|가르쳐줘)?$"
+)
+_PUNCTUATION = re.compile(r"[?!~？！]")
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+# ---------------------------------------------------------
+# 정규화된 용어명 Trie
+# ---------------------------------------------------------
+class TermDictionary:
+    """
+    terms.word를 normalize() + 소문자 기준으로 Trie에 넣고,
+    질문이 "<용어명><질문 표현>" 형태일 때만 해당 용어 행을 돌려줍니다.
+    """
+
+    _END = "__row__"
+
+    def __init__(self, rows: list):
+        self.root = {}
+        self.size = 0
+        for row in rows:
+            key = self._key(row["word"])
+            if not key:
+                continue
+            node = self.root
+            for ch in key:
+                node = node.setdefault(ch, {})
+            # 같은 용어명이 여러 번 나오면 먼저 적재된 행을 사용
+            if self._END not in node:
+                node[self._END] = row
+                self.size += 1
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return _PUNCTUATION.sub("", normalize(text)).lower()
+
+    def __len__(self):
+        return self.size
+
+    def prefix_matches(self, text: str) -> list:
+        """text의 앞부분과 일치하는 용어들을 (길이, 행) 목록으로 반환 (긴 것부터)"""
+        key = self._key(text)
+        matches = []
+        node = self.root
+        for i, ch in enumerate(key):
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._END in node:
+                matches.append((i + 1, node[self._END]))
+        return list(reversed(matches))
+
+    def lookup(self, question: str):
+        """질문 전체가 '용어명 + 질문 표현'이면 그 용어 행, 아니면 None"""
+        key = self._key(question)
+        for length, row in self.prefix_matches(question):
+            if QUESTION_SUFFIX_PATTERN.match(key[length:]):
+                return row
+        return None
+
+def get_term_dictionary() -> TermDictionary:
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _dictionary = TermDictionary(get_all_terms())
+    return _dictionary
+
+def reset_term_dictionary():
+    global _dictionary
+    with _dictionary_lock:
+        _dictionary = None
@@ -0,0 +1,48 @@
+import threading
+
+from utils.handle_sql import get_all_terms, get_term_relations
+
+_graph = None
+_graph_lock = threading.Lock()
+
+# ---------------------------------------------------------
+# 연관검색어 인접 맵
+# ---------------------------------------------------------
+class TermGraph:
+    """
+    PDF의 "연관검색어" 줄로 만든 term_relations(term_id -> related_id)를 메모리에 올려 둔 인접 맵.
+    상위 검색 결과의 연관 용어를 추가 벡터 검색 없이 바로 꺼낼 수 있습니다.
+    """
+
+    def __init__(self, rows: list, relations: list):
+        self.rows = {row["id"]: row for row in rows}
+        self.adjacency = {}
+        for relation in relations:
+            term_id, related_id = relation["term_id"], relation["related_id"]
+            # 정의가 없는 용어(검색 대상이 아닌 행)로의 연결은 제외
+            if term_id == related_id or related_id not in self.rows:
+                continue
+            self.adjacency.setdefault(term_id, []).append(related_id)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.adjacency.values())
+
+    def neighbors(self, term_id, limit: int = None) -> list:
+        """연관 용어 행 목록 (PDF에 적힌 순서)"""
+        ids = self.adjacency.get(term_id, [])
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.rows[i] for i in ids]
+
+def get_term_graph() -> TermGraph:
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = TermGraph(get_all_terms(), get_term_relations())
+    return _graph
+
+def reset_term_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
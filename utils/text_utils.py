@@ -0,0 +1,7 @@
+import re
+
+# 정규화 함수 (비교용: 공백/특수문자 제거)
+# PDF 적재(pdf_to_mysql)의 제목 매칭과 지식 에이전트의 용어 사전 매칭이 같은 규칙을 쓰도록 공유합니다.
+def normalize(text):
+    if not text: return ""
+    return re.sub(r'[\s\(\)\[\]\-\.,･・/]', '', text)
@@ -0,0 +1,173 @@
+import os
+import struct
+
+import numpy as np
+
+from utils.handle_sql import get_data, execute_query
+from utils.cache_utils import make_key
+
+# terms.embedding_blob 저장 형식 (float32 / float16 / int8). 기존 행은 각자 헤더에 기록된 형식으로 읽습니다.
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32").lower()
+
+HASH_LENGTH = 16
+
+# ---------------------------------------------------------
+# BLOB 형식
+#   [0]     dtype 코드 (1: float32, 2: float16, 3: int8)
+#   [1:4]   예약 (payload 정렬용)
+#   [4:8]   int8 scale (float32, 그 외 형식은 1.0)
+#   [8:]    벡터 원소 (little-endian)
+# JSON 텍스트 대비 float32는 약 1/4~1/5, int8은 약 1/16 크기입니다.
+# ---------------------------------------------------------
+HEADER_SIZE = 8
+_DTYPES = {
+    "float32": (1, np.dtype("<f4")),
+    "float16": (2, np.dtype("<f2")),
+    "int8": (3, np.dtype("i1")),
+}
+_CODES = {code: (name, dtype) for name, (code, dtype) in _DTYPES.items()}
+
+def encode_vector(vector, dtype: str = EMBEDDING_STORAGE_DTYPE) -> bytes:
+    if dtype not in _DTYPES:
+        raise ValueError(f"지원하지 않는 저장 형식: {dtype}")
+    code, np_dtype = _DTYPES[dtype]
+    values = np.asarray(vector, dtype=np.float32)
+    scale = 1.0
+    if dtype == "int8":
+        # 행별 대칭 양자화: 최대 절댓값을 127에 맞춤
+        scale = float(np.abs(values).max()) / 127.0 or 1.0
+        values = np.clip(np.round(values / scale), -127, 127)
+    return struct.pack("<B3xf", code, scale) + values.astype(np_dtype).tobytes()
+
+def decode_header(blob: bytes) -> tuple[str, float, int]:
+    """(형식, scale, 차원)"""
+    code, scale = struct.unpack_from("<B3xf", blob)
+    name, np_dtype = _CODES[code]
+    return name, scale, (len(blob) - HEADER_SIZE) // np_dtype.itemsize
+
+def decode_vector(blob: bytes, raw: bool = False) -> np.ndarray:
+    """
+    BLOB -> 벡터. np.frombuffer로 복사 없이 읽으며 (읽기 전용 뷰),
+    raw=False이면 float32로 변환해 (int8은 scale 적용) 반환합니다.
+    """
+    code = blob[0]
+    _, np_dtype = _CODES[code]
+    values = np.frombuffer(blob, dtype=np_dtype, offset=HEADER_SIZE)
+    if raw:
+        return values
+    if code == _DTYPES["int8"][0]:
+        return values.astype(np.float32) * struct.unpack_from("<f", blob, 4)[0]
+    return values.astype(np.float32, copy=False)
+
+def load_embedding_matrix(ids: list = None) -> tuple[list, np.ndarray]:
+    """
+    terms.embedding_blob을 한 번의 쿼리로 읽어 (id 목록, float32 행렬)을 만듭니다. ids가 없으면 전체.
+    각 BLOB은 frombuffer 뷰로 읽어 미리 할당한 행렬에 바로 채우므로 JSON 파싱이 없습니다.
+    """
+    sql = "SELECT id, embedding_blob FROM terms WHERE embedding_blob IS NOT NULL"
+    args = None
+    if ids is not None:
+        if not ids:
+            return [], np.empty((0, 0), dtype=np.float32)
+        sql += f" AND id IN ({', '.join(['%s'] * len(ids))})"
+        args = list(ids)
+    rows = get_data(sql + " ORDER BY id", args)
+    return _rows_to_matrix(rows, lambda row: row["id"])
+
+def _rows_to_matrix(rows: list, key) -> tuple[list, np.ndarray]:
+    """embedding_blob 행 목록 -> (key(row) 목록, float32 행렬)"""
+    if not rows:
+        return [], np.empty((0, 0), dtype=np.float32)
+
+    _, _, dim = decode_header(rows[0]["embedding_blob"])
+    matrix = np.empty((len(rows), dim), dtype=np.float32)
+    keys = []
+    for i, row in enumerate(rows):
+        blob = row["embedding_blob"]
+        if decode_header(blob)[2] != dim:
+            raise ValueError(f"임베딩 차원 불일치: {key(row)} (기대 {dim})")
+        matrix[i] = decode_vector(blob)
+        keys.append(key(row))
+    return keys, matrix
+
+# ---------------------------------------------------------
+# 긴 정의의 문단(chunk) 벡터 (utils/chunking.py 기준으로 나눈 용어만 저장)
+# ---------------------------------------------------------
+def ensure_chunk_table():
+    execute_query("""
+        CREATE TABLE IF NOT EXISTS term_chunks (
+            term_id INT NOT NULL,
+            chunk_index INT NOT NULL,
+            content LONGTEXT NOT NULL,
+            embedding_blob MEDIUMBLOB NOT NULL,
+            embedding_hash CHAR(16) NOT NULL,
+            PRIMARY KEY (term_id, chunk_index)
+        )
+    """)
+
+def chunk_content_hash(content: str) -> str:
+    return make_key(content)[:HASH_LENGTH]
+
+def get_chunk_hashes() -> dict:
+    """{(term_id, chunk_index): embedding_hash}. 테이블이 없으면 빈 dict"""
+    try:
+        rows = get_data("SELECT term_id, chunk_index, embedding_hash FROM term_chunks")
+    except Exception as e:
+        if "doesn't exist" in str(e) or "1146" in str(e):
+            return {}
+        raise
+    return {(row["term_id"], row["chunk_index"]): row["embedding_hash"] for row in rows or []}
+
+def load_chunk_matrix(keys: list) -> tuple[list, np.ndarray]:
+    """[(term_id, chunk_index)]의 문단 벡터 -> ((term_id, chunk_index) 목록, float32 행렬)"""
+    if not keys:
+        return [], np.empty((0, 0), dtype=np.float32)
+    term_ids = sorted({term_id for term_id, _ in keys})
+    rows = get_data(
+        f"SELECT term_id, chunk_index, embedding_blob FROM term_chunks WHERE term_id IN ({', '.join(['%s'] * len(term_ids))}) "
+        "ORDER BY term_id, chunk_index",
+        term_ids,
+    )
+    wanted = set(keys)
+    rows = [row for row in rows or [] if (row["term_id"], row["chunk_index"]) in wanted]
+    return _rows_to_matrix(rows, lambda row: (row["term_id"], row["chunk_index"]))
+
+# ---------------------------------------------------------
+# 임베딩 메타데이터 (어떤 백엔드/모델/차원으로 embedding_blob을 채웠는지)
+# ---------------------------------------------------------
+def term_content_hash(row: dict) -> str:
+    """임베딩 대상 텍스트("용어: 정의")의 해시. terms.embedding_hash와 비교해 바뀐 행만 다시 임베딩합니다."""
+    return make_key(f"{row['word']}: {row['definition']}")[:HASH_LENGTH]
+
+def ensure_embedding_meta_table():
+    execute_query("""
+        CREATE TABLE IF NOT EXISTS embedding_meta (
+            name VARCHAR(64) PRIMARY KEY,
+            backend VARCHAR(32) NOT NULL,
+            model VARCHAR(128) NOT NULL,
+            dim INT NOT NULL,
+            dtype VARCHAR(16) NOT NULL,
+            updated_at DATETIME NOT NULL
+        )
+    """)
+
+def get_embedding_meta(name: str = "terms"):
+    try:
+        rows = get_data("SELECT backend, model, dim, dtype FROM embedding_meta WHERE name = %s", (name,))
+    except Exception as e:
+        if "doesn't exist" in str(e) or "1146" in str(e):
+            return None
+        raise
+    return rows[0] if rows else None
+
+def set_embedding_meta(backend: str, model: str, dim: int, dtype: str, name: str = "terms"):
+    ensure_embedding_meta_table()
+    execute_query(
+        """
+        INSERT INTO embedding_meta (name, backend, model, dim, dtype, updated_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE backend = VALUES(backend), model = VALUES(model), dim = VALUES(dim),
+                                dtype = VALUES(dtype), updated_at = VALUES(updated_at)
+        """,
+        (name, backend, model, dim, dtype),
+    )
@@ -0,0 +1,167 @@
+import os
+import json
+import asyncio
+from abc import ABC, abstractmethod
+
+import numpy as np
+from langchain_core.documents import Document
+
+# ---------------------------------------------------------
+# 공통 인터페이스
+# ---------------------------------------------------------
+class VectorIndex(ABC):
+    """
+    load_knowledge_base()가 반환하는 검색 인덱스.
+    similarity_search_with_score 계열은 [(Document, L2 제곱 거리)]를 거리 오름차순으로 반환합니다. (Chroma l2와 동일)
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    @abstractmethod
+    def similarity_search_by_vector_with_score(self, vector, k: int = 5) -> list:
+        ...
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list:
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k=k)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 5) -> list:
+        vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self.similarity_search_by_vector_with_score, vector, k)
+
+# ---------------------------------------------------------
+# Chroma (HNSW)
+# ---------------------------------------------------------
+class ChromaVectorIndex(VectorIndex):
+    def __init__(self, vectorstore):
+        super().__init__(vectorstore.embeddings)
+        self.vectorstore = vectorstore
+
+    def similarity_search_by_vector_with_score(self, vector, k: int = 5) -> list:
+        return self.vectorstore.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list:
+        return self.vectorstore.similarity_search_with_score(query, k=k)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 5) -> list:
+        return await self.vectorstore.asimilarity_search_with_score(query, k=k)
+
+# ---------------------------------------------------------
+# NumPy 정확 검색 (brute-force)
+# ---------------------------------------------------------
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+NORMS_FILE = "norms.npy"
+DOCS_FILE = "docs.json"
+META_FILE = "meta.json"
+# int8 행렬은 float32로 변환해 곱하므로, 큰 코퍼스에서 전체 복사본이 생기지 않도록 블록 단위로 계산합니다.
+SEARCH_BLOCK_ROWS = 65536
+
+def quantize_int8(matrix) -> tuple[np.ndarray, np.ndarray]:
+    """행별 scale을 둔 대칭 int8 양자화. 반환값: (int8 행렬, float32 scale)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.round(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+def save_numpy_index(index_dir: str, ids: list, documents: list, metadatas: list, vectors, meta: dict, quantize: bool = False):
+    """
+    임베딩 행렬을 .npy로 저장합니다. quantize=True이면 행별 scale을 둔 대칭 int8로 저장합니다.
+    meta에는 임베딩 백엔드/모델 정보(컬렉션 메타데이터와 동일)를 기록합니다.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = (matrix * matrix).sum(axis=1)
+
+    if quantize:
+        quantized, scales = quantize_int8(matrix)
+        dequantized = quantized.astype(np.float32) * scales[:, None]
+        norms = (dequantized * dequantized).sum(axis=1)
+        np.save(os.path.join(index_dir, VECTORS_FILE), quantized)
+        np.save(os.path.join(index_dir, SCALES_FILE), scales)
+    else:
+        np.save(os.path.join(index_dir, VECTORS_FILE), matrix)
+        if os.path.exists(os.path.join(index_dir, SCALES_FILE)):
+            os.remove(os.path.join(index_dir, SCALES_FILE))
+    np.save(os.path.join(index_dir, NORMS_FILE), norms.astype(np.float32))
+
+    with open(os.path.join(index_dir, DOCS_FILE), "w", encoding="utf-8") as f:
+        json.dump([{"id": i, "page_content": d, "metadata": m} for i, d, m in zip(ids, documents, metadatas)], f, ensure_ascii=False)
+    with open(os.path.join(index_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({**meta, "dtype": "int8" if quantize else "float32", "count": len(ids), "embedding_dim": int(matrix.shape[1])}, f, ensure_ascii=False, indent=2)
+
+def load_numpy_meta(index_dir: str):
+    path = os.path.join(index_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class NumpyVectorIndex(VectorIndex):
+    """
+    메모리 매핑된 임베딩 행렬에 대한 정확 검색.
+    ||q - d||² = ||q||² + ||d||² - 2·q·d 이므로 행렬-벡터 곱 한 번으로 전체 거리를 계산합니다.
+    """
+
+    def __init__(self, index_dir: str, embeddings):
+        super().__init__(embeddings)
+        self.meta = load_numpy_meta(index_dir)
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        self.norms = np.load(os.path.join(index_dir, NORMS_FILE))
+        scales_path = os.path.join(index_dir, SCALES_FILE)
+        self.scales = np.load(scales_path) if self.meta.get("dtype") == "int8" and os.path.exists(scales_path) else None
+        with open(os.path.join(index_dir, DOCS_FILE), "r", encoding="utf-8") as f:
+            self.docs = json.load(f)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def similarity_search_by_vector_with_score(self, vector, k: int = 5) -> list:
+        query = np.asarray(vector, dtype=np.float32)
+        dots = np.empty(len(self.norms), dtype=np.float32)
+        for start in range(0, len(dots), SEARCH_BLOCK_ROWS):
+            block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+            dots[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+        if self.scales is not None:
+            dots *= self.scales
+        distances = self.norms + float(query @ query) - 2.0 * dots
+
+        k = min(k, len(distances))
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        results = []
+        for i in top:
+            doc = self.docs[i]
+            results.append((Document(id=doc["id"], page_content=doc["page_content"], metadata=doc["metadata"]), float(max(distances[i], 0.0))))
+        return results
+
+# ---------------------------------------------------------
+# 임계값 보정
+# ---------------------------------------------------------
+CALIBRATION_SAMPLE = 1000
+CALIBRATION_NEIGHBORS = 5
+
+def _neighbor_distances(matrix: np.ndarray, sample: np.ndarray, k: int) -> np.ndarray:
+    """표본 행마다 자기 자신을 제외한 최근접 k개의 L2 제곱 거리"""
+    norms = (matrix * matrix).sum(axis=1)
+    distances = norms[sample, None] + norms[None, :] - 2.0 * (matrix[sample] @ matrix.T)
+    distances[np.arange(len(sample)), sample] = np.inf
+    k = min(k, matrix.shape[0] - 1)
+    return np.partition(distances, k - 1, axis=1)[:, :k].ravel()
+
+def calibrate_threshold(reference, candidate, base_threshold: float, seed: int = 42) -> float:
+    """
+    기준 설정(reference, 전체 차원 float32)에서 맞춰 둔 거리 임계값을 다른 설정(candidate: 차원 축소/양자화)으로 옮깁니다.
+    같은 표본의 최근접 이웃 거리 분포에서 base_threshold가 차지하는 분위수를 구해, candidate 분포의 같은 분위수를 임계값으로 씁니다.
+    """
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    if reference.shape[0] < 2:
+        return base_threshold
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(reference.shape[0], size=min(CALIBRATION_SAMPLE, reference.shape[0]), replace=False)
+    quantile = float((_neighbor_distances(reference, sample, CALIBRATION_NEIGHBORS) <= base_threshold).mean())
+    return float(np.quantile(_neighbor_distances(candidate, sample, CALIBRATION_NEIGHBORS), quantile))